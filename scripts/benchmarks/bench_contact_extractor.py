@@ -0,0 +1,154 @@
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from contact_extractor import extract_contacts
+
+
+def legacy_extract_info_from_content(content, text_content):
+    """bot_scraper.extract_info_from_content before the contact_extractor module"""
+    emails = re.findall(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", content)
+    phones = re.findall(r"\+?\d[\d\-\(\) ]{7,}\d", text_content)
+
+    title = re.search(r"<title>(.*?)</title>", content, re.IGNORECASE)
+    company_name = title.group(1).strip() if title else "Not found"
+
+    ceo_match = re.findall(
+        r"(Mr\.|Ms\.|Dr\.|Prof\.)?\s?[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\s?\(?((CEO|Chief Executive|Managing Partner|Founder|Managing Director)[^)]+)?\)?",
+        text_content,
+    )
+    ceo_candidates = [" ".join(filter(None, match)).strip() for match in ceo_match]
+    ceo_candidates = list(
+        set(
+            [
+                name
+                for name in ceo_candidates
+                if any(
+                    title in name
+                    for title in ["CEO", "Founder", "Managing", "Director"]
+                )
+            ]
+        )
+    )
+
+    address_pattern = re.compile(r"\d{5}\s[A-Za-zäöüÄÖÜß\-\s]+")
+    addresses = address_pattern.findall(text_content)
+
+    linkedin_links = re.findall(
+        r"https://[a-z]+\.linkedin\.com/(in|company)/[a-zA-Z0-9\-_%]+", content
+    )
+    linkedin_links = list(
+        set(
+            [
+                "https://" + match[0] + ".linkedin.com/" + match[1]
+                for match in linkedin_links
+            ]
+        )
+    )
+
+    return {
+        "company_name": company_name,
+        "emails": list(set(emails)),
+        "phones": list(set(phones)),
+        "addresses": list(set(addresses)),
+        "ceo_candidates": ceo_candidates,
+        "linkedin_profiles": linkedin_links,
+    }
+
+
+WORDS = (
+    "Kanzlei Rechtsanwalt Markenrecht Vertrag Beratung Mandanten Gericht "
+    "Berlin München Hamburg Köln Straße Team Erfahrung Urteil Recht"
+).split()
+
+
+def make_page(paragraphs, inline_asset_bytes=0, seed=0):
+    """
+    Builds a synthetic firm page (HTML, visible text).
+
+    Args:
+        paragraphs (int): Number of text paragraphs, each with some contact data
+        inline_asset_bytes (int): Size of an inline base64 image, the kind of
+            long unbroken run that made the old email pattern quadratic
+        seed (int): Random seed so runs are comparable
+    """
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(paragraphs):
+        words = " ".join(rng.choice(WORDS) for _ in range(60))
+        blocks.append(
+            f"<p>{words} Tel. +49 30 {rng.randint(1000000, 9999999)} "
+            f"{rng.randint(10000, 99999)} Berlin "
+            f"Dr. Hans Müller (Managing Partner) kontakt{i}@kanzlei-{i}.de</p>"
+        )
+        if i % 10 == 0:
+            blocks.append(
+                f'<a href="https://de.linkedin.com/company/kanzlei-{i}">LinkedIn</a>'
+            )
+
+    asset = "".join(
+        rng.choice(string.ascii_letters + string.digits)
+        for _ in range(inline_asset_bytes)
+    )
+    html = (
+        "<html><head><title>Kanzlei Müller &amp; Partner</title></head><body>"
+        + "".join(blocks)
+        + f'<img src="data:image/png;base64,{asset}"></body></html>'
+    )
+    text = re.sub(r"<[^>]+>", "\n", html)
+    return html, text
+
+
+def comparable(result):
+    """
+    The values both extractors must agree on, as sets. A phone is cut
+    before a trailing postcode (the old pattern ran on into it) and an
+    address is reduced to its postcode (the old pattern ran on into the
+    next words). LinkedIn profiles and CEO names are left out: the old code
+    mangled the former and matched the latter very loosely.
+    """
+    return {
+        "company_name": result["company_name"],
+        "emails": set(result["emails"]),
+        "phones": {re.sub(r" \d{5}$", "", phone) for phone in result["phones"]},
+        "postcodes": {address[:5] for address in result["addresses"]},
+    }
+
+
+def check_same_results(html, text):
+    """Stops the benchmark if the extractors disagree, so only equal work is timed"""
+    legacy = comparable(legacy_extract_info_from_content(html, text))
+    new = comparable(extract_contacts(html, text))
+    for field in legacy:
+        if legacy[field] != new[field]:
+            sys.exit(f"❌ {field} differ: legacy {legacy[field]!r}, new {new[field]!r}")
+
+
+def time_function(function, html, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(html, text)
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    CASES = [
+        ("small page", 20, 0, 50),
+        ("large page", 2000, 0, 3),
+        ("large page + 20 KB inline asset", 2000, 20_000, 1),
+    ]
+
+    print(f"{'case':<34}{'size':>10}{'legacy':>12}{'new':>12}{'speedup':>10}")
+    for name, paragraphs, asset_bytes, repeat in CASES:
+        html, text = make_page(paragraphs, asset_bytes)
+        check_same_results(html, text)
+        legacy = time_function(legacy_extract_info_from_content, html, text, repeat)
+        new = time_function(extract_contacts, html, text, repeat)
+        print(
+            f"{name:<34}{len(html) // 1024:>8}KB{legacy * 1000:>10.1f}ms"
+            f"{new * 1000:>10.1f}ms{legacy / new:>9.1f}x"
+        )
@@ -0,0 +1,393 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ("tools", "filter_links", "bots/lawfirms", "bots/specific_pages"):
+    sys.path.append(os.path.join(SCRIPTS_DIR, folder))
+
+# analyze_law_page opens the shared HTTP cache; keep it out of the real one
+os.environ.setdefault(
+    "HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "bench_hot_paths_cache")
+)
+
+from html_document import parse_html
+
+DEFAULT_BASELINE = os.path.normpath(
+    os.path.join(SCRIPTS_DIR, "..", "logs", "hot_paths_baseline.json")
+)
+OPS_TOLERANCE = 0.20  # Slower than the baseline by more than this is flagged
+MEMORY_TOLERANCE = 0.20  # Same for peak memory...
+MEMORY_SLACK = 64 * 1024  # ...once the growth is more than this many bytes
+
+# Body words: none of them is a keyword of the filters, so every function
+# has to read the whole page before the contact footer decides
+PLAIN_WORDS = (
+    "Beratung Mandanten Gericht Vertrag Erfahrung Urteil Verfahren Schutz "
+    "Marke Anmeldung Frist Entscheidung Klage Vertretung Unternehmen "
+    "Gesellschaft Berlin Hamburg Termin Kosten Antrag Wir Sie und die der"
+).split()
+UMLAUT_WORDS = (
+    "Gebühren Größe Fälle Zuständigkeit Prüfung Überblick Ämter Gründung "
+    "Käufer Lösungen Büro Öffentlichkeit Würzburg Düsseldorf München Köln "
+    "Schäden Verträge Rückfragen Gespräch"
+).split()
+
+SPECIALITIES = [
+    "Verkehrsrecht",
+    "Traffic Law",
+    "Markenrecht",
+    "Full-Service Kanzlei",
+    "Arbeitsrecht",
+    "Lizenz- und Urheberrecht",
+    "Familienrecht",
+    "Steuerrecht",
+]
+
+FOOTER = (
+    "<footer><p>Kanzlei Schäfer &amp; Partner Rechtsanwälte</p>"
+    "<p>Musterstraße 12, 10115 Berlin-Mitte</p>"
+    "<p>Tel. +49 30 1234567 · Fax +49 30 1234568</p>"
+    '<p><a href="mailto:kontakt@kanzlei-schaefer.de">kontakt@kanzlei-schaefer.de</a></p>'
+    "<p>Dr. Anna Schäfer (Geschäftsführerin), Jan Weber, Managing Partner</p>"
+    '<a href="https://de.linkedin.com/company/kanzlei-schaefer">LinkedIn</a>'
+    "</footer>"
+)
+
+
+def pathological_text(kind, size, rng):
+    """
+    Inputs that make careless patterns backtrack.
+
+    Args:
+        kind (str): "long_token" (a long run of word characters without an
+            "@", quadratic for lazy email patterns), "digit_run" (a number
+            table, the phone pattern's worst case) or "deep_nesting"
+            (thousands of nested tags)
+        size (int): Rough size in characters
+    """
+    if kind == "long_token":
+        return "".join(
+            rng.choice("abcdefghijklmnopqrstuvwxyz0123456789._-") for _ in range(size)
+        )
+    if kind == "digit_run":
+        return " ".join(str(rng.randint(0, 99)) for _ in range(size // 3))
+    if kind == "deep_nesting":
+        depth = size // 12
+        return "<div>" * depth + "Überblick" + "</div>" * depth
+    raise ValueError(f"Unknown pathological input: {kind}")
+
+
+def make_law_page(
+    size_kb=20,
+    umlaut_density=0.1,
+    links=20,
+    pathological=None,
+    pathological_size=4000,
+    seed=0,
+):
+    """
+    Builds a synthetic German law firm page.
+
+    Plain paragraphs and links fill the page up to size_kb; the firm name,
+    address, phone, email and managers only appear in the footer.
+
+    Args:
+        size_kb (int): Approximate size of the HTML
+        umlaut_density (float): Share of the words that contain umlauts
+        links (int): Internal links spread over the body
+        pathological (str): Optional pathological input placed mid-page,
+            see pathological_text
+        pathological_size (int): Size of the pathological input
+        seed (int): Random seed so runs are comparable
+
+    Returns:
+        str: HTML of the page
+    """
+    rng = random.Random(seed)
+    paragraphs = []
+    size = 0
+    while size < size_kb * 1024:
+        words = " ".join(
+            rng.choice(UMLAUT_WORDS if rng.random() < umlaut_density else PLAIN_WORDS)
+            for _ in range(50)
+        )
+        paragraphs.append(f"<p>{words}.</p>")
+        size += len(paragraphs[-1])
+
+    for i in range(links):
+        position = rng.randrange(len(paragraphs) + 1)
+        paragraphs.insert(
+            position, f'<a href="/leistungen/bereich-{i}">Bereich {i}</a>'
+        )
+    if pathological:
+        paragraphs.insert(
+            len(paragraphs) // 2,
+            f"<p>{pathological_text(pathological, pathological_size, rng)}</p>",
+        )
+
+    return (
+        "<html><head><title>Schäfer &amp; Partner</title>"
+        '<meta name="description" content="Beratung in München und Berlin">'
+        "</head><body><main>"
+        + "".join(paragraphs)
+        + "</main>"
+        + FOOTER
+        + "</body></html>"
+    )
+
+
+def make_firm_list(firms, umlaut_density=0.1, pathological=None, seed=0):
+    """
+    Lines of the filtered_results.txt file written by the hg.org crawler.
+
+    With pathological="many_fields" a tenth of the lines are long runs of
+    "Name: ... |" fields without any URL.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(firms):
+        words = UMLAUT_WORDS if rng.random() < umlaut_density else PLAIN_WORDS
+        name = f"{rng.choice(words)} {rng.choice(words)} Rechtsanwälte {i}"
+        speciality = rng.choice(SPECIALITIES)
+        if pathological == "many_fields" and i % 10 == 0:
+            lines.append("Name: " + f"{name} | " * 300)
+        else:
+            lines.append(
+                f"Name: {name} | Speciality {speciality} | "
+                f"URL: https://www.hg.org/attorney/firm-{i}/{100000 + i}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+# name -> (size_kb, umlaut_density, links, pathological input, see
+# pathological_text; "many_fields" goes to the firm list, see make_firm_list)
+CASES = {
+    "small page": (5, 0.1, 10, None),
+    "large page": (300, 0.1, 200, None),
+    "umlaut heavy": (50, 0.6, 50, None),
+    "link heavy": (50, 0.1, 3000, None),
+    "long token": (50, 0.1, 20, "long_token"),
+    "digit run": (50, 0.1, 20, "digit_run"),
+    "deep nesting": (50, 0.1, 20, "deep_nesting"),
+    "many fields": (50, 0.1, 200, "many_fields"),
+}
+
+
+class CaseInputs:
+    """Everything the benchmarked functions read, built once per case"""
+
+    def __init__(self, size_kb, umlaut_density, links, pathological, folder):
+        firm_list_input = pathological if pathological == "many_fields" else None
+        if firm_list_input:
+            pathological = None
+        self.html = make_law_page(size_kb, umlaut_density, links, pathological)
+        document = parse_html(self.html)
+        # The same texts the scripts hand to the functions
+        self.text_lines = document.text(separator="\n", strip=True)
+        self.text_spaced = document.text(separator=" ", strip=True)
+        self.specialities = [
+            SPECIALITIES[i % len(SPECIALITIES)] + f" {word}"
+            for i, word in enumerate(self.text_spaced.split()[: max(links, 10)])
+        ]
+        self.firm_list = os.path.join(folder, f"firms_{id(self)}.txt")
+        with open(self.firm_list, "w", encoding="utf-8") as f:
+            f.write(make_firm_list(max(links, 10), umlaut_density, firm_list_input))
+
+
+FUNCTIONS = [
+    "extract_info_from_content",
+    "contains_relevant_info",
+    "matches_criteria",
+    "analyze_law_page",
+    "load_law_firms_from_file",
+]
+
+
+def load_benchmarks():
+    """
+    Imports the functions to time from their scripts.
+
+    Returns:
+        dict: name -> (callable(inputs) -> calls made, one function call
+        per op), without the functions whose script can't be imported here
+    """
+    benchmarks = {}
+
+    def add(name, module, make_benchmark):
+        try:
+            benchmarks[name] = make_benchmark(__import__(module))
+        except ImportError as e:
+            print(f"⚠️ Skipping {name}: {e}")
+
+    def extract(bot_scraper):
+        def run(inputs):
+            bot_scraper.extract_info_from_content(inputs.html, inputs.text_lines)
+            return 1
+
+        return run
+
+    def relevant(step2):
+        def run(inputs):
+            step2.contains_relevant_info(inputs.text_spaced)
+            return 1
+
+        return run
+
+    def criteria(step1):
+        def run(inputs):
+            for speciality in inputs.specialities:
+                step1.matches_criteria(speciality)
+            return len(inputs.specialities)
+
+        return run
+
+    def analyze(step3):
+        def run(inputs):
+            # Page taken from the cache: parse + analysis, no download
+            step3.analyze_law_page("https://kanzlei.example/", parse_html(inputs.html))
+            return 1
+
+        return run
+
+    def firm_list(step2):
+        def run(inputs):
+            step2.load_law_firms_from_file(inputs.firm_list)
+            return 1
+
+        return run
+
+    add("extract_info_from_content", "bot_scraper", extract)
+    add("contains_relevant_info", "filter_useful_links_step2", relevant)
+    add("matches_criteria", "bot_get_links_step1", criteria)
+    add("analyze_law_page", "classify_links_by_category_step3", analyze)
+    add("load_law_firms_from_file", "bot_get_data_from_links_step2", firm_list)
+    return benchmarks
+
+
+def ops_per_second(run, inputs, min_time):
+    """Calls per second, repeating run for at least min_time seconds"""
+    run(inputs)  # Warm up (regex caches, lazy imports)
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        calls += run(inputs)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls / elapsed
+
+
+def peak_memory(run, inputs):
+    """Peak bytes allocated by one run, traced apart from the timing"""
+    tracemalloc.start()
+    try:
+        run(inputs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def find_regressions(result, baseline):
+    """Reasons a result is worse than its baseline entry, empty if it is not"""
+    if not baseline:
+        return []
+    reasons = []
+    if result["ops_per_sec"] < baseline["ops_per_sec"] * (1 - OPS_TOLERANCE):
+        reasons.append("slower")
+    growth = result["peak_bytes"] - baseline["peak_bytes"]
+    if growth > MEMORY_SLACK and growth > baseline["peak_bytes"] * MEMORY_TOLERANCE:
+        reasons.append("more memory")
+    return reasons
+
+
+def run_benchmarks(functions, cases, baseline_path, save_baseline=False, min_time=0.3):
+    """
+    Times every function on every case and compares with the baseline.
+
+    Returns:
+        int: Number of regressions found
+    """
+    benchmarks = load_benchmarks()
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    regressions = 0
+    print(
+        f"{'function':<28}{'case':<15}{'ops/s':>12}{'peak':>11}"
+        f"{'baseline':>12}{'change':>9}"
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        for case in cases:
+            inputs = CaseInputs(*CASES[case], folder)
+            for name in functions:
+                if name not in benchmarks:
+                    continue
+                run = benchmarks[name]
+                key = f"{name} | {case}"
+                result = {
+                    "ops_per_sec": ops_per_second(run, inputs, min_time),
+                    "peak_bytes": peak_memory(run, inputs),
+                }
+                results[key] = result
+
+                old = baseline.get(key)
+                change = ""
+                if old:
+                    change = f"{result['ops_per_sec'] / old['ops_per_sec'] - 1:+.0%}"
+                reasons = find_regressions(result, old)
+                regressions += bool(reasons)
+                print(
+                    f"{name:<28}{case:<15}{result['ops_per_sec']:>12,.1f}"
+                    f"{result['peak_bytes'] / 1024:>9.0f}KB"
+                    + (f"{old['ops_per_sec']:>12,.1f}" if old else f"{'':>12}")
+                    + f"{change:>9}"
+                    + (f"  ⚠️ {', '.join(reasons)}" if reasons else "")
+                )
+
+    if save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        baseline.update(results)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"python": sys.version.split()[0], "results": baseline}, f, indent=2
+            )
+        print(f"💾 Baseline saved to {baseline_path}")
+    elif baseline:
+        print(f"{regressions} regressions against {baseline_path}")
+    else:
+        print("No baseline yet, run with --save-baseline to store one")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks of the extraction and classification functions."
+    )
+    parser.add_argument("--functions", nargs="+", choices=FUNCTIONS, default=FUNCTIONS)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store these results as baseline"
+    )
+    parser.add_argument(
+        "--min-time", type=float, default=0.3, help="Seconds each measurement runs"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Usage: python bench_hot_paths.py --save-baseline   (on the reference commit)
+    #        python bench_hot_paths.py                   (exits with 1 on regressions)
+    args = parse_args()
+    regressions = run_benchmarks(
+        args.functions, args.cases, args.baseline, args.save_baseline, args.min_time
+    )
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,114 @@
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from html_document import available_backends, parse_html
+from http_cache import DEFAULT_CACHE_DIR
+
+from bench_contact_extractor import make_page
+
+# The class pattern analyze_law_page counts
+PROFILE_CLASS = re.compile(
+    r"anwalt|attorney|lawyer|profile|profil|team|member|mitglied", re.I
+)
+
+
+def load_corpus(path=None):
+    """
+    Loads the pages to benchmark.
+
+    Args:
+        path (str): Folder of saved pages (any file below it is read as HTML).
+            Defaults to the bodies stored by the HTTP cache; synthetic pages
+            are generated when neither has pages.
+
+    Returns:
+        list: (name, html) tuples
+    """
+    folder = path or os.path.join(DEFAULT_CACHE_DIR, "bodies")
+    files = sorted(
+        f
+        for f in glob.glob(os.path.join(folder, "**", "*"), recursive=True)
+        if os.path.isfile(f)
+    )
+    pages = []
+    for file in files:
+        with open(file, "rb") as f:
+            html = f.read().decode("utf-8", errors="replace")
+        if "<" in html:
+            pages.append((file, html))
+
+    if not pages:
+        print(f"No pages in {folder}, using synthetic pages")
+        pages = [(f"synthetic-{n}", make_page(n, seed=n)[0]) for n in (5, 50, 500)]
+    return pages
+
+
+def analyze(document):
+    """The operations the filter scripts run on every page"""
+    return (
+        document.text(separator=" ", strip=True),
+        document.count_class(PROFILE_CLASS),
+        document.title(),
+        document.meta("description"),
+        document.hrefs(),
+    )
+
+
+def time_backend(backend, pages, repeat):
+    """Seconds spent parsing and analyzing the corpus, best of repeat runs"""
+    parse_times, analyze_times = [], []
+    for _ in range(repeat):
+        parse_seconds = analyze_seconds = 0.0
+        for _, html in pages:
+            start = time.perf_counter()
+            document = parse_html(html, backend)
+            parsed = time.perf_counter()
+            analyze(document)
+            parse_seconds += parsed - start
+            analyze_seconds += time.perf_counter() - parsed
+        parse_times.append(parse_seconds)
+        analyze_times.append(analyze_seconds)
+    return min(parse_times), min(analyze_times)
+
+
+def count_mismatches(backend, pages):
+    """Pages where a backend's answers differ from html.parser's"""
+    mismatches = 0
+    for _, html in pages:
+        reference = analyze(parse_html(html, "html.parser"))
+        result = analyze(parse_html(html, backend))
+        # Parsers may split whitespace-only text differently
+        same_text = reference[0].split() == result[0].split()
+        if not same_text or reference[1:] != result[1:]:
+            mismatches += 1
+    return mismatches
+
+
+if __name__ == "__main__":
+    # Usage: python bench_html_backends.py [folder with saved pages]
+    CORPUS = sys.argv[1] if len(sys.argv) > 1 else None
+    REPEAT = 3
+
+    pages = load_corpus(CORPUS)
+    total_kb = sum(len(html) for _, html in pages) // 1024
+    print(f"Corpus: {len(pages)} pages, {total_kb} KB\n")
+
+    print(
+        f"{'backend':<14}{'parse':>10}{'analyze':>10}{'total':>10}"
+        f"{'pages/s':>10}{'speedup':>9}{'mismatch':>10}"
+    )
+    baseline = None
+    for backend in available_backends():
+        parse_seconds, analyze_seconds = time_backend(backend, pages, REPEAT)
+        total = parse_seconds + analyze_seconds
+        baseline = baseline or total
+        mismatches = 0 if backend == "html.parser" else count_mismatches(backend, pages)
+        print(
+            f"{backend:<14}{parse_seconds * 1000:>8.0f}ms{analyze_seconds * 1000:>8.0f}ms"
+            f"{total * 1000:>8.0f}ms{len(pages) / total:>10.1f}"
+            f"{baseline / total:>8.1f}x{mismatches:>10}"
+        )
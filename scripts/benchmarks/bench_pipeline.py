@@ -0,0 +1,313 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(SCRIPTS_DIR, "tools"))
+from http_replay import (
+    RECORD_ARCHIVE_ENV,
+    REPLAY_SERVER_ENV,
+    ReplayArchive,
+    ReplayServer,
+)
+
+LOGS_DIR = os.path.normpath(os.path.join(SCRIPTS_DIR, "..", "logs"))
+HISTORY_FILE = os.path.join(LOGS_DIR, "benchmark_history.csv")
+
+# Pipeline stages in run order: name -> (script below scripts/, arguments).
+# Every stage runs in the same work folder, so each one reads the files the
+# previous ones wrote (or the corpus inputs for the names nobody writes).
+STAGES = {
+    "search": (
+        "search/search_lawyers_api.py",
+        ["Markenrecht", "--stub", "--min-results", "50"],
+    ),
+    "step1": ("filter_links/filter_links_by_specific_words_step1.py", []),
+    "step2": ("filter_links/filter_useful_links_step2.py", []),
+    "step3": ("filter_links/classify_links_by_category_step3.py", []),
+    "step3_batch": ("filter_links/batch_classify_step3.py", []),
+    "step4": ("filter_links/split_by_category_step4.py", []),
+    "fused_steps1_3": ("filter_links/fused_filter_steps1_3.py", []),
+    "bot_scraper": ("bots/lawfirms/bot_scraper.py", []),
+    "bot_filtered": ("bots/lawfirms/bot_filtered.py", []),
+    "hg_org_links": ("bots/specific_pages/bot_get_links_step1.py", []),
+    "hg_org_data": ("bots/specific_pages/bot_get_data_from_links_step2.py", []),
+    "firm_search": ("bots/browsers/firm_search_bot.py", []),
+    "merge": ("merge/merge_firm_records.py", []),
+}
+
+HISTORY_COLUMNS = [
+    "timestamp",
+    "commit",
+    "mode",
+    "stage",
+    "seconds",
+    "exit_code",
+    "requests",
+    "misses",
+    "errors_injected",
+    "latency",
+    "error_rate",
+]
+
+
+def git_commit():
+    """Short hash of HEAD, with "+" when scripts/ has uncommitted changes"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SCRIPTS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--", "."],
+            cwd=SCRIPTS_DIR,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("+" if dirty else "")
+
+
+def stage_env(work_dir, replay_env):
+    """Environment of the stages: every cache and store starts empty"""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    env.pop(RECORD_ARCHIVE_ENV, None)
+    env.pop(REPLAY_SERVER_ENV, None)
+    env.update(replay_env)
+    env["HTTP_CACHE_DIR"] = os.path.join(work_dir, ".http_cache")
+    env["URL_STORE_PATH"] = os.path.join(work_dir, ".url_store.sqlite")
+    env["SEARCH_CACHE_PATH"] = os.path.join(work_dir, ".search_cache.sqlite")
+    env["SERP_PAGE_CACHE"] = os.path.join(work_dir, ".serp_page_cache.sqlite")
+    return env
+
+
+def run_stage(name, work_dir, env, log_path, timeout):
+    """
+    Runs one stage script to the end.
+
+    Returns:
+        tuple: (wall-clock seconds, exit code, -1 after a timeout)
+    """
+    script, arguments = STAGES[name]
+    started = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        try:
+            exit_code = subprocess.run(
+                [sys.executable, os.path.join(SCRIPTS_DIR, script), *arguments],
+                cwd=work_dir,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                timeout=timeout,
+            ).returncode
+        except subprocess.TimeoutExpired:
+            exit_code = -1
+    return time.perf_counter() - started, exit_code
+
+
+def load_history():
+    if not os.path.exists(HISTORY_FILE):
+        return []
+    with open(HISTORY_FILE, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def append_history(rows):
+    new_file = not os.path.exists(HISTORY_FILE)
+    with open(HISTORY_FILE, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_COLUMNS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def previous_run(history, row):
+    """Last successful run of the same stage with the same replay settings"""
+    for old in reversed(history):
+        if (
+            old["stage"] == row["stage"]
+            and old["mode"] == row["mode"]
+            and old["exit_code"] == "0"
+            and float(old["latency"]) == row["latency"]
+            and float(old["error_rate"]) == row["error_rate"]
+        ):
+            return old
+    return None
+
+
+def benchmark_pipeline(
+    corpus,
+    stages,
+    record=False,
+    latency=0.0,
+    jitter=0.0,
+    error_rate=0.0,
+    error_status=503,
+    seed=0,
+    timeout=3600,
+    keep=False,
+):
+    """
+    Times each stage end to end on the corpus and logs the results.
+
+    The corpus folder holds archive.sqlite (the recorded responses) and
+    inputs/ (the tables the stages start from). In replay mode the stages
+    run against a local ReplayServer, so a run needs no network and two
+    runs see exactly the same pages. In record mode they run against the
+    real sites and every response is added to the archive.
+
+    Results go to logs/benchmarks/<timestamp>/ (stage output and
+    results.json) and one row per stage to logs/benchmark_history.csv.
+
+    Args:
+        corpus (str): Corpus folder
+        stages (list): Names from STAGES, in run order
+        record (bool): Record instead of replaying
+        latency, jitter, error_rate, error_status, seed: See ReplayServer
+        timeout (float): Seconds a stage may run
+        keep (bool): Keep the work folder with the outputs of the stages
+
+    Returns:
+        list: One result dict per stage
+    """
+    archive_path = os.path.abspath(os.path.join(corpus, "archive.sqlite"))
+    inputs_dir = os.path.join(corpus, "inputs")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_dir = os.path.join(LOGS_DIR, "benchmarks", timestamp)
+    os.makedirs(run_dir, exist_ok=True)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    if os.path.isdir(inputs_dir):
+        shutil.copytree(inputs_dir, work_dir, dirs_exist_ok=True)
+
+    archive = ReplayArchive(archive_path)
+    server = None
+    if record:
+        replay_env = {RECORD_ARCHIVE_ENV: archive_path}
+    else:
+        server = ReplayServer(
+            archive, 0, latency, jitter, error_rate, error_status, seed
+        ).start()
+        replay_env = {REPLAY_SERVER_ENV: server.url}
+    env = stage_env(work_dir, replay_env)
+
+    mode = "record" if record else "replay"
+    commit = git_commit()
+    history = load_history()
+    print(
+        f"⏱️ {mode} run of {len(stages)} stages at {commit}, {len(archive)} responses"
+    )
+    print(
+        f"{'stage':<16}{'seconds':>10}{'exit':>6}{'requests':>10}{'misses':>8}"
+        f"{'errors':>8}{'previous':>20}"
+    )
+
+    results = []
+    try:
+        for name in stages:
+            before = server.stats.snapshot() if server else {}
+            seconds, exit_code = run_stage(
+                name, work_dir, env, os.path.join(run_dir, f"{name}.log"), timeout
+            )
+            after = server.stats.snapshot() if server else {}
+            row = {
+                "timestamp": timestamp,
+                "commit": commit,
+                "mode": mode,
+                "stage": name,
+                "seconds": round(seconds, 3),
+                "exit_code": exit_code,
+                "latency": latency,
+                "error_rate": error_rate,
+            }
+            for counter in ("requests", "misses", "errors_injected"):
+                row[counter] = after.get(counter, 0) - before.get(counter, 0)
+            results.append(row)
+
+            previous = previous_run(history, row)
+            compared = ""
+            if previous:
+                change = seconds / float(previous["seconds"]) - 1
+                compared = f"{change:+.0%} vs {previous['commit']}"
+            print(
+                f"{name:<16}{seconds:>10.1f}{exit_code:>6}{row['requests']:>10}"
+                f"{row['misses']:>8}{row['errors_injected']:>8}{compared:>20}"
+            )
+    finally:
+        if server:
+            server.stop()
+        if keep:
+            print(f"Stage outputs kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(os.path.join(run_dir, "results.json"), "w", encoding="utf-8") as f:
+        json.dump({"corpus": corpus, "results": results}, f, indent=2)
+    append_history(results)
+    if record:
+        print(f"🗄️ Archive now holds {len(archive)} responses")
+    archive.close()
+    print(f"💾 Results saved to {run_dir} and {HISTORY_FILE}")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Time the pipeline stages on a recorded corpus."
+    )
+    parser.add_argument("command", choices=["record", "run"])
+    parser.add_argument("corpus", help="Corpus folder (archive.sqlite + inputs/)")
+    parser.add_argument(
+        "--inputs", help="record: copy these tables into the corpus inputs first"
+    )
+    parser.add_argument(
+        "--stages", nargs="+", choices=list(STAGES), default=list(STAGES)
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=3600)
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the work folder with the outputs"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Record once against the real sites, then time any commit offline:
+    #   python bench_pipeline.py record benchmark_corpus --inputs data/raw
+    #   python bench_pipeline.py run benchmark_corpus --latency 0.1 --jitter 0.2
+    args = parse_args()
+
+    os.makedirs(args.corpus, exist_ok=True)
+    if args.command == "record" and args.inputs:
+        shutil.copytree(
+            args.inputs, os.path.join(args.corpus, "inputs"), dirs_exist_ok=True
+        )
+
+    benchmark_pipeline(
+        args.corpus,
+        args.stages,
+        record=args.command == "record",
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        timeout=args.timeout,
+        keep=args.keep,
+    )
@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from resumable_enrichment import enrich_table
+from search_lookup import get_search_lookup
+
+# One query template per column to fill ({name} is the firm name)
+QUERY_TEMPLATES = {
+    "linkedin": "Linkedin {name}",
+    "Website": "{name} website",
+}
+
+
+def find_links(rows):
+    """Searches every missing column of a chunk of firms in one pass"""
+    return get_search_lookup().lookup_templates(
+        [(row["Name"], columns) for row, columns in rows],
+        QUERY_TEMPLATES,
+        max_workers=MAX_WORKERS,
+    )
+
+
+# Does the work of linkedin_bot.py and web_finder_bot.py in a single pass
+# over the table: the searches of each chunk of rows run in parallel (the
+# shared rate limiter keeps the pace) and progress is saved after each chunk
+input_file = "law_firms_playwright.csv"
+CHECKPOINT_EVERY = 25
+MAX_WORKERS = 4  # Searches in flight
+RETRY_NOT_FOUND = False  # Search again the cells marked "not found"
+
+try:
+    enrich_table(
+        input_file,
+        list(QUERY_TEMPLATES),
+        find_links,
+        checkpoint_every=CHECKPOINT_EVERY,
+        retry_not_found=RETRY_NOT_FOUND,
+    )
+    print("✅ File updated with LinkedIn and website links.")
+
+except Exception as e:
+    print(f"General error: {e}")
+
+get_search_lookup().report()
@@ -1,10 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
 import csv
+import os
 import re
+import sys
 import time
 import random
 
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from html_document import parse_html
+from http_cache import get_shared_cache
+from secondary_fetch import get_secondary_fetcher
+from table_io import read_table
+
 # Cabeceras para simular un navegador real
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -16,17 +24,23 @@ HEADERS = {
 
 def extract_info_from_url(url):
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = get_shared_cache().get(url, headers=HEADERS, timeout=10)
+        document = parse_html(response.text)
+        hrefs = document.hrefs()
+
+        # Pedir ya las páginas de contacto e Impressum del dominio (una sola
+        # descarga por dominio, compartida con bot_scraper y el paso 3)
+        fetcher = get_secondary_fetcher()
+        secondary = fetcher.prefetch(url, hrefs, kinds=("contact", "impressum"))
 
         # Obtener título del sitio
-        title = soup.title.string.strip() if soup.title else "not found"
+        title = document.title() or "not found"
 
         contact_link = "not found"
         linkedin_link = "not found"
 
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag["href"].lower()
+        for href in hrefs:
+            href = href.lower()
 
             if "contact" in href or "contacto" in href or "kontakt" in href:
                 if href.startswith("/"):
@@ -39,38 +53,60 @@ def extract_info_from_url(url):
             if "linkedin.com" in href:
                 linkedin_link = href
 
-        return {"name": title, "contact link": contact_link, "linkedin": linkedin_link}
+        # Email (y LinkedIn si falta) desde la página de contacto o el Impressum
+        email = "not found"
+        for kind in ("contact", "impressum"):
+            page = fetcher.wait(secondary[kind]) if kind in secondary else None
+            if page is None:
+                continue
+            if email == "not found" and page.contacts["emails"]:
+                email = page.contacts["emails"][0]
+            if linkedin_link == "not found" and page.contacts["linkedin_profiles"]:
+                linkedin_link = page.contacts["linkedin_profiles"][0]
+
+        return {
+            "url": url,
+            "name": title,
+            "contact link": contact_link,
+            "linkedin": linkedin_link,
+            "email": email,
+        }
 
     except Exception as e:
         print(f"Error en {url}: {e}")
         return {
+            "url": url,
             "name": "not found",
             "contact link": "not found",
             "linkedin": "not found",
+            "email": "not found",
         }
 
 
 def process_urls(url_list, output_file="output.csv"):
     with open(output_file, "w", newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["name", "contact link", "linkedin"]
+        fieldnames = ["url", "name", "contact link", "linkedin", "email"]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
 
+        cache = get_shared_cache()
         for url in url_list:
+            downloads_before = cache.misses + cache.revalidated
             info = extract_info_from_url(url)
             writer.writerow(info)
             print(f"Procesado: {url}")
-            time.sleep(random.uniform(1, 3))
+            # Solo esperar si la página se descargó de verdad
+            if cache.misses + cache.revalidated != downloads_before:
+                time.sleep(random.uniform(1, 3))
 
+        cache.report()
+        get_secondary_fetcher().report()
 
-# Leer URLs desde el CSV
-urls = []
 
-with open("filtered_links_Markenrecht_v2.csv", newline="", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        if "Link" in row and row["Link"].strip():
-            urls.append(row["Link"].strip())
+if __name__ == "__main__":
+    # Leer URLs desde la tabla del paso 1 (CSV, Parquet o Feather)
+    links = read_table("filtered_links_Markenrecht_v2.csv", columns=["Link"], dtype=str)
+    urls = [url.strip() for url in links["Link"].dropna() if url.strip()]
 
-# Procesar todas las URLs recogidas
-process_urls(urls)
+    # Procesar todas las URLs recogidas
+    process_urls(urls)
@@ -1,114 +1,343 @@
-import csv
+import asyncio
+import os
 import re
-from urllib.parse import urljoin, urlparse
+import sys
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright
 
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from async_fetcher import fetch_urls_concurrently
+from contact_extractor import extract_contacts
+from fast_navigation import FastNavigationProfile
+from html_document import parse_html
+from http_cache import get_shared_cache
+from secondary_fetch import get_secondary_fetcher
+from table_io import read_table, stage_path, write_table
+
 input_file = "links_Markenrecht.csv"
-output_file = "web_data_output.csv"
+output_file = stage_path("web_data_output.csv")
 
+# Headless, no slow_mo, images/fonts/CSS/trackers blocked
+navigation = FastNavigationProfile()
 
-def extract_info_from_content(content, text_content):
-    emails = re.findall(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", content)
-    phones = re.findall(r"\+?\d[\d\-\(\) ]{7,}\d", text_content)
+# Add the emails, phones, addresses and managers listed in each site's
+# Impressum (downloaded once per domain, in the background)
+IMPRESSUM_CONTACTS = True
 
-    title = re.search(r"<title>(.*?)</title>", content, re.IGNORECASE)
-    company_name = title.group(1).strip() if title else "Not found"
+# Link targets of a rendered page, read in one round trip
+HREFS_JS = "links => links.map(a => a.getAttribute('href'))"
 
-    ceo_match = re.findall(
-        r"(Mr\.|Ms\.|Dr\.|Prof\.)?\s?[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\s?\(?((CEO|Chief Executive|Managing Partner|Founder|Managing Director)[^)]+)?\)?",
-        text_content,
-    )
-    ceo_candidates = [" ".join(filter(None, match)).strip() for match in ceo_match]
-    ceo_candidates = list(
-        set(
-            [
-                name
-                for name in ceo_candidates
-                if any(
-                    title in name
-                    for title in ["CEO", "Founder", "Managing", "Director"]
-                )
-            ]
-        )
-    )
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "de-DE,de;q=0.9,en;q=0.8",
+}
 
-    address_pattern = re.compile(r"\d{5}\s[A-Za-zäöüÄÖÜß\-\s]+")
-    addresses = address_pattern.findall(text_content)
+# Pages with less visible text than this are probably rendered by JavaScript
+MIN_STATIC_TEXT_CHARS = 200
 
-    linkedin_links = re.findall(
-        r"https://[a-z]+\.linkedin\.com/(in|company)/[a-zA-Z0-9\-_%]+", content
-    )
-    linkedin_links = list(
-        set(
-            [
-                "https://" + match[0] + ".linkedin.com/" + match[1]
-                for match in linkedin_links
-            ]
-        )
-    )
+# Empty mount points of React/Vue/Next/Nuxt/Angular apps
+SPA_ROOT_PATTERN = re.compile(
+    r"<div[^>]+id=[\"'](?:root|app|__next|__nuxt)[\"'][^>]*>\s*</div>|<app-root[^>]*>\s*</app-root>",
+    re.IGNORECASE,
+)
+NOSCRIPT_PATTERN = re.compile(r"enable javascript|javascript aktivieren", re.IGNORECASE)
 
-    return {
-        "company_name": company_name,
-        "emails": list(set(emails)),
-        "phones": list(set(phones)),
-        "addresses": list(set(addresses)),
-        "ceo_candidates": ceo_candidates,
-        "linkedin_profiles": linkedin_links,
-    }
+
+def extract_info_from_content(content, text_content):
+    # Precompiled single-pass extractor shared with the other bots
+    return extract_contacts(content, text_content)
 
 
-def crawl_links_from_csv(csv_file, output_file):
-    data_rows = []
-
-    with open(csv_file, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        urls = [row["Link"] for row in reader if row.get("Link")]
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
-        for url in urls:
-            try:
-                print(f"Crawling: {url}")
-                page.goto(url, timeout=15000)
-                content = page.content()
-                text_content = page.inner_text("body")
-                info = extract_info_from_content(content, text_content)
-
-                row = {
-                    "source_url": url,
-                    "company_name": info["company_name"],
-                    "emails": "; ".join(info["emails"]),
-                    "phones": "; ".join(info["phones"]),
-                    "addresses": "; ".join(info["addresses"]),
-                    "ceo_candidates": "; ".join(info["ceo_candidates"]),
-                    "linkedin_profiles": "; ".join(info["linkedin_profiles"]),
-                }
-                data_rows.append(row)
-
-            except Exception as e:
-                print(f"Error visiting {url}: {e}")
-                continue
-
-        browser.close()
-
-    fieldnames = [
-        "source_url",
-        "company_name",
+def add_impressum_contacts(info, impressum):
+    """Appends the contact data of the site's Impressum to the page's own"""
+    if impressum is None:
+        return info
+    merged = dict(info)
+    for key in (
         "emails",
         "phones",
         "addresses",
         "ceo_candidates",
         "linkedin_profiles",
-    ]
-    with open(output_file, mode="w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data_rows)
+    ):
+        merged[key] = list(dict.fromkeys(info[key] + impressum.contacts[key]))
+    return merged
+
+
+def prefetch_impressum(url, hrefs):
+    """Starts the download of the site's Impressum, returns its future or None"""
+    if not IMPRESSUM_CONTACTS:
+        return None
+    return get_secondary_fetcher().prefetch(url, hrefs).get("impressum")
+
+
+FIELDNAMES = [
+    "source_url",
+    "company_name",
+    "emails",
+    "phones",
+    "addresses",
+    "ceo_candidates",
+    "linkedin_profiles",
+]
+
+
+def load_urls(csv_file):
+    links = read_table(csv_file, columns=["Link"], dtype=str)["Link"].dropna()
+    return [url for url in links if url]
+
+
+def build_row(url, info):
+    return {
+        "source_url": url,
+        "company_name": info["company_name"],
+        "emails": "; ".join(info["emails"]),
+        "phones": "; ".join(info["phones"]),
+        "addresses": "; ".join(info["addresses"]),
+        "ceo_candidates": "; ".join(info["ceo_candidates"]),
+        "linkedin_profiles": "; ".join(info["linkedin_profiles"]),
+    }
+
+
+def needs_browser(html, text_content):
+    """Guesses whether a page only shows its content after running JavaScript"""
+    if len(text_content) < MIN_STATIC_TEXT_CHARS:
+        return True
+    if SPA_ROOT_PATTERN.search(html):
+        return True
+    # "Please enable JavaScript" pages that carry little else
+    return len(text_content) < 1000 and bool(NOSCRIPT_PATTERN.search(text_content))
+
+
+def fetch_page_http(url):
+    """
+    Fetches a page with a plain HTTP GET (through the shared cache).
+
+    Returns:
+        tuple: (html, text_content, hrefs) or None when the browser is needed
+    """
+    try:
+        response = get_shared_cache().get(url, headers=HTTP_HEADERS, timeout=15)
+    except Exception as e:
+        print(f"HTTP fetch failed for {url}, falling back to the browser: {e}")
+        return None
+
+    content_type = response.headers.get("content-type", "text/html")
+    if response.status_code != 200 or "html" not in content_type:
+        return None
+
+    html = response.text
+    document = parse_html(html)
+    text_content = document.text(separator="\n", strip=True)
+    if needs_browser(html, text_content):
+        return None
+    return html, text_content, document.hrefs()
+
+
+def crawl_http_row(url):
+    """Builds the output row from a plain HTTP fetch, or None if the browser is needed"""
+    page_data = fetch_page_http(url)
+    if page_data is None:
+        return None
+    html, text_content, hrefs = page_data
+    impressum = prefetch_impressum(url, hrefs)
+    info = extract_info_from_content(html, text_content)
+    if impressum is not None:
+        info = add_impressum_contacts(info, get_secondary_fetcher().wait(impressum))
+    return build_row(url, info)
+
+
+def report_tiers(http_pages, browser_pages):
+    print(
+        f"🌐 {http_pages} pages read with plain HTTP, "
+        f"{browser_pages} needed the browser"
+    )
+
+
+def save_rows(output_file, data_rows):
+    write_table(pd.DataFrame(data_rows, columns=FIELDNAMES), output_file)
 
     print(f"\n✅ Data saved to {output_file}")
 
 
+def crawl_links_from_csv(csv_file, output_file, http_first=True):
+    urls = load_urls(csv_file)
+    data_rows = [None] * len(urls)
+    browser_urls = []
+
+    # Try the cheap plain HTTP fetch first, keep the rest for Chromium
+    for index, url in enumerate(urls):
+        row = None
+        if http_first:
+            print(f"Fetching: {url}")
+            row = crawl_http_row(url)
+        if row is None:
+            browser_urls.append((index, url))
+        else:
+            data_rows[index] = row
+
+    if browser_urls:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(**navigation.launch_options())
+            page = navigation.new_context_sync(browser).new_page()
+
+            for index, url in browser_urls:
+                try:
+                    print(f"Crawling: {url}")
+                    navigation.goto_sync(page, url, wait_until="load", timeout=15000)
+                    content = page.content()
+                    text_content = page.inner_text("body")
+                    impressum = prefetch_impressum(
+                        url, page.eval_on_selector_all("a[href]", HREFS_JS)
+                    )
+                    info = extract_info_from_content(content, text_content)
+                    if impressum is not None:
+                        info = add_impressum_contacts(
+                            info, get_secondary_fetcher().wait(impressum)
+                        )
+                    data_rows[index] = build_row(url, info)
+
+                except Exception as e:
+                    print(f"Error visiting {url}: {e}")
+                    continue
+
+            browser.close()
+
+    report_tiers(len(urls) - len(browser_urls), len(browser_urls))
+    navigation.stats.report()
+    get_secondary_fetcher().report()
+    save_rows(output_file, [row for row in data_rows if row is not None])
+
+
+async def crawl_urls_pooled(urls, pool_size=4, navigations_per_context=50):
+    """
+    Crawls the URLs with pool_size browser contexts working in parallel.
+
+    Each worker recycles its context after navigations_per_context pages so
+    Chromium memory stays bounded, and the regex extraction runs in a process
+    pool so it does not block the other pages while they load.
+
+    Args:
+        urls (list): URLs to crawl
+        pool_size (int): Number of contexts/pages navigating at the same time
+        navigations_per_context (int): Pages visited before a context is replaced
+
+    Returns:
+        list: Rows in the same order as urls (None for failed URLs)
+    """
+    queue = asyncio.Queue()
+    for index, url in enumerate(urls):
+        queue.put_nowait((index, url))
+
+    rows = [None] * len(urls)
+    loop = asyncio.get_running_loop()
+
+    # Spawned, not forked: the workers start lazily, once the Playwright
+    # driver, the secondary-fetch threads and the event loop are running,
+    # and forking a process with threads can deadlock
+    extractors = ProcessPoolExecutor(
+        max_workers=pool_size, mp_context=get_context("spawn")
+    )
+    with extractors:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(**navigation.launch_options())
+
+            async def worker():
+                context = await navigation.new_context_async(browser)
+                page = await context.new_page()
+                navigations = 0
+
+                while not queue.empty():
+                    index, url = queue.get_nowait()
+
+                    if navigations >= navigations_per_context:
+                        await context.close()
+                        context = await navigation.new_context_async(browser)
+                        page = await context.new_page()
+                        navigations = 0
+                    navigations += 1
+
+                    try:
+                        print(f"Crawling: {url}")
+                        await navigation.goto_async(
+                            page, url, wait_until="load", timeout=15000
+                        )
+                        content = await page.content()
+                        text_content = await page.inner_text("body")
+                        impressum = prefetch_impressum(
+                            url, await page.eval_on_selector_all("a[href]", HREFS_JS)
+                        )
+                        info = await loop.run_in_executor(
+                            extractors, extract_info_from_content, content, text_content
+                        )
+                        if impressum is not None:
+                            info = add_impressum_contacts(
+                                info,
+                                await get_secondary_fetcher().wait_async(impressum),
+                            )
+                        rows[index] = build_row(url, info)
+                    except Exception as e:
+                        print(f"Error visiting {url}: {e}")
+
+                await context.close()
+
+            await asyncio.gather(*(worker() for _ in range(pool_size)))
+            await browser.close()
+
+    return rows
+
+
+def crawl_links_from_csv_pooled(
+    csv_file, output_file, pool_size=4, navigations_per_context=50, http_first=True
+):
+    urls = load_urls(csv_file)
+    start = time.perf_counter()
+
+    data_rows = [None] * len(urls)
+    if http_first:
+        # Static pages: concurrent plain HTTP, polite per host
+        http_rows, _ = fetch_urls_concurrently(
+            urls, fetch=crawl_http_row, max_concurrency=pool_size * 4
+        )
+        data_rows = [None if isinstance(row, Exception) else row for row in http_rows]
+
+    browser_indexes = [i for i, row in enumerate(data_rows) if row is None]
+    if browser_indexes:
+        browser_rows = asyncio.run(
+            crawl_urls_pooled(
+                [urls[i] for i in browser_indexes], pool_size, navigations_per_context
+            )
+        )
+        for i, row in zip(browser_indexes, browser_rows):
+            data_rows[i] = row
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"⏱️ Crawled {len(urls)} pages with {pool_size} pages in parallel in "
+        f"{elapsed:.1f}s -> {len(urls) / elapsed if elapsed else 0:.2f} pages/sec"
+    )
+    report_tiers(len(urls) - len(browser_indexes), len(browser_indexes))
+    navigation.stats.report()
+    get_secondary_fetcher().report()
+    save_rows(output_file, [row for row in data_rows if row is not None])
+
+
 # Ejecutar el script
-crawl_links_from_csv(input_file, output_file)
+if __name__ == "__main__":
+    # Pooled mode settings (set POOLED = False for the single page crawl)
+    POOLED = True
+    POOL_SIZE = os.cpu_count() or 4  # Pages navigating in parallel
+    NAVIGATIONS_PER_CONTEXT = 50  # Pages visited before a context is recycled
+
+    if POOLED:
+        crawl_links_from_csv_pooled(
+            input_file, output_file, POOL_SIZE, NAVIGATIONS_PER_CONTEXT
+        )
+    else:
+        crawl_links_from_csv(input_file, output_file)
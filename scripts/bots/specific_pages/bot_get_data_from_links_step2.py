@@ -3,6 +3,31 @@ from playwright.async_api import async_playwright
 import pandas as pd
 import os
 import re
+import sys
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from dom_extract import extract_fields, field
+from fast_navigation import FastNavigationProfile
+from table_io import stage_path, write_table
+
+# Headless, no slow_mo, images/fonts/CSS/trackers blocked
+navigation = FastNavigationProfile()
+
+# Any of these means the profile details have been rendered
+PROFILE_READY_SELECTOR = (
+    ".profile-contact-address, div[itemprop='address'], a[href^='tel:']"
+)
+
+FIRM_PROFILE_FIELDS = [
+    # Address - primary method, fallback to div[itemprop="address"]
+    field("Address", [".profile-contact-address", "div[itemprop='address']"]),
+    # Phone number
+    field("Phone", "a[href^='tel:']"),
+    # External website
+    field("Website", "a.bold", attribute="href", exclude="hg.org", strip=False),
+]
 
 # Function to load law firms from a text file
 
@@ -38,32 +63,11 @@ law_firms = [
 
 async def scrape_firm_info(page, name, url):
     try:
-        await page.goto(url)
-        await page.wait_for_timeout(1000)  # wait 1 second in case of dynamic content
-
-        # Address - primary method
-        address_el = await page.query_selector(".profile-contact-address")
-        address = await address_el.inner_text() if address_el else "N/A"
-
-        # Fallback to span[itemprop="address"]
-        if address == "N/A":
-            fallback_address_el = await page.query_selector("div[itemprop='address']")
-            address = (
-                await fallback_address_el.inner_text() if fallback_address_el else "N/A"
-            )
+        # Wait for the contact block instead of a fixed sleep
+        await navigation.goto_async(page, url, wait_for=PROFILE_READY_SELECTOR)
 
-        # Phone number
-        phone_el = await page.query_selector("a[href^='tel:']")
-        phone = await phone_el.inner_text() if phone_el else "N/A"
-
-        # External website
-        links = await page.query_selector_all("a.bold")
-        website = "N/A"
-        for link in links:
-            href = await link.get_attribute("href")
-            if href and "hg.org" not in href:
-                website = href
-                break
+        # All fields in a single round trip to the browser
+        fields = await extract_fields(page, FIRM_PROFILE_FIELDS)
 
         # Try to find CEO or similar title
         """
@@ -78,9 +82,9 @@ async def scrape_firm_info(page, name, url):
         """
         return {
             "Name": name,
-            "Address": address.strip(),
-            "Phone": phone.strip(),
-            "Website": website,
+            "Address": fields["Address"],
+            "Phone": fields["Phone"],
+            "Website": fields["Website"],
         }
     except Exception as e:
         print(f"Error with {name}: {e}")
@@ -96,11 +100,8 @@ async def main():
     data = []
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False, slow_mo=100)
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            viewport={"width": 1280, "height": 720},
-        )
+        browser = await p.chromium.launch(**navigation.launch_options())
+        context = await navigation.new_context_async(browser)
         page = await context.new_page()
 
         for firm in law_firms:
@@ -110,10 +111,13 @@ async def main():
 
         await browser.close()
 
+    navigation.stats.report()
     df = pd.DataFrame(data)
-    df.to_csv("law_firms_playwright.csv", index=False, encoding="utf-8")
-    print("✅ Scraping complete! Results saved to 'law_firms_playwright.csv'.")
+    output_file = stage_path("law_firms_playwright.csv")
+    write_table(df, output_file, encoding="utf-8")
+    print(f"✅ Scraping complete! Results saved to '{output_file}'.")
 
 
 # Run the script
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,82 +1,285 @@
 from playwright.sync_api import sync_playwright
+from urllib.parse import urljoin
+import os
 import re
+import sys
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tools")
+)
+from async_fetcher import fetch_urls_concurrently, make_session_fetcher
+from dom_extract import extract_fields_sync, field
+from fast_navigation import FastNavigationProfile, USER_AGENT
+from html_document import parse_html
+from keyword_matcher import KeywordMatcher
+
+LISTING_URL = "https://www.hg.org/lawfirms/germany?page={}"
+PAGE_NUMBER_PATTERN = re.compile(r"[?&]page=(\d+)")
+HREFS_JS = "links => links.map(a => a.getAttribute('href'))"
 
 # Enhanced keywords (English and German)
 TRAFFIC_KEYWORDS = ["traffic", "verkehr", "transport", "auto", "fahrzeug", "straße"]
-FULL_SERVICE_KEYWORDS = [r"full[\s-]?service", "vollservice", "komplettservice"]
+FULL_SERVICE_KEYWORDS = [
+    "full service",
+    "full-service",
+    "fullservice",
+    "vollservice",
+    "komplettservice",
+]
 LICENSE_KEYWORDS = ["license", "lizenz", "erlaubnis", "genehmigung"]
 
+# Traffic and license terms must be whole words, full service may be inside one
+CRITERIA_MATCHER = KeywordMatcher(
+    {
+        "traffic": TRAFFIC_KEYWORDS,
+        "full_service": FULL_SERVICE_KEYWORDS,
+        "license": LICENSE_KEYWORDS,
+    },
+    whole_words={"traffic", "license"},
+)
+
+
+# Values read from each div.listing of the hg.org directory
+LISTING_FIELDS = [
+    field("speciality", "h3", text="textContent", default=None),
+    # href and title are read from the same link element
+    field("link", ["h3 a", "a[href]"], attributes=["href", "title"], default=None),
+]
+
 
 def matches_criteria(text):
     """Checks if the text meets at least one of the criteria"""
-    text_lower = text.lower()
+    return CRITERIA_MATCHER.contains(text)
 
-    # For traffic
-    traffic_match = any(
-        re.search(rf"\b{keyword}\b", text_lower) for keyword in TRAFFIC_KEYWORDS
-    )
 
-    # For Full Service (uses regex)
-    full_service_match = any(
-        re.search(keyword, text_lower) for keyword in FULL_SERVICE_KEYWORDS
-    )
+def write_listing(f, listing):
+    """Writes a listing to the results file if its speciality matches"""
+    speciality = listing["speciality"]
+    if speciality and matches_criteria(speciality):
+        if listing["href"]:
+            title = listing["title"]
+            f.write(
+                f"Name: {title} | Speciality {speciality} | URL: {listing['href']}\n"
+            )
+            print(f"Record found: {title} - {speciality}")
+        else:
+            f.write(f"Specialty: {speciality} | Link not available\n")
 
-    # For licenses
-    license_match = any(
-        re.search(rf"\b{keyword}\b", text_lower) for keyword in LICENSE_KEYWORDS
-    )
 
-    return traffic_match or full_service_match or license_match
+def highest_page_number(hrefs):
+    """Highest page number among the pagination links, 1 when there are none"""
+    page_numbers = [
+        int(match.group(1))
+        for href in hrefs
+        for match in [PAGE_NUMBER_PATTERN.search(href or "")]
+        if match
+    ]
+    return max(page_numbers, default=1)
 
 
-with sync_playwright() as playwright:
-    browser = playwright.chromium.launch(
-        headless=False,
-        slow_mo=100,
-    )
+def parse_listing_page(html, page_url):
+    """
+    Reads the listings of a server-rendered hg.org directory page.
+
+    Returns:
+        tuple: (list of listing dicts (speciality, href, title), highest page number
+        linked from the page's pagination)
+    """
+    document = parse_html(html)
+    listings = []
+    for listing in document.select("div.listing"):
+        h3 = listing.select_one("h3")
+        link = listing.select_one("h3 a") or listing.select_one("a[href]")
+        href = link.get("href") if link else None
+        listings.append(
+            {
+                "speciality": h3.text().strip() if h3 else None,
+                "href": urljoin(page_url, href) if href else None,
+                "title": (link.get("title") if link else None) or "No title",
+            }
+        )
 
-    context = browser.new_context(
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        viewport={"width": 1280, "height": 720},
+    return listings, highest_page_number(document.hrefs())
+
+
+def crawl_listing_pages_http(
+    output_file="filtered_results.txt",
+    max_pages=None,
+    per_host_limit=4,
+    host_delay=0.5,
+    retries=2,
+):
+    """
+    Crawls the whole hg.org Germany directory with plain HTTP.
+
+    The page count is read from the pagination links and grows while pages
+    arrive (pagination often only links a few pages ahead). Listing pages are
+    fetched concurrently and matches are written as soon as each page lands.
+    Pages that fail or do not answer 200 are fetched again at the end.
+    Listing pages bypass the HTTP cache, so every crawl sees the current
+    directory and a failed answer is never served again from disk.
+
+    Args:
+        output_file (str): Results file, same format as the browser crawl
+        max_pages (int): Optional safety cap on the number of pages
+        per_host_limit (int): Listing pages downloaded at the same time
+        host_delay (float): Seconds between requests on each connection
+        retries (int): Extra rounds for the pages that failed
+
+    Returns:
+        bool: False if the listings are not in the HTML (browser needed)
+    """
+    fetch_page = make_session_fetcher(
+        headers={"User-Agent": USER_AGENT}, timeout=30, cache=None
     )
 
-    page = context.new_page()
-
-    with open("filtered_results.txt", "w", encoding="utf-8") as f:
-        for i in range(1, 11):
-            url = f"https://www.hg.org/lawfirms/germany?page={i}"
-            print(f"Navigating to: {url}")
-
-            try:
-                page.goto(url, timeout=60000)
-                page.wait_for_selector("div.listing", timeout=30000)
-
-                listings = page.query_selector_all("div.listing")
-                for listing in listings:
-                    speciality_element = listing.query_selector("h3")
-                    if speciality_element:
-                        speciality = speciality_element.text_content().strip()
-                        if matches_criteria(speciality):
-                            link_element = listing.query_selector(
-                                "h3 a"
-                            ) or listing.query_selector("a[href]")
-                            if link_element:
-                                href = link_element.get_attribute("href")
-                                title = (
-                                    link_element.get_attribute("title") or "No title"
-                                )
-                                f.write(
-                                    f"Name: {title} | Speciality {speciality} | URL: {href}\n"
-                                )
-                                print(f"Record found: {title} - {speciality}")
-                            else:
-                                f.write(
-                                    f"Specialty: {speciality} | Link not available\n"
-                                )
-
-            except Exception as e:
-                print(f"Error on page {i}: {e}")
-                page.screenshot(path=f"error_page_{i}.png")
-
-    print("Process completed. Results saved in filtered_results.txt")
-    browser.close()
+    first_url = LISTING_URL.format(1)
+    try:
+        response = fetch_page(first_url)
+        response.raise_for_status()
+        first_listings, last_page = parse_listing_page(response.text, first_url)
+    except Exception as e:
+        print(f"Error on {first_url}: {e}")
+        return False
+
+    if not first_listings:
+        print("Listings are not server-rendered, the browser crawl is needed.")
+        return False
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        for listing in first_listings:
+            write_listing(f, listing)
+
+        failed = []
+        total_stats = []
+
+        def on_page(url, result):
+            nonlocal last_page
+            if isinstance(result, Exception):
+                print(f"Error on {url}: {result}")
+                failed.append(url)
+                return
+            if result.status_code != 200:
+                print(f"Error on {url}: HTTP {result.status_code}")
+                failed.append(url)
+                return
+            listings, page_max = parse_listing_page(result.text, url)
+            for listing in listings:
+                write_listing(f, listing)
+            f.flush()
+            last_page = max(last_page, page_max)
+            print(f"Listing page done: {url} ({len(listings)} listings)")
+
+        def fetch_wave(urls):
+            _, stats = fetch_urls_concurrently(
+                urls,
+                fetch=fetch_page,
+                max_concurrency=per_host_limit,
+                per_host_limit=per_host_limit,
+                host_delay=host_delay,
+                on_result=on_page,
+            )
+            total_stats.append(stats)
+
+        # Fetch in waves: each wave may reveal pages further ahead. Once none
+        # are left, the failed pages get another wave (up to retries times).
+        fetched = 1
+        attempts = 0
+        while True:
+            if max_pages:
+                last_page = min(last_page, max_pages)
+            urls = [LISTING_URL.format(i) for i in range(fetched + 1, last_page + 1)]
+            fetched = max(fetched, last_page)
+            if not urls:
+                if not failed or attempts == retries:
+                    break
+                attempts += 1
+                urls, failed[:] = list(failed), []
+                print(f"🔄 Retrying {len(urls)} failed listing pages ({attempts})")
+            fetch_wave(urls)
+
+    pages = 1 + sum(stats.pages for stats in total_stats)
+    seconds = sum(stats.elapsed for stats in total_stats)
+    print(f"Process completed. {pages} listing pages crawled in {seconds:.1f}s.")
+    if failed:
+        print(f"⚠️ {len(failed)} listing pages failed: {', '.join(sorted(failed))}")
+    print(f"Results saved in {output_file}")
+    return True
+
+
+def crawl_listing_pages(
+    output_file="filtered_results.txt", navigation=None, max_pages=None
+):
+    """
+    Visits the hg.org Germany listing pages and saves the matching firms.
+
+    Like the HTTP crawl, the page count is read from the pagination links
+    of the pages visited so far.
+
+    Args:
+        output_file (str): Results file
+        navigation (FastNavigationProfile): Browser settings
+        max_pages (int): Optional safety cap on the number of pages
+    """
+    navigation = navigation or FastNavigationProfile()
+
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(**navigation.launch_options())
+        context = navigation.new_context_sync(browser)
+        page = context.new_page()
+
+        with open(output_file, "w", encoding="utf-8") as f:
+            i = last_page = 1
+            while i <= last_page:
+                url = LISTING_URL.format(i)
+                print(f"Navigating to: {url}")
+
+                try:
+                    navigation.goto_sync(page, url, timeout=60000)
+                    page.wait_for_selector("div.listing", timeout=30000)
+
+                    # Every listing in a single round trip to the browser
+                    listings = extract_fields_sync(
+                        page, LISTING_FIELDS, scope="div.listing"
+                    )
+                    for listing in listings:
+                        link = listing.pop("link") or {}
+                        listing["href"] = link.get("href")
+                        listing["title"] = link.get("title") or "No title"
+                        write_listing(f, listing)
+
+                    hrefs = page.eval_on_selector_all("a[href]", HREFS_JS)
+                    last_page = max(last_page, highest_page_number(hrefs))
+                    if max_pages:
+                        last_page = min(last_page, max_pages)
+
+                except Exception as e:
+                    print(f"Error on page {i}: {e}")
+                    page.screenshot(path=f"error_page_{i}.png")
+                i += 1
+
+        print(f"Process completed. Results saved in {output_file}")
+        navigation.stats.report()
+        browser.close()
+
+
+if __name__ == "__main__":
+    # Set HEADLESS = False and SLOW_MO = 100 to watch the browser while debugging
+    HEADLESS = True
+    SLOW_MO = 0
+
+    # Whole directory over plain HTTP (the browser when the listings are not
+    # server-rendered), MAX_PAGES = None for no cap
+    HTTP_MODE = True
+    MAX_PAGES = None
+    PER_HOST_LIMIT = 4  # Listing pages downloaded at the same time
+
+    done = HTTP_MODE and crawl_listing_pages_http(
+        "filtered_results.txt", MAX_PAGES, PER_HOST_LIMIT
+    )
+    if not done:
+        crawl_listing_pages(
+            "filtered_results.txt",
+            FastNavigationProfile(headless=HEADLESS, slow_mo=SLOW_MO),
+            MAX_PAGES,
+        )
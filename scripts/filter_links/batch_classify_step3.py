@@ -0,0 +1,329 @@
+import numpy as np
+import os
+import re
+import sys
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from async_fetcher import fetch_urls_concurrently, make_session_fetcher
+from html_document import parse_html
+from http_cache import HttpCache, get_shared_cache
+from keyword_matcher import KeywordMatcher, normalize_text
+from table_io import read_table, stage_path, write_table
+
+from classify_links_by_category_step3 import (
+    DIRECTORY_KEYWORDS,
+    FIRM_KEYWORDS,
+    LAW_PAGE_MATCHER,
+    REQUEST_HEADERS,
+)
+
+# Same three labels as analyze_law_page
+LABELS = ["Lawyer directory", "Law firm", "Other"]
+
+FEATURE_DIM = 2**18  # Hashed feature space
+OTHER_BIAS = 1.0  # Score a page needs to beat to be anything but "Other"
+
+# Words inside the domain name, matched inside compounds like "anwaltskanzlei"
+DOMAIN_DIRECTORY_WORDS = ["verzeichnis", "anwaltssuche", "directory", "findalawyer"]
+DOMAIN_FIRM_WORDS = ["kanzlei", "rechtsanwaelte", "rechtsanwalt", "anwalt", "ra-"]
+DOMAIN_MATCHER = KeywordMatcher(
+    {"directory": DOMAIN_DIRECTORY_WORDS, "firm": DOMAIN_FIRM_WORDS}
+)
+
+# Class names (split on "-", "_" and spaces) of profile cards and team sections
+CLASS_DIRECTORY_WORDS = ["profile", "profil", "member", "mitglied", "lawyer", "anwalt"]
+CLASS_FIRM_WORDS = ["team", "about", "ueber", "attorneys", "lawyers", "anwaelte"]
+CLASS_SPLIT_PATTERN = re.compile(r"[\s_-]+")
+
+
+def seed_weights():
+    """
+    Weight of each feature for the (directory, firm) scores.
+
+    Keyword hits in the text count once, in the title or meta description
+    twice. Every count goes through log1p, so one stray "lawyers" on a page
+    (score 0.7) no longer beats OTHER_BIAS on its own.
+    """
+    weights = {}
+    for namespace, scale in (("text", 1.0), ("title", 2.0), ("meta", 2.0)):
+        for keyword in DIRECTORY_KEYWORDS:
+            weights[f"{namespace}:{keyword}"] = (1.5 * scale, 0.0)
+        for keyword in FIRM_KEYWORDS:
+            weights[f"{namespace}:{keyword}"] = (0.0, 1.0 * scale)
+    for word in CLASS_DIRECTORY_WORDS:
+        weights[f"class:{word}"] = (0.5, 0.0)
+    for word in CLASS_FIRM_WORDS:
+        weights[f"class:{word}"] = (0.0, 0.6)
+    for word in DOMAIN_DIRECTORY_WORDS:
+        weights[f"domain:{word}"] = (1.5, 0.0)
+    for word in DOMAIN_FIRM_WORDS:
+        weights[f"domain:{word}"] = (0.0, 1.5)
+    return weights
+
+
+def feature_index(token, dim=FEATURE_DIM):
+    """Stable hash of a feature name (the same in every process and run)"""
+    return zlib.crc32(token.encode("utf-8")) % dim
+
+
+def page_features(url, html):
+    """
+    Counts the features of one page: keyword hits in the text, title and
+    meta description, class name words and words of the domain name.
+
+    Returns:
+        Counter: {"namespace:token": count}
+    """
+    document = parse_html(html)
+    features = Counter()
+
+    for namespace, text in (
+        ("text", document.text()),
+        ("title", document.title()),
+        ("meta", document.meta("description")),
+    ):
+        for keyword, count in LAW_PAGE_MATCHER.scan(text).keywords.items():
+            features[f"{namespace}:{keyword}"] += count
+
+    for value in document.class_attributes():
+        for word in CLASS_SPLIT_PATTERN.split(normalize_text(value)):
+            if word:
+                features[f"class:{word}"] += 1
+
+    domain = urlparse(url).netloc.lower()
+    for word in DOMAIN_MATCHER.scan(domain).keywords:
+        features[f"domain:{word}"] += 1
+
+    return features
+
+
+class FeatureBatch:
+    """Sparse (COO) feature matrix of a batch of pages"""
+
+    def __init__(self, size, rows, cols, values):
+        self.size = size
+        self.rows = rows
+        self.cols = cols
+        self.values = values
+
+    @classmethod
+    def from_features(cls, feature_counters, dim=FEATURE_DIM):
+        rows, cols, values = [], [], []
+        indexes = {}  # Each distinct feature name is hashed once
+        for row, features in enumerate(feature_counters):
+            for token, count in (features or {}).items():
+                index = indexes.get(token)
+                if index is None:
+                    index = indexes[token] = feature_index(token, dim)
+                rows.append(row)
+                cols.append(index)
+                values.append(count)
+        return cls(
+            len(feature_counters),
+            np.asarray(rows, dtype=np.int64),
+            np.asarray(cols, dtype=np.int64),
+            np.log1p(np.asarray(values, dtype=np.float32)),
+        )
+
+
+class BatchLawPageClassifier:
+    """
+    Scores whole batches of pages at once instead of stopping at the first
+    keyword hit.
+
+    Features are hashed into a fixed-size space and every label gets a
+    linear score (a sparse matrix product done with np.bincount); the label
+    with the highest score wins and its softmax share is the confidence.
+
+    Args:
+        weights (dict): {feature: (directory weight, firm weight)}, defaults
+            to seed_weights()
+        other_bias (float): Constant score of the "Other" label
+        dim (int): Size of the hashed feature space
+    """
+
+    def __init__(self, weights=None, other_bias=OTHER_BIAS, dim=FEATURE_DIM):
+        self.dim = dim
+        self.other_bias = other_bias
+        self.weights = np.zeros((dim, 2), dtype=np.float32)
+        for token, label_weights in (weights or seed_weights()).items():
+            self.weights[feature_index(token, dim)] += label_weights
+
+    def score(self, batch):
+        """Returns an (n_pages, 3) score matrix in LABELS order"""
+        scores = np.empty((batch.size, 3), dtype=np.float32)
+        contributions = self.weights[batch.cols] * batch.values[:, None]
+        for label in range(2):
+            scores[:, label] = np.bincount(
+                batch.rows, weights=contributions[:, label], minlength=batch.size
+            )
+        scores[:, 2] = self.other_bias
+        return scores
+
+    def classify(self, batch):
+        """
+        Returns:
+            tuple: (list of labels, NumPy array of confidences in [0, 1])
+        """
+        scores = self.score(batch)
+        best = scores.argmax(axis=1)
+        exp_scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        confidence = exp_scores[np.arange(batch.size), best] / exp_scores.sum(axis=1)
+        return [LABELS[i] for i in best], confidence
+
+
+_worker_cache = None
+
+
+def _open_worker_cache(cache_dir):
+    # Each worker process opens its own SQLite connection
+    global _worker_cache
+    _worker_cache = HttpCache(cache_dir)
+
+
+def _features_of_cached_pages(urls):
+    """Worker: features of every URL found in the cache (None for the others)"""
+    results = []
+    for url in urls:
+        response = _worker_cache.lookup(url)
+        if response is None or response.status_code != 200:
+            results.append(None)
+            continue
+        try:
+            results.append(page_features(url, response.text))
+        except Exception as e:
+            print(f"Error analyzing {url}: {str(e)}")
+            results.append(None)
+    return results
+
+
+def fetch_missing_pages(
+    urls, cache, max_concurrency=20, per_host_limit=2, host_delay=1.0
+):
+    """Downloads into the cache the pages it does not hold yet"""
+    missing = [url for url in urls if not cache.has(url)]
+    if not missing:
+        return
+    print(f"Downloading {len(missing)} pages missing from the cache")
+    fetch_page = make_session_fetcher(headers=REQUEST_HEADERS, timeout=15, cache=cache)
+    _, stats = fetch_urls_concurrently(
+        missing,
+        fetch=fetch_page,
+        max_concurrency=max_concurrency,
+        per_host_limit=per_host_limit,
+        host_delay=host_delay,
+    )
+    stats.report()
+
+
+def classify_pages(
+    urls, classifier=None, workers=None, chunk_size=500, fetch_missing=True
+):
+    """
+    Classifies pages from the HTTP cache in one vectorized pass.
+
+    Feature extraction (parsing) runs in a process pool over chunks of URLs,
+    then the whole batch is scored at once.
+
+    Args:
+        urls (list): Page URLs
+        classifier (BatchLawPageClassifier): Defaults to the seed weights
+        workers (int): Feature extraction processes (None: one per CPU)
+        chunk_size (int): URLs handed to a worker at a time
+        fetch_missing (bool): Download pages that are not cached yet first
+
+    Returns:
+        tuple: (list of labels, list of confidences); pages that could not
+        be read get "Error: Request failed" and a confidence of 0
+    """
+    urls = list(urls)
+    classifier = classifier or BatchLawPageClassifier()
+    cache = get_shared_cache()
+    if fetch_missing:
+        fetch_missing_pages(urls, cache)
+
+    started = time.perf_counter()
+    chunks = [urls[i : i + chunk_size] for i in range(0, len(urls), chunk_size)]
+    features = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_open_worker_cache,
+        initargs=(cache.cache_dir,),
+    ) as pool:
+        for chunk_features in pool.map(_features_of_cached_pages, chunks):
+            features.extend(chunk_features)
+    parsed = time.perf_counter()
+
+    labels, confidence = classifier.classify(FeatureBatch.from_features(features))
+    scored = time.perf_counter()
+    print(
+        f"⏱️ Features of {len(urls)} pages in {parsed - started:.1f}s, "
+        f"scored in {scored - parsed:.3f}s"
+    )
+
+    labels = [
+        label if page is not None else "Error: Request failed"
+        for label, page in zip(labels, features)
+    ]
+    confidence = [
+        round(float(c), 3) if page is not None else 0.0
+        for c, page in zip(confidence, features)
+    ]
+    return labels, confidence
+
+
+def process_law_firm_csv_batch(
+    input_file, output_file, workers=None, fetch_missing=True
+):
+    """
+    Batch version of process_law_firm_csv: same "type" column plus a
+    "confidence" column.
+
+    Args:
+        input_file (str): Path to input CSV file with a 'url' column
+        output_file (str): Path to output CSV file
+        workers (int): Feature extraction processes (None: one per CPU)
+        fetch_missing (bool): Download pages that are not cached yet first
+    """
+    try:
+        df = read_table(input_file)
+
+        if "url" not in df.columns:
+            raise ValueError("Input CSV must contain a 'url' column")
+
+        print(
+            f"Starting batch analysis of {len(df)} URLs at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+
+        df["type"], df["confidence"] = classify_pages(
+            df["url"], workers=workers, fetch_missing=fetch_missing
+        )
+
+        print("\nAnalysis completed with the following results:")
+        print(df["type"].value_counts())
+
+        write_table(df, output_file)
+        print(f"\nResults saved to {output_file}")
+        get_shared_cache().report()
+
+        return df
+
+    except Exception as e:
+        print(f"Error processing CSV files: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    # Configuration
+    INPUT_CSV = "resultados_m2.csv"  # Input CSV with 'url' column
+    OUTPUT_CSV = stage_path("german_law_analysis.csv")  # Output with results
+    WORKERS = None  # Parsing processes, None for one per CPU
+    FETCH_MISSING = True  # Set False to only classify pages already cached
+
+    process_law_firm_csv_batch(INPUT_CSV, OUTPUT_CSV, WORKERS, FETCH_MISSING)
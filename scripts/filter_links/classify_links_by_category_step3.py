@@ -1,124 +1,138 @@
-import pandas as pd
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
+import os
 import re
+import sys
 from datetime import datetime
 
-
-def analyze_law_page(url):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from html_document import parse_html
+from http_cache import get_shared_cache
+from keyword_matcher import KeywordMatcher
+from secondary_fetch import get_secondary_fetcher
+from table_io import read_table, stage_path, write_table
+from url_store import get_shared_store
+
+# German and English keywords for lawyer directories
+DIRECTORY_KEYWORDS = [
+    # German terms
+    "anwaltsverzeichnis",
+    "anwaltssuche",
+    "anwaltsliste",
+    "rechtsanwaltskammer",
+    "anwaltskammer",
+    "anwaltsdatenbank",
+    "anwalt finden",
+    "anwälte suchen",
+    "anwaltsregister",
+    # English terms
+    "lawyer directory",
+    "attorney search",
+    "find a lawyer",
+    "lawyer list",
+    "attorney listing",
+    "lawyer database",
+    "bar association",
+    "legal directory",
+]
+
+# German and English keywords for law firms
+FIRM_KEYWORDS = [
+    # German terms
+    "kanzlei",
+    "rechtsanwälte",
+    "anwaltskanzlei",
+    "anwaltsbüro",
+    "anwaltsteam",
+    "anwaltssozietät",
+    "fachanwälte",
+    "anwaltsgruppe",
+    "rechtsanwaltsbüro",
+    # English terms
+    "law firm",
+    "legal firm",
+    "attorneys at law",
+    "legal office",
+    "law office",
+    "legal team",
+    "lawyers",
+    "attorneys",
+    "legal services",
+    "our lawyers",
+    "legal experts",
+]
+
+# Both keyword tables in one automaton: one pass per text finds every hit
+LAW_PAGE_MATCHER = KeywordMatcher(
+    {"directory": DIRECTORY_KEYWORDS, "firm": FIRM_KEYWORDS}
+)
+
+# Class names of lawyer profile cards and of team / about us sections
+LAWYER_PROFILE_CLASS = re.compile(
+    r"anwalt|attorney|lawyer|profile|profil|team|member|mitglied", re.I
+)
+TEAM_SECTION_CLASS = re.compile(
+    r"team|unser-team|über-uns|about|attorneys|lawyers|anwälte", re.I
+)
+
+# Headers of every page download (pages fetched without them may be blocked
+# or stripped, and would be cached like that for the other steps)
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9,de;q=0.8",
+}
+
+
+def analyze_law_page(url, document=None):
     """
     Analyzes a web page to determine if it's a lawyer directory, law firm, or other.
     Focused on German law websites with English detection logic.
 
     Args:
         url (str): URL to analyze
+        document (HtmlDocument): Already parsed page, skips downloading url again
 
     Returns:
         str: "Lawyer directory", "Law firm", or "Other"
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9,de;q=0.8",
-        }
-
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        page_text = soup.get_text().lower()
-
-        # German and English keywords for lawyer directories
-        directory_keywords = [
-            # German terms
-            "anwaltsverzeichnis",
-            "anwaltssuche",
-            "anwaltsliste",
-            "rechtsanwaltskammer",
-            "anwaltskammer",
-            "anwaltsdatenbank",
-            "anwalt finden",
-            "anwälte suchen",
-            "anwaltsregister",
-            # English terms
-            "lawyer directory",
-            "attorney search",
-            "find a lawyer",
-            "lawyer list",
-            "attorney listing",
-            "lawyer database",
-            "bar association",
-            "legal directory",
-        ]
-
-        # German and English keywords for law firms
-        firm_keywords = [
-            # German terms
-            "kanzlei",
-            "rechtsanwälte",
-            "anwaltskanzlei",
-            "anwaltsbüro",
-            "anwaltsteam",
-            "anwaltssozietät",
-            "fachanwälte",
-            "anwaltsgruppe",
-            "rechtsanwaltsbüro",
-            # English terms
-            "law firm",
-            "legal firm",
-            "attorneys at law",
-            "legal office",
-            "law office",
-            "legal team",
-            "lawyers",
-            "attorneys",
-            "legal services",
-            "our lawyers",
-            "legal experts",
-        ]
-
-        # Check for lawyer directory patterns
-        for keyword in directory_keywords:
-            if keyword in page_text:
-                return "Lawyer directory"
-
-        # Check for law firm patterns
-        for keyword in firm_keywords:
-            if keyword in page_text:
-                return "Law firm"
+        cache = get_shared_cache()
+        if document is None:
+            response = cache.get(url, headers=REQUEST_HEADERS, timeout=15)
+            response.raise_for_status()
+            document = parse_html(response.text)
+
+        page_text = document.text()
+
+        # Check for lawyer directory patterns, then law firm patterns
+        page_hits = LAW_PAGE_MATCHER.scan(page_text)
+        if page_hits.has("directory"):
+            return "Lawyer directory"
+        if page_hits.has("firm"):
+            return "Law firm"
 
         # Check HTML structure patterns
         # 1. Lawyer directories typically have multiple profiles
-        lawyer_profiles = soup.find_all(
-            class_=re.compile(
-                r"anwalt|attorney|lawyer|profile|profil|team|member|mitglied", re.I
-            )
-        )
-        if len(lawyer_profiles) > 3:
+        lawyer_profiles = document.count_class(LAWYER_PROFILE_CLASS)
+        if lawyer_profiles > 3:
             return "Lawyer directory"
 
         # 2. Law firms often have "about us" or "our team" sections
-        team_sections = soup.find_all(
-            class_=re.compile(
-                r"team|unser-team|über-uns|about|attorneys|lawyers|anwälte", re.I
-            )
-        )
+        team_sections = document.count_class(TEAM_SECTION_CLASS)
         if team_sections:
             return "Law firm"
 
         # 3. Check page title and meta description
-        title = soup.title.string.lower() if soup.title else ""
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        meta_desc = meta_desc.get("content", "").lower() if meta_desc else ""
+        title = document.title()
+        meta_desc = document.meta("description")
 
-        for keyword in directory_keywords:
-            if keyword in title or keyword in meta_desc:
-                return "Lawyer directory"
+        title_hits = LAW_PAGE_MATCHER.scan(title)
+        meta_hits = LAW_PAGE_MATCHER.scan(meta_desc)
+        if title_hits.has("directory") or meta_hits.has("directory"):
+            return "Lawyer directory"
 
-        for keyword in firm_keywords:
-            if keyword in title or keyword in meta_desc:
-                return "Law firm"
+        if title_hits.has("firm") or meta_hits.has("firm"):
+            return "Law firm"
 
         # 4. Check for common German law firm URL patterns
         domain = urlparse(url).netloc.lower()
@@ -128,13 +142,12 @@ def analyze_law_page(url):
             return "Law firm"
 
         # 5. Check for imprint/impressum which often contains firm info
-        impressum = soup.find("a", href=re.compile(r"impressum|imprint", re.I))
-        if impressum:
-            impressum_text = requests.get(
-                requests.compat.urljoin(url, impressum["href"]), headers=headers
-            ).text.lower()
-            if any(keyword in impressum_text for keyword in firm_keywords):
-                return "Law firm"
+        # (downloaded once per domain, with timeouts, shared with the bots)
+        impressum = get_secondary_fetcher().get_linked(
+            url, document.hrefs(), "impressum"
+        )
+        if impressum and LAW_PAGE_MATCHER.contains(impressum.text, "firm"):
+            return "Law firm"
 
         return "Other"
 
@@ -146,17 +159,19 @@ def analyze_law_page(url):
         return "Error: Analysis failed"
 
 
-def process_law_firm_csv(input_file, output_file):
+def process_law_firm_csv(input_file, output_file, store=None):
     """
     Processes a CSV file with URLs and analyzes each one for law firm/directory identification.
 
     Args:
         input_file (str): Path to input CSV file
         output_file (str): Path to output CSV file
+        store (UrlStore): Optional store; URLs classified in an earlier run
+            keep their type and are not fetched again
     """
     try:
-        # Read input CSV
-        df = pd.read_csv(input_file)
+        # Read input table (CSV, Parquet or Feather)
+        df = read_table(input_file)
 
         # Verify required column exists
         if "url" not in df.columns:
@@ -166,8 +181,18 @@ def process_law_firm_csv(input_file, output_file):
             f"Starting analysis of {len(df)} URLs at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         )
 
-        # Analyze each URL
-        df["type"] = df["url"].apply(analyze_law_page)
+        # Analyze each URL (errors are not stored, so they are retried)
+        known = store.results(df["url"], "step3") if store is not None else {}
+
+        def classify(url):
+            if url in known:
+                return known[url]
+            page_type = analyze_law_page(url)
+            if store is not None and not page_type.startswith("Error"):
+                store.mark(url, "step3", page_type)
+            return page_type
+
+        df["type"] = df["url"].apply(classify)
 
         # Calculate statistics
         stats = df["type"].value_counts()
@@ -175,8 +200,12 @@ def process_law_firm_csv(input_file, output_file):
         print(stats)
 
         # Save results
-        df.to_csv(output_file, index=False)
+        write_table(df, output_file)
         print(f"\nResults saved to {output_file}")
+        get_shared_cache().report()
+        get_secondary_fetcher().report()
+        if store is not None:
+            store.report()
 
         return df
 
@@ -189,7 +218,10 @@ def process_law_firm_csv(input_file, output_file):
 if __name__ == "__main__":
     # Configuration
     INPUT_CSV = "resultados_m2.csv"  # Input CSV with 'url' column
-    OUTPUT_CSV = "german_law_analysis.csv"  # Output CSV with results
+    OUTPUT_CSV = stage_path("german_law_analysis.csv")  # Output with results
+    USE_URL_STORE = True  # Reuse the types found in earlier runs
 
     # Run analysis
-    process_law_firm_csv(INPUT_CSV, OUTPUT_CSV)
+    process_law_firm_csv(
+        INPUT_CSV, OUTPUT_CSV, get_shared_store() if USE_URL_STORE else None
+    )
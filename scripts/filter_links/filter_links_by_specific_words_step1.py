@@ -1,52 +1,275 @@
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import os
+import sys
 import time
+from functools import lru_cache
 
-# Input and output file names
-input_csv = "links_Verkehrsrecht.csv"
-output_csv = "filtered_links_Verkehrsrecht_v2.csv"  # Output file
-
-# Keywords related to the topics you're interested in
-keywords = ["markenrecht", "verkehrsrecht"]
-
-# Read the CSV file with proper encoding and quoting
-df = pd.read_csv(input_csv, encoding="utf-8", quoting=1)
-column_name = "Link"  # Update this if your column has a different name
-urls = df[column_name].dropna().unique()
-
-# List to store the filtered results
-filtered_results = []
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from async_fetcher import (
+    FetchStats,
+    fetch_urls_concurrently,
+    make_session_fetcher,
+    make_thread_sessions,
+)
+from html_document import parse_html
+from http_cache import get_shared_cache
+from keyword_matcher import KeywordMatcher
+from table_io import read_table, stage_path, write_table
+from url_store import get_shared_store
+from url_tools import dedupe_key
+from stream_scanner import DEFAULT_MAX_BYTES, report_verdicts, stream_page_matches
 
 # Headers to mimic a browser and avoid blocking
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
-# Loop through each URL and scrape the content
-for url in urls:
-    try:
-        print(f"Visiting: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-            page_text = soup.get_text(separator=" ", strip=True).lower()
-            # Check if any of the keywords are in the page content
-            if any(keyword in page_text for keyword in keywords):
+
+class PageCheck:
+    """Verdict for one URL, small enough to keep for the whole run"""
+
+    def __init__(self, status_code, matched, from_cache):
+        self.status_code = status_code
+        self.matched = matched
+        self.from_cache = from_cache
+
+
+@lru_cache(maxsize=8)
+def keyword_matcher_for(keywords):
+    """Builds (once per keyword list) the automaton used to scan pages"""
+    return KeywordMatcher({"topic": list(keywords)})
+
+
+def text_contains_keywords(page_text, keywords):
+    """Checks if the page text contains any of the keywords"""
+    return keyword_matcher_for(tuple(keywords)).contains(page_text)
+
+
+def page_contains_keywords(html, keywords):
+    """Checks if the visible text of an HTML page contains any of the keywords"""
+    text = parse_html(html).text(separator=" ", strip=True)
+    return text_contains_keywords(text, keywords)
+
+
+def store_stage(keywords):
+    """Name of the URL store results: one per keyword list, as verdicts depend on it"""
+    return "step1:" + ",".join(sorted(keyword.lower() for keyword in keywords))
+
+
+def load_urls(input_csv, column_name="Link"):
+    # Read only the link column (CSV files with proper encoding and quoting)
+    df = read_table(input_csv, columns=[column_name], encoding="utf-8", quoting=1)
+    links = df[column_name].dropna()
+    # One URL per page: http/https, "www." and trailing slashes don't count
+    return links[~links.map(dedupe_key).duplicated()].tolist()
+
+
+def stream_contains_keywords(
+    url, keywords, session=None, cache=None, max_bytes=DEFAULT_MAX_BYTES
+):
+    """
+    Streaming check: reads the page only until a keyword shows up or
+    max_bytes were downloaded, without keeping the body.
+
+    Returns:
+        StreamVerdict: Same status_code / matched / from_cache fields as PageCheck
+    """
+    return stream_page_matches(
+        url,
+        lambda text: text_contains_keywords(text, keywords),
+        session=session,
+        headers=headers,
+        timeout=10,
+        cache=cache,
+        max_bytes=max_bytes,
+    )
+
+
+def filter_links_sequential(
+    urls, keywords, streaming=False, max_bytes=DEFAULT_MAX_BYTES, store=None
+):
+    """
+    Visits every URL one after another, pausing 1 second between requests.
+
+    With a store (UrlStore) the URLs checked in an earlier run are not
+    visited again: their recorded verdict is used.
+    """
+    filtered_results = []
+    verdicts = []
+    stats = FetchStats()
+    cache = get_shared_cache()
+    known = store.results(urls, store_stage(keywords)) if store is not None else {}
+
+    # Loop through each URL and scrape the content
+    for url in urls:
+        if url in known:
+            if known[url] == "1":
                 filtered_results.append(url)
+            continue
+        try:
+            print(f"Visiting: {url}")
+            if streaming:
+                response = stream_contains_keywords(
+                    url, keywords, cache=cache, max_bytes=max_bytes
+                )
+                verdicts.append(response)
+                matched = response.matched
+            else:
+                response = cache.get(url, headers=headers, timeout=10)
+                matched = response.status_code == 200 and page_contains_keywords(
+                    response.text, keywords
+                )
+            if response.status_code == 200:
+                # Check if any of the keywords are in the page content
+                if matched:
+                    filtered_results.append(url)
+                if store is not None:
+                    store.mark(url, store_stage(keywords), "1" if matched else "0")
+            else:
+                print(f"Error accessing {url} (status code {response.status_code})")
+        except Exception as e:
+            print(f"Failed to access {url}: {e}")
+            stats.errors += 1
+            response = None
+        stats.pages += 1
+
+        if response is None or not response.from_cache:
+            time.sleep(1)  # Pause to avoid overwhelming the sites
+
+    stats.finished = time.perf_counter()
+    stats.report()
+    if streaming:
+        report_verdicts(verdicts)
+    cache.report()
+    if store is not None:
+        store.report()
+    return filtered_results
+
+
+def filter_links_concurrent(
+    urls,
+    keywords,
+    max_concurrency=20,
+    per_host_limit=2,
+    host_delay=1.0,
+    streaming=False,
+    max_bytes=DEFAULT_MAX_BYTES,
+    store=None,
+):
+    """
+    Visits the URLs concurrently. Politeness is enforced per domain
+    (per_host_limit requests in flight, host_delay seconds between them)
+    instead of serializing the whole run.
+
+    With streaming=True each page is only read until a keyword shows up
+    (or max_bytes were read) and is not stored in the cache. With a store
+    (UrlStore) the URLs checked in an earlier run are not visited again.
+    """
+
+    cache = get_shared_cache()
+    known = store.results(urls, store_stage(keywords)) if store is not None else {}
+    pending = [url for url in urls if url not in known]
+    fetch_page = make_session_fetcher(headers=headers, timeout=10, cache=cache)
+    get_session = make_thread_sessions(headers)
+
+    # Parse inside the worker thread so only the verdict is kept in memory
+    def check_url(url):
+        if streaming:
+            return stream_contains_keywords(
+                url, keywords, get_session(), cache, max_bytes
+            )
+        response = fetch_page(url)
+        matched = response.status_code == 200 and page_contains_keywords(
+            response.text, keywords
+        )
+        return PageCheck(response.status_code, matched, response.from_cache)
+
+    def report(url, result):
+        if isinstance(result, Exception):
+            print(f"Failed to access {url}: {result}")
+        elif result.status_code != 200:
+            print(f"Error accessing {url} (status code {result.status_code})")
         else:
-            print(f"Error accessing {url} (status code {response.status_code})")
-    except Exception as e:
-        print(f"Failed to access {url}: {e}")
+            print(f"Visited: {url}")
 
-    time.sleep(1)  # Pause to avoid overwhelming the sites
+    results, stats = fetch_urls_concurrently(
+        pending,
+        fetch=check_url,
+        max_concurrency=max_concurrency,
+        per_host_limit=per_host_limit,
+        host_delay=host_delay,
+        on_result=report,
+    )
 
-# Save filtered URLs to a new CSV (without quotes around the URLs)
-with open(output_csv, "w", encoding="utf-8") as f:
-    f.write("Link\n")  # Write header
-    for url in filtered_results:
-        f.write(f"{url}\n")  # Write each URL without quotes
+    matched = dict(known)
+    for url, result in zip(pending, results):
+        if not isinstance(result, Exception) and result.status_code == 200:
+            matched[url] = "1" if result.matched else "0"
+            if store is not None:
+                store.mark(url, store_stage(keywords), matched[url])
 
-print(
-    f"\n✅ Process completed. {len(filtered_results)} links containing the keywords were saved."
-)
+    # Keep the input order so the output matches the sequential mode
+    filtered_results = [url for url in urls if matched.get(url) == "1"]
+
+    stats.report()
+    if streaming:
+        report_verdicts(results)
+    cache.report()
+    if store is not None:
+        store.report()
+    return filtered_results
+
+
+def save_filtered_links(output_csv, filtered_results):
+    # Save filtered URLs to a new table (CSV without quotes around the URLs)
+    write_table(pd.DataFrame({"Link": list(filtered_results)}), output_csv)
+
+
+if __name__ == "__main__":
+    # Input and output file names
+    input_csv = "links_Verkehrsrecht.csv"
+    output_csv = stage_path("filtered_links_Verkehrsrecht_v2.csv")  # Output file
+
+    # Keywords related to the topics you're interested in
+    keywords = ["markenrecht", "verkehrsrecht"]
+
+    column_name = "Link"  # Update this if your column has a different name
+
+    # Concurrent mode settings (set CONCURRENT = False for the old one-by-one run)
+    CONCURRENT = True
+    MAX_CONCURRENCY = 20  # Requests in flight overall
+    PER_HOST_LIMIT = 2  # Requests in flight per domain
+    HOST_DELAY = 1.0  # Seconds between requests to the same domain
+
+    # Streaming mode: stop reading a page at the first keyword or after
+    # MAX_BYTES (pages are then not cached for the later steps)
+    STREAMING = False
+    MAX_BYTES = 2 * 1024**2
+
+    # Skip the URLs already checked for these keywords in earlier runs
+    USE_URL_STORE = True
+    store = get_shared_store() if USE_URL_STORE else None
+
+    urls = load_urls(input_csv, column_name)
+
+    if CONCURRENT:
+        filtered_results = filter_links_concurrent(
+            urls,
+            keywords,
+            MAX_CONCURRENCY,
+            PER_HOST_LIMIT,
+            HOST_DELAY,
+            STREAMING,
+            MAX_BYTES,
+            store,
+        )
+    else:
+        filtered_results = filter_links_sequential(
+            urls, keywords, STREAMING, MAX_BYTES, store
+        )
+
+    save_filtered_links(output_csv, filtered_results)
+
+    print(
+        f"\n✅ Process completed. {len(filtered_results)} links containing the keywords were saved."
+    )
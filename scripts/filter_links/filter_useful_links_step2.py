@@ -1,71 +1,145 @@
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import os
 import re
+import sys
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from html_document import parse_html
+from http_cache import get_shared_cache
+from keyword_matcher import KeywordMatcher
+from table_io import read_table, stage_path, write_table
+from url_store import get_shared_store
+from url_tools import dedupe_key
+from stream_scanner import DEFAULT_MAX_BYTES, report_verdicts, stream_page_matches
+
+EMAIL_PATTERN = re.compile(r"\b[\w.-]+?@\w+?\.\w+?\b")
+
+ADDRESS_KEYWORDS = [
+    "address",
+    "dirección",
+    "direccion",
+    "street",
+    "avenue",
+    "calle",
+    "adresse",
+    "straße",
+    "strasse",
+    "platz",
+    "hausnummer",
+]
+
+NAME_KEYWORDS = [
+    "law firm",
+    "abogado",
+    "attorney",
+    "firma",
+    "law office",
+    "anwalt",
+    "rechtsanwalt",
+    "kanzlei",
+    "jurist",
+]
+
+RELEVANT_INFO_MATCHER = KeywordMatcher(
+    {"address": ADDRESS_KEYWORDS, "name": NAME_KEYWORDS}
+)
+
+STORE_STAGE = "step2"  # Name of this stage's results in the URL store
+
 
 def contains_relevant_info(text):
-    text = text.lower()
-
-    has_email = re.search(r"\b[\w.-]+?@\w+?\.\w+?\b", text)
-
-    address_keywords = [
-        "address",
-        "dirección",
-        "direccion",
-        "street",
-        "avenue",
-        "calle",
-        "adresse",
-        "straße",
-        "strasse",
-        "platz",
-        "hausnummer",
-    ]
-
-    name_keywords = [
-        "law firm",
-        "abogado",
-        "attorney",
-        "firma",
-        "law office",
-        "anwalt",
-        "rechtsanwalt",
-        "kanzlei",
-        "jurist",
-    ]
-
-    has_address = any(keyword in text for keyword in address_keywords)
-    has_name = any(keyword in text for keyword in name_keywords)
-
-    return has_email or has_address or has_name
-
-
-def analyze_links(csv_path, link_column, output_csv):
-    df = pd.read_csv(csv_path)
+    # Any address or firm-name keyword, found in one pass over the text
+    if RELEVANT_INFO_MATCHER.contains(text):
+        return True
+
+    return bool(EMAIL_PATTERN.search(text.lower()))
+
+
+def analyze_links(
+    csv_path,
+    link_column,
+    output_csv,
+    streaming=False,
+    max_bytes=DEFAULT_MAX_BYTES,
+    store=None,
+):
+    """
+    Keeps the links whose page has an address, a firm name keyword or an email.
+
+    With streaming=True each page is only read until relevant information
+    shows up (or max_bytes were read) and is not stored in the cache. With a
+    store (UrlStore) the links checked in an earlier run are not visited again.
+    """
+    df = read_table(csv_path, columns=[link_column]).dropna()
+    # One row per page: http/https, "www." and trailing slashes don't count
+    df = df[~df[link_column].map(dedupe_key).duplicated()]
     filtered_links = []
+    verdicts = []
+    cache = get_shared_cache()
+    known = store.results(df[link_column], STORE_STAGE) if store is not None else {}
 
     for index, row in df.iterrows():
         url = row[link_column]
+        if url in known:
+            if known[url] == "1":
+                filtered_links.append({"url": url})
+            continue
+        response = None
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, "html.parser")
-                text = soup.get_text(separator=" ", strip=True)
-                if contains_relevant_info(text):
-                    filtered_links.append({"url": url})
+            if streaming:
+                response = stream_page_matches(
+                    url,
+                    contains_relevant_info,
+                    timeout=10,
+                    cache=cache,
+                    max_bytes=max_bytes,
+                )
+                verdicts.append(response)
+                matched = response.matched
+            else:
+                response = cache.get(url, timeout=10)
+                matched = False
+                if response.status_code == 200:
+                    text = parse_html(response.text).text(separator=" ", strip=True)
+                    matched = contains_relevant_info(text)
+            if matched:
+                filtered_links.append({"url": url})
+            if store is not None and response.status_code == 200:
+                store.mark(url, STORE_STAGE, "1" if matched else "0")
         except Exception as e:
             print(f"Error with {url}: {e}")
 
-        time.sleep(1)
+        if response is None or not response.from_cache:
+            time.sleep(1)
 
-    result_df = pd.DataFrame(filtered_links)
-    result_df.to_csv(output_csv, index=False)
+    result_df = pd.DataFrame(filtered_links, columns=["url"])
+    write_table(result_df, output_csv)
     print(
         f"Analysis complete. {len(result_df)} links with relevant information saved to '{output_csv}'."
     )
+    if streaming:
+        report_verdicts(verdicts)
+    cache.report()
+    if store is not None:
+        store.report()
 
 
 # Run
-analyze_links("filtered_links_Markenrecht_v2.csv", "Link", "useful_links_result.csv")
+if __name__ == "__main__":
+    # Streaming mode: stop reading a page as soon as relevant information
+    # shows up or after MAX_BYTES (pages are then not cached for step 3)
+    STREAMING = False
+    MAX_BYTES = 2 * 1024**2
+
+    # Skip the links already checked in earlier runs
+    USE_URL_STORE = True
+
+    analyze_links(
+        "filtered_links_Markenrecht_v2.csv",
+        "Link",
+        stage_path("useful_links_result.csv"),
+        STREAMING,
+        MAX_BYTES,
+        get_shared_store() if USE_URL_STORE else None,
+    )
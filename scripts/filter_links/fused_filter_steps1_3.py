@@ -0,0 +1,147 @@
+import pandas as pd
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from async_fetcher import fetch_urls_concurrently, make_session_fetcher
+from html_document import parse_html
+from http_cache import get_shared_cache
+from secondary_fetch import get_secondary_fetcher
+from table_io import stage_path, write_table
+
+from filter_links_by_specific_words_step1 import (
+    headers,
+    load_urls,
+    save_filtered_links,
+    text_contains_keywords,
+)
+from filter_useful_links_step2 import contains_relevant_info
+from classify_links_by_category_step3 import analyze_law_page
+
+
+class FusedResult:
+    """Verdicts of steps 1-3 for one URL"""
+
+    def __init__(self, status_code, from_cache, step1=False, step2=False, step3=None):
+        self.status_code = status_code
+        self.from_cache = from_cache
+        self.step1 = step1
+        self.step2 = step2
+        self.step3 = step3
+
+
+def analyze_page_once(response, url, keywords):
+    """
+    Runs the step 1, step 2 and step 3 checks on a single download and parse.
+    Later steps only run when the earlier ones keep the URL, like the scripts do.
+    """
+    if response.status_code != 200:
+        return FusedResult(response.status_code, response.from_cache)
+
+    document = parse_html(response.text)
+    text = document.text(separator=" ", strip=True)
+
+    result = FusedResult(200, response.from_cache)
+    result.step1 = text_contains_keywords(text, keywords)
+    if result.step1:
+        result.step2 = bool(contains_relevant_info(text))
+    if result.step2:
+        result.step3 = analyze_law_page(url, document=document)
+    return result
+
+
+def run_fused_pipeline(
+    input_csv,
+    keywords,
+    step1_output,
+    step2_output,
+    step3_output,
+    column_name="Link",
+    max_concurrency=20,
+    per_host_limit=2,
+    host_delay=1.0,
+):
+    """
+    Fetches and parses each URL once and writes the step 1, step 2 and step 3
+    CSVs together, in the same format as the individual scripts.
+
+    Args:
+        input_csv (str): CSV with the search links (step 1 input)
+        keywords (list): Keywords for the step 1 filter
+        step1_output (str): Path of the filtered_links_*_v2.csv file
+        step2_output (str): Path of the useful links CSV
+        step3_output (str): Path of the classified links CSV
+        column_name (str): Column of input_csv holding the links
+        max_concurrency (int): Requests in flight overall
+        per_host_limit (int): Requests in flight per domain
+        host_delay (float): Seconds between requests to the same domain
+    """
+    urls = load_urls(input_csv, column_name)
+    print(
+        f"Starting fused analysis of {len(urls)} URLs at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    )
+
+    cache = get_shared_cache()
+    fetch_page = make_session_fetcher(headers=headers, timeout=10, cache=cache)
+
+    def process(url):
+        return analyze_page_once(fetch_page(url), url, keywords)
+
+    def report(url, result):
+        if isinstance(result, Exception):
+            print(f"Failed to access {url}: {result}")
+        elif result.status_code != 200:
+            print(f"Error accessing {url} (status code {result.status_code})")
+        else:
+            print(f"Visited: {url}")
+
+    results, stats = fetch_urls_concurrently(
+        urls,
+        fetch=process,
+        max_concurrency=max_concurrency,
+        per_host_limit=per_host_limit,
+        host_delay=host_delay,
+        on_result=report,
+    )
+    results = [
+        (url, result)
+        for url, result in zip(urls, results)
+        if not isinstance(result, Exception)
+    ]
+
+    # Step 1: filtered_links_*_v2.csv
+    step1_links = [url for url, result in results if result.step1]
+    save_filtered_links(step1_output, step1_links)
+
+    # Step 2: useful links
+    step2_df = pd.DataFrame(
+        [{"url": url} for url, result in results if result.step2], columns=["url"]
+    )
+    write_table(step2_df, step2_output)
+
+    # Step 3: classified links
+    step3_df = pd.DataFrame(
+        [{"url": url, "type": result.step3} for url, result in results if result.step2],
+        columns=["url", "type"],
+    )
+    write_table(step3_df, step3_output)
+
+    print(f"\nStep 1: {len(step1_links)} links saved to '{step1_output}'")
+    print(f"Step 2: {len(step2_df)} links saved to '{step2_output}'")
+    print(f"Step 3: results saved to '{step3_output}'")
+    print(step3_df["type"].value_counts())
+    stats.report()
+    cache.report()
+    get_secondary_fetcher().report()
+
+
+if __name__ == "__main__":
+    # Configuration
+    INPUT_CSV = "links_Markenrecht.csv"
+    KEYWORDS = ["markenrecht", "verkehrsrecht"]
+    STEP1_OUTPUT = stage_path("filtered_links_Markenrecht_v2.csv")
+    STEP2_OUTPUT = stage_path("useful_links_result.csv")
+    STEP3_OUTPUT = stage_path("german_law_analysis.csv")
+
+    run_fused_pipeline(INPUT_CSV, KEYWORDS, STEP1_OUTPUT, STEP2_OUTPUT, STEP3_OUTPUT)
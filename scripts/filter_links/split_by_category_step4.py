@@ -1,7 +1,30 @@
-import pandas as pd
 import os
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from table_io import PIPELINE_FORMAT, iter_table_chunks, read_table
+
+CHUNK_SIZE = 100_000  # Rows read at a time in streaming mode
+
+
+def safe_file_name(category):
+    # Create valid filename (replace special characters)
+    return "".join(c if c.isalnum() else "_" for c in str(category))
+
+
+def write_summary(summary_file, input_file, counts, created_files):
+    with open(summary_file, "w") as f:
+        f.write(f"Category Analysis Summary\n")
+        f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Source file: {input_file}\n")
+        f.write(f"\nCategories found:\n")
+        for cat, count in counts.items():
+            f.write(f"- {cat}: {count} records\n")
+        f.write(f"\nFiles created:\n")
+        for file in created_files:
+            f.write(f"- {file}\n")
+
 
 def split_csv_by_category(
     input_file, output_folder="categorized_results", category_column="type"
@@ -18,8 +41,8 @@ def split_csv_by_category(
         # Create output folder if it doesn't exist
         os.makedirs(output_folder, exist_ok=True)
 
-        # Read input CSV
-        df = pd.read_csv(input_file)
+        # Read input table (CSV, Parquet or Feather)
+        df = read_table(input_file)
 
         # Verify the category column exists
         if category_column not in df.columns:
@@ -37,11 +60,7 @@ def split_csv_by_category(
             # Filter data by category
             category_df = df[df[category_column] == category]
 
-            # Create valid filename (replace special characters)
-            safe_category_name = "".join(
-                c if c.isalnum() else "_" for c in str(category)
-            )
-            output_file = os.path.join(output_folder, f"{safe_category_name}.csv")
+            output_file = os.path.join(output_folder, f"{safe_file_name(category)}.csv")
 
             # Save the file
             category_df.to_csv(output_file, index=False)
@@ -51,17 +70,13 @@ def split_csv_by_category(
 
         # Create summary file
         summary_file = os.path.join(output_folder, "_summary.txt")
-        with open(summary_file, "w") as f:
-            f.write(f"Category Analysis Summary\n")
-            f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Source file: {input_file}\n")
-            f.write(f"\nCategories found:\n")
-            for cat in categories:
-                count = len(df[df[category_column] == cat])
-                f.write(f"- {cat}: {count} records\n")
-            f.write(f"\nFiles created:\n")
-            for file in created_files:
-                f.write(f"- {file}\n")
+        counts = df[category_column].value_counts(sort=False)
+        write_summary(
+            summary_file,
+            input_file,
+            {cat: counts.get(cat, 0) for cat in categories},
+            created_files,
+        )
 
         print(f"\nProcess completed. Created {len(created_files)} CSV files.")
         print(f"Summary saved to: {summary_file}")
@@ -73,15 +88,159 @@ def split_csv_by_category(
         return None
 
 
+class CategoryWriter:
+    """Appends the rows of one category to its CSV or Parquet file"""
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self.rows = 0
+        self._file = None
+        self._parquet = None
+
+    def append(self, rows):
+        if self.output_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet is None:
+                # Column types come from the first rows; a column that is only
+                # empty cells there is text, like every column of a CSV input
+                schema = pa.Table.from_pandas(rows, preserve_index=False).schema
+                schema = pa.schema(
+                    [
+                        (
+                            (field.name, pa.string())
+                            if pa.types.is_null(field.type)
+                            else field
+                        )
+                        for field in schema
+                    ]
+                )
+                self._parquet = pq.ParquetWriter(self.path, schema)
+            table = pa.Table.from_pandas(
+                rows, schema=self._parquet.schema, preserve_index=False
+            )
+            self._parquet.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, "w", newline="", encoding="utf-8")
+            rows.to_csv(self._file, header=self.rows == 0, index=False)
+        self.rows += len(rows)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def split_csv_by_category_streaming(
+    input_file,
+    output_folder="categorized_results",
+    category_column="type",
+    chunk_size=CHUNK_SIZE,
+    output_format="csv",
+):
+    """
+    Same split as split_csv_by_category in a single pass over the input.
+
+    The input is read chunk_size rows at a time and each chunk's groups are
+    appended to per-category writers, so memory stays flat whatever the file
+    size. Counts for the summary are added up on the fly. Every CSV column is
+    read as text, so values are written back exactly as they were and the
+    Parquet schema is the same for all chunks; Parquet and Feather inputs
+    keep their own column types.
+
+    Args:
+        input_file (str): Path to input table (CSV, Parquet or Feather)
+        output_folder (str): Folder to store output files
+        category_column (str): Name of the column containing categories
+        chunk_size (int): Rows read at a time
+        output_format (str): "csv" or "parquet" (needs pyarrow)
+
+    Returns:
+        list: Created files, or None on error
+    """
+    if output_format not in ("csv", "parquet"):
+        raise ValueError(f"Unknown output format: {output_format}")
+    if output_format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet output needs: pip install pyarrow")
+
+    writers = {}
+    try:
+        os.makedirs(output_folder, exist_ok=True)
+
+        reader = iter_table_chunks(input_file, chunk_size, dtype=str)
+        for chunk_number, chunk in enumerate(reader):
+            if chunk_number == 0 and category_column not in chunk.columns:
+                raise ValueError(
+                    f"Input CSV must contain a column named '{category_column}' with categories"
+                )
+
+            for category, rows in chunk.groupby(
+                category_column, sort=False, dropna=False
+            ):
+                writer = writers.get(category)
+                if writer is None:
+                    path = os.path.join(
+                        output_folder, f"{safe_file_name(category)}.{output_format}"
+                    )
+                    writer = writers[category] = CategoryWriter(path, output_format)
+                writer.append(rows)
+
+            print(f"Processed chunk {chunk_number + 1} ({len(chunk)} rows)")
+
+    except Exception as e:
+        print(f"Error processing file: {str(e)}")
+        return None
+
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    created_files = [writer.path for writer in writers.values()]
+    for category, writer in writers.items():
+        print(f"Saved {writer.rows} records to {writer.path}")
+
+    summary_file = os.path.join(output_folder, "_summary.txt")
+    write_summary(
+        summary_file,
+        input_file,
+        {category: writer.rows for category, writer in writers.items()},
+        created_files,
+    )
+
+    print(f"\nProcess completed. Created {len(created_files)} files.")
+    print(f"Summary saved to: {summary_file}")
+    return created_files
+
+
 if __name__ == "__main__":
     # Configuration
     INPUT_CSV = "german_law_analysis.csv"  # Input CSV with categories
     OUTPUT_FOLDER = "law_categories"  # Output folder
     CATEGORY_COLUMN = "type"  # Column containing categories
 
+    # Streaming mode reads the CSV in chunks (flat memory for multi-GB files)
+    STREAMING = True
+    # "csv" or "parquet" (streaming mode, needs pyarrow)
+    OUTPUT_FORMAT = "parquet" if PIPELINE_FORMAT == "parquet" else "csv"
+
     # Execute the function
-    split_csv_by_category(
-        input_file=INPUT_CSV,
-        output_folder=OUTPUT_FOLDER,
-        category_column=CATEGORY_COLUMN,
-    )
+    if STREAMING:
+        split_csv_by_category_streaming(
+            input_file=INPUT_CSV,
+            output_folder=OUTPUT_FOLDER,
+            category_column=CATEGORY_COLUMN,
+            output_format=OUTPUT_FORMAT,
+        )
+    else:
+        split_csv_by_category(
+            input_file=INPUT_CSV,
+            output_folder=OUTPUT_FOLDER,
+            category_column=CATEGORY_COLUMN,
+        )
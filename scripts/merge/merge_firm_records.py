@@ -0,0 +1,494 @@
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from itertools import combinations
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from keyword_matcher import normalize_text
+from table_io import read_table, stage_path, write_table
+from url_tools import registrable_domain
+
+# Firm tables written by the bots, and which of their columns hold what
+SOURCES = [
+    {
+        "name": "hg_org",
+        "file": "law_firms_playwright.csv",
+        "columns": {
+            "name": "Name",
+            "website": "Website",
+            "phones": "Phone",
+            "addresses": "Address",
+        },
+    },
+    {
+        "name": "scraper",
+        "file": "web_data_output.csv",
+        "columns": {
+            "name": "company_name",
+            "website": "source_url",
+            "emails": "emails",
+            "phones": "phones",
+            "addresses": "addresses",
+            "linkedin": "linkedin_profiles",
+        },
+    },
+    {
+        "name": "filtered",
+        "file": "output.csv",
+        "columns": {
+            "name": "name",
+            "website": "url",
+            "emails": "email",
+            "linkedin": "linkedin",
+        },
+    },
+]
+
+FIELDS = ["name", "website", "emails", "phones", "addresses", "linkedin"]
+
+# Columns of the merged table (see merge_cluster)
+MERGED_COLUMNS = [
+    "name",
+    "website",
+    "domain",
+    "emails",
+    "phones",
+    "addresses",
+    "linkedin",
+    "sources",
+    "source_rows",
+    "records",
+]
+
+# Placeholders the bots write when a field was not found
+MISSING_VALUES = {"", "n/a", "not found", "error", "nan", "none"}
+
+# Domains shared by many firms (directories, social networks, mail providers)
+SHARED_DOMAINS = {
+    "hg.org",
+    "anwalt.de",
+    "linkedin.com",
+    "xing.com",
+    "facebook.com",
+    "google.com",
+    "gmail.com",
+    "googlemail.com",
+    "gmx.de",
+    "gmx.net",
+    "web.de",
+    "t-online.de",
+    "freenet.de",
+    "arcor.de",
+    "yahoo.com",
+    "yahoo.de",
+    "outlook.com",
+    "outlook.de",
+    "hotmail.com",
+    "icloud.com",
+}
+
+# Words of a firm name that do not tell firms apart
+NAME_STOPWORDS = {
+    "rechtsanwaelte",
+    "rechtsanwalt",
+    "rechtsanwaeltin",
+    "anwaelte",
+    "anwalt",
+    "anwaltskanzlei",
+    "kanzlei",
+    "partner",
+    "partnerschaft",
+    "partg",
+    "partgmbb",
+    "mbb",
+    "gmbh",
+    "mbh",
+    "llp",
+    "ag",
+    "ug",
+    "kg",
+    "co",
+    "ra",
+    "und",
+    "and",
+    "law",
+    "firm",
+    "legal",
+    "lawyers",
+    "attorneys",
+    "home",
+    "startseite",
+}
+
+NAME_TOKEN_PATTERN = re.compile(r"[a-z0-9ß]+")
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+POSTCODE_PATTERN = re.compile(r"\b\d{5}\b")  # German postcodes
+NON_DIGIT_PATTERN = re.compile(r"\D")
+
+COUNTRY_CODE = "49"  # Phone numbers of this country are stored in national form
+MIN_PHONE_DIGITS = 6
+
+MAX_BLOCK_SIZE = 50  # Bigger blocks are too common to compare
+MAX_DOMAIN_NAMES = 5  # Domains seen with more firm names are directories
+MATCH_THRESHOLD = 3  # Score two records need to be the same firm
+
+
+def clean(value):
+    """Value as a stripped string, "" for empty cells and placeholders"""
+    if value is None:
+        return ""
+    value = str(value).strip()
+    return "" if value.lower() in MISSING_VALUES else value
+
+
+def split_values(value):
+    """Cells with several values ("a; b") as a list of cleaned values"""
+    return [part for part in (clean(v) for v in clean(value).split(";")) if part]
+
+
+def normalize_phone(phone):
+    """
+    Digits of a phone number in national form, so "+49 (0)30 123 456",
+    "0049 30 123456" and "030/123456" are the same. Other countries keep
+    their "+" prefix. Returns "" for anything too short to be a number.
+    """
+    phone = phone.replace("(0)", "")
+    digits = NON_DIGIT_PATTERN.sub("", phone)
+    international = phone.lstrip().startswith("+")
+    if digits.startswith("00"):
+        digits = digits[2:]
+        international = True
+    if international:
+        if digits.startswith(COUNTRY_CODE):
+            digits = "0" + digits[len(COUNTRY_CODE) :]
+        else:
+            digits = "+" + digits
+    return digits if len(digits) >= MIN_PHONE_DIGITS else ""
+
+
+def name_tokens(name):
+    """Distinctive words of a firm name ("Kanzlei Müller & Partner" -> mueller)"""
+    return {
+        token
+        for token in NAME_TOKEN_PATTERN.findall(normalize_text(name))
+        if token not in NAME_STOPWORDS and len(token) > 1
+    }
+
+
+def firm_domain(url_or_email):
+    """Registrable domain of a website or email address, "" if it is shared"""
+    host = url_or_email.rsplit("@", 1)[-1]
+    domain = registrable_domain(host) if host else ""
+    return "" if domain in SHARED_DOMAINS or "." not in domain else domain
+
+
+class FirmRecord:
+    """One row of a source table, with the normalized values used for matching"""
+
+    def __init__(self, source, row, values):
+        self.source = source
+        self.row = row
+        self.values = values
+
+        self.name_tokens = name_tokens(values["name"])
+        self.name_key = " ".join(sorted(self.name_tokens))
+        self.emails = {
+            email.lower()
+            for value in values["emails"]
+            for email in EMAIL_PATTERN.findall(value)
+        }
+        self.phones = {normalize_phone(phone) for phone in values["phones"]} - {""}
+        self.postcodes = {
+            postcode
+            for address in values["addresses"]
+            for postcode in POSTCODE_PATTERN.findall(address)
+        }
+        # Emails on another domain than the website usually belong to other
+        # firms (directory pages), so only the firm's own ones identify it.
+        # Without a website, the emails must all share one domain.
+        email_domains = {email: firm_domain(email) for email in self.emails}
+        website_domain = firm_domain(values["website"]) if values["website"] else ""
+        if website_domain:
+            self.domains = {website_domain}
+            self.key_emails = {
+                email
+                for email, domain in email_domains.items()
+                if domain == website_domain
+            }
+        elif len(set(email_domains.values())) == 1:
+            self.domains = set(email_domains.values()) - {""}
+            self.key_emails = set(self.emails)
+        else:
+            self.domains = set()
+            self.key_emails = set()
+
+    def forget_domains(self, shared):
+        """Stops matching on domains found to be shared by many firms"""
+        self.domains -= shared
+        self.key_emails = {
+            email for email in self.key_emails if firm_domain(email) not in shared
+        }
+
+    def blocking_keys(self):
+        """
+        Keys of the blocks this record is compared in. Only records sharing
+        a key are ever compared, which keeps the linkage near-linear.
+        """
+        keys = [f"d:{domain}" for domain in self.domains]
+        keys += [f"e:{email}" for email in self.key_emails]
+        keys += [f"p:{phone}" for phone in self.phones]
+        if self.name_key:
+            keys.append(f"n:{self.name_key}")
+        keys += [
+            f"z:{postcode}:{token}"
+            for postcode in self.postcodes
+            for token in self.name_tokens
+        ]
+        return keys
+
+
+def load_source(source):
+    """
+    Reads one source table into FirmRecords.
+
+    Args:
+        source (dict): Entry of SOURCES (name, file, columns)
+
+    Returns:
+        list: FirmRecords, empty if the file does not exist
+    """
+    try:
+        df = read_table(
+            source["file"], columns=list(source["columns"].values()), dtype=str
+        )
+    except FileNotFoundError:
+        print(f"⚠️ {source['file']} not found, skipping {source['name']}")
+        return []
+    except (KeyError, ValueError):
+        # Older outputs lack some columns; read them whole
+        df = read_table(source["file"], dtype=str)
+
+    columns = {
+        field: df[column].tolist() if column in df.columns else [None] * len(df)
+        for field, column in source["columns"].items()
+    }
+    records = []
+    for row in range(len(df)):
+        values = {field: None for field in FIELDS}
+        for field, column_values in columns.items():
+            values[field] = column_values[row]
+        values["name"] = clean(values["name"])
+        values["website"] = clean(values["website"])
+        for field in ("emails", "phones", "addresses", "linkedin"):
+            values[field] = split_values(values[field])
+        records.append(FirmRecord(source["name"], row, values))
+
+    print(f"Loaded {len(records)} records from {source['file']}")
+    return records
+
+
+def match_score(a, b):
+    """
+    Evidence that two records are the same firm: shared phone or email +3,
+    same domain +3 (different domains -3), same name +2 (similar name +1),
+    same postcode +1.
+    """
+    score = 0
+    if a.domains and b.domains:
+        score += 3 if a.domains & b.domains else -3
+    if a.phones & b.phones:
+        score += 3
+    if a.key_emails & b.key_emails:
+        score += 3
+    if a.name_key and a.name_key == b.name_key:
+        score += 2
+    elif a.name_tokens and b.name_tokens:
+        shared = len(a.name_tokens & b.name_tokens)
+        if shared * 2 >= len(a.name_tokens | b.name_tokens):
+            score += 1
+    if a.postcodes & b.postcodes:
+        score += 1
+    return score
+
+
+class DisjointSet:
+    """Union-find over record indexes (path halving, union by size)"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+
+def find_shared_domains(records, max_names=MAX_DOMAIN_NAMES):
+    """
+    Domains that appear with more than max_names different firm names, such
+    as directories and portals missing from SHARED_DOMAINS.
+
+    Returns:
+        set: The shared domains
+    """
+    names = defaultdict(set)
+    for record in records:
+        if not record.name_key:
+            continue
+        domains = record.domains | {firm_domain(e) for e in record.key_emails}
+        for domain in domains - {""}:
+            names[domain].add(record.name_key)
+    return {domain for domain, found in names.items() if len(found) > max_names}
+
+
+def link_records(records, max_block_size=MAX_BLOCK_SIZE, threshold=MATCH_THRESHOLD):
+    """
+    Groups the records that describe the same firm.
+
+    Domains shared by many firms are dropped first (find_shared_domains).
+    Then the records of each domain, email, phone, name and postcode block
+    are compared pair by pair with match_score. Blocks bigger than
+    max_block_size (switchboard numbers, very common names) are skipped
+    instead of compared quadratically, except domain blocks: a firm with
+    many pages on its own domain is the main thing to merge, so each of
+    their records is compared with the first one instead.
+
+    Returns:
+        DisjointSet: Clusters of record indexes
+    """
+    shared = find_shared_domains(records)
+    if shared:
+        for record in records:
+            record.forget_domains(shared)
+        print(f"🌐 {len(shared)} domains shared by many firms ignored")
+
+    blocks = defaultdict(list)
+    for index, record in enumerate(records):
+        for key in record.blocking_keys():
+            blocks[key].append(index)
+
+    clusters = DisjointSet(len(records))
+    comparisons = skipped = 0
+    for key, members in blocks.items():
+        if len(members) < 2:
+            continue
+        if len(members) <= max_block_size:
+            pairs = combinations(members, 2)
+        elif key.startswith("d:"):
+            pairs = ((members[0], other) for other in members[1:])
+        else:
+            skipped += 1
+            continue
+        for a, b in pairs:
+            if clusters.find(a) == clusters.find(b):
+                continue
+            comparisons += 1
+            if match_score(records[a], records[b]) >= threshold:
+                clusters.union(a, b)
+
+    print(
+        f"🔗 {len(blocks)} blocks, {comparisons} pair comparisons, "
+        f"{skipped} oversized blocks skipped"
+    )
+    return clusters
+
+
+def unique(values):
+    return list(dict.fromkeys(values))
+
+
+def merge_cluster(records):
+    """One output row from the records of a firm, with their provenance"""
+    names = Counter(r.values["name"] for r in records if r.values["name"])
+    # Most frequent name, the longest one on ties
+    name = max(names, key=lambda n: (names[n], len(n))) if names else ""
+
+    websites = Counter(
+        r.values["website"]
+        for r in records
+        if r.values["website"] and firm_domain(r.values["website"])
+    )
+    website = websites.most_common(1)[0][0] if websites else ""
+
+    phones = {}
+    for record in records:
+        for phone in record.values["phones"]:
+            phones.setdefault(normalize_phone(phone) or phone, phone)
+
+    return {
+        "name": name,
+        "website": website,
+        "domain": "; ".join(sorted(set().union(*(r.domains for r in records)))),
+        "emails": "; ".join(sorted(set().union(*(r.emails for r in records)))),
+        "phones": "; ".join(phones.values()),
+        "addresses": "; ".join(
+            unique(a for r in records for a in r.values["addresses"])
+        ),
+        "linkedin": "; ".join(
+            unique(link for r in records for link in r.values["linkedin"])
+        ),
+        "sources": "; ".join(unique(r.source for r in records)),
+        "source_rows": "; ".join(f"{r.source}:{r.row}" for r in records),
+        "records": len(records),
+    }
+
+
+def merge_firm_records(sources, output_file):
+    """
+    Links the firm records of every source and writes one row per firm.
+
+    Args:
+        sources (list): Entries like those of SOURCES
+        output_file (str): Merged table (CSV, Parquet or Feather)
+
+    Returns:
+        pandas.DataFrame: The merged table ("source_rows" lists the
+        source:row_index pairs each firm was built from)
+    """
+    started = time.perf_counter()
+    records = []
+    for source in sources:
+        records.extend(load_source(source))
+    loaded = time.perf_counter()
+
+    clusters = link_records(records)
+    members = defaultdict(list)
+    for index, record in enumerate(records):
+        members[clusters.find(index)].append(record)
+    linked = time.perf_counter()
+
+    merged = pd.DataFrame(
+        [merge_cluster(group) for group in members.values()], columns=MERGED_COLUMNS
+    )
+    write_table(merged, output_file)
+
+    print(
+        f"⏱️ Loaded {len(records)} records in {loaded - started:.1f}s, "
+        f"linked in {linked - loaded:.1f}s, "
+        f"merged in {time.perf_counter() - linked:.1f}s"
+    )
+    print(f"✅ {len(records)} records merged into {len(merged)} firms: {output_file}")
+    return merged
+
+
+if __name__ == "__main__":
+    OUTPUT_FILE = stage_path("merged_firms.csv")
+
+    merge_firm_records(SOURCES, OUTPUT_FILE)
@@ -0,0 +1,484 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+SCRIPTS_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+)
+TOOLS_DIR = os.path.join(SCRIPTS_DIR, "tools")
+for folder in ("tools", "search", "filter_links"):
+    sys.path.append(os.path.join(SCRIPTS_DIR, folder))
+from table_io import PIPELINE_FORMAT, stage_path
+
+STATE_FILE = ".pipeline_state.json"  # Fingerprints of the last successful runs
+STEPS = ["search", "step1", "step2", "step3", "step4"]
+
+IMPORT_PATTERN = re.compile(r"^(?:from|import) (\w+)", re.MULTILINE)
+
+
+class Stage:
+    """
+    One step of the pipeline for one legal area.
+
+    Args:
+        name (str): Unique name, like "step2:Markenrecht"
+        run (callable): run(stage), a top-level function so it can be sent
+            to a worker process
+        script (str): Script below scripts/ holding the stage's code
+        inputs (list): Files the stage reads
+        outputs (list): Files (or folders) the stage writes
+        params (dict): Settings that change the outputs
+
+    The runner sets `code` to the stage's code_hash before running it.
+    """
+
+    def __init__(self, name, run, script, inputs, outputs, params=None):
+        self.name = name
+        self.run = run
+        self.script = script
+        self.inputs = inputs
+        self.outputs = outputs
+        self.params = params or {}
+        self.code = ""
+        self.depends_on = []
+
+
+# ---- stages ----
+
+
+def run_search(stage):
+    from search_lawyers_api import (
+        QuotaBudget,
+        SerpPageCache,
+        SerpSearcher,
+        search_queries,
+        serpapi_client,
+    )
+
+    if stage.params["stub"]:
+        from serpapi_stub import StubSerpApiClient
+
+        client = StubSerpApiClient()
+    else:
+        client = serpapi_client
+    searcher = SerpSearcher(
+        client=client, cache=SerpPageCache(), budget=QuotaBudget(stage.params["budget"])
+    )
+    try:
+        found = search_queries(
+            [stage.params["query"]],
+            stage.params["min_results"],
+            searcher,
+            output_dir=os.path.dirname(stage.outputs[0]),
+        )
+    finally:
+        searcher.close()
+        searcher.report()
+    # Not recorded as done, so the next run searches again
+    links = found[stage.params["query"]]
+    if searcher.errors:
+        raise RuntimeError(f"{searcher.errors} SerpAPI requests failed")
+    if not links:
+        raise RuntimeError("the search returned no links")
+    if len(links) < stage.params["min_results"] and not searcher.budget.remaining:
+        raise RuntimeError(f"SerpAPI budget used up after {len(links)} links")
+
+
+def open_store(stage):
+    """
+    URL store for a stage run. Its results are kept under the stage's code
+    version, so they are only reused while the code is unchanged.
+    """
+    from url_store import UrlStore
+
+    return UrlStore(version=stage.code[:12])
+
+
+def run_step1(stage):
+    from filter_links_by_specific_words_step1 import (
+        filter_links_concurrent,
+        load_urls,
+        save_filtered_links,
+    )
+
+    store = open_store(stage)
+    try:
+        urls = load_urls(stage.inputs[0], "Link")
+        save_filtered_links(
+            stage.outputs[0],
+            filter_links_concurrent(urls, stage.params["keywords"], store=store),
+        )
+    finally:
+        store.close()
+
+
+def run_step2(stage):
+    from filter_useful_links_step2 import analyze_links
+
+    store = open_store(stage)
+    try:
+        analyze_links(stage.inputs[0], "Link", stage.outputs[0], store=store)
+    finally:
+        store.close()
+
+
+def run_step3(stage):
+    from classify_links_by_category_step3 import process_law_firm_csv
+
+    store = open_store(stage)
+    try:
+        result = process_law_firm_csv(stage.inputs[0], stage.outputs[0], store)
+    finally:
+        store.close()
+    if result is None:
+        raise RuntimeError("step 3 failed, see the messages above")
+
+
+def run_step4(stage):
+    from split_by_category_step4 import split_csv_by_category_streaming
+
+    result = split_csv_by_category_streaming(
+        input_file=stage.inputs[0],
+        output_folder=stage.outputs[0],
+        category_column="type",
+        output_format="parquet" if PIPELINE_FORMAT == "parquet" else "csv",
+    )
+    if result is None:
+        raise RuntimeError("step 4 failed, see the messages above")
+
+
+def build_stages(
+    areas,
+    output_dir,
+    keywords=None,
+    min_results=50,
+    budget=100,
+    stub=False,
+    search=True,
+    until="step4",
+):
+    """
+    Declares the stages of every legal area and links them by their files.
+
+    Each area is its own chain search -> step1 -> ... -> step4, writing
+    links_<area>, filtered_links_<area>_v2, useful_links_<area>,
+    german_law_analysis_<area> and the law_categories_<area> folder.
+
+    Args:
+        areas (list): Legal areas, like ["Markenrecht", "Verkehrsrecht"]
+        output_dir (str): Folder of every file the pipeline writes
+        keywords (list): Step 1 keywords, defaults to the area name
+        min_results, budget, stub: Search settings, see search_lawyers_api
+        search (bool): False to start from existing links_<area> files
+        until (str): Last step to run
+
+    Returns:
+        list: Stages in a valid run order
+    """
+    stages = []
+    for area in areas:
+        slug = area.replace(" ", "_")
+
+        def path(name):
+            return stage_path(os.path.join(output_dir, name))
+
+        links = path(f"links_{slug}.csv")
+        filtered = path(f"filtered_links_{slug}_v2.csv")
+        useful = path(f"useful_links_{slug}.csv")
+        analysis = path(f"german_law_analysis_{slug}.csv")
+        categories = os.path.join(output_dir, f"law_categories_{slug}")
+
+        chain = [
+            Stage(
+                f"search:{slug}",
+                run_search,
+                "search/search_lawyers_api.py",
+                [],
+                [links],
+                {
+                    "query": area,
+                    "min_results": min_results,
+                    "budget": budget,
+                    "stub": stub,
+                },
+            ),
+            Stage(
+                f"step1:{slug}",
+                run_step1,
+                "filter_links/filter_links_by_specific_words_step1.py",
+                [links],
+                [filtered],
+                {"keywords": keywords or [area.lower()]},
+            ),
+            Stage(
+                f"step2:{slug}",
+                run_step2,
+                "filter_links/filter_useful_links_step2.py",
+                [filtered],
+                [useful],
+            ),
+            Stage(
+                f"step3:{slug}",
+                run_step3,
+                "filter_links/classify_links_by_category_step3.py",
+                [useful],
+                [analysis],
+            ),
+            Stage(
+                f"step4:{slug}",
+                run_step4,
+                "filter_links/split_by_category_step4.py",
+                [analysis],
+                [categories],
+            ),
+        ]
+        stages += chain[0 if search else 1 : STEPS.index(until) + 1]
+
+    producers = {output: stage for stage in stages for output in stage.outputs}
+    for stage in stages:
+        stage.depends_on = [producers[i] for i in stage.inputs if i in producers]
+    return stages
+
+
+# ---- fingerprints ----
+
+
+def file_hash(path, known):
+    """
+    SHA-256 of a file, reused from known while its size and mtime are unchanged.
+
+    Args:
+        known (dict): path -> [size, mtime_ns, hash], updated in place
+    """
+    status = os.stat(path)
+    entry = known.get(path)
+    if entry and entry[0] == status.st_size and entry[1] == status.st_mtime_ns:
+        return entry[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    known[path] = [status.st_size, status.st_mtime_ns, digest.hexdigest()]
+    return known[path][2]
+
+
+def code_hash(script, known):
+    """Hash of a stage script and of every tools module it imports, recursively"""
+    digest = hashlib.sha256()
+    seen = set()
+    todo = [os.path.join(SCRIPTS_DIR, script)]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        digest.update(file_hash(path, known).encode())
+        with open(path, encoding="utf-8") as f:
+            for module in IMPORT_PATTERN.findall(f.read()):
+                tool = os.path.join(TOOLS_DIR, f"{module}.py")
+                if os.path.exists(tool):
+                    todo.append(tool)
+    return digest.hexdigest()
+
+
+def fingerprint(stage, known):
+    """Everything a stage's outputs depend on: code, settings and input contents"""
+    return {
+        "code": code_hash(stage.script, known),
+        "params": json.dumps(stage.params, sort_keys=True),
+        "inputs": {path: file_hash(path, known) for path in stage.inputs},
+    }
+
+
+def outdated_reason(stage, current, previous):
+    """Why a stage has to run, or None when its outputs are up to date"""
+    if previous is None:
+        return "never ran"
+    if not all(os.path.exists(output) for output in stage.outputs):
+        return "outputs missing"
+    if current["code"] != previous["code"]:
+        return "code changed"
+    if current["params"] != previous["params"]:
+        return "settings changed"
+    changed = [
+        os.path.basename(path)
+        for path, digest in current["inputs"].items()
+        if previous["inputs"].get(path) != digest
+    ]
+    if changed:
+        return f"{', '.join(changed)} changed"
+    return None
+
+
+def load_state(output_dir):
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {"stages": {}, "files": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ---- runner ----
+
+
+def execute_stage(stage):
+    """Runs a stage in a worker process, returns its duration in seconds"""
+    started = time.perf_counter()
+    stage.run(stage)
+    missing = [output for output in stage.outputs if not os.path.exists(output)]
+    if missing:
+        raise RuntimeError(f"{', '.join(missing)} not written")
+    return time.perf_counter() - started
+
+
+def run_pipeline(stages, output_dir, jobs=2, force=False, dry_run=False):
+    """
+    Runs the stages whose outputs are out of date, make-style.
+
+    A stage runs when it never ran, its outputs are missing, or its code
+    (the script and the tools modules it imports), settings or input
+    contents changed since its last successful run. Stages wait for the
+    stages writing their inputs; independent chains (one per legal area)
+    run in parallel worker processes. A failed stage stops its own chain
+    only.
+
+    Args:
+        stages (list): Stages from build_stages
+        output_dir (str): Folder holding the files and the state file
+        jobs (int): Stages running at the same time
+        force (bool): Run every stage
+        dry_run (bool): Only print what would run
+
+    Returns:
+        dict: stage name -> "ran", "up to date", "failed" or "blocked"
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state = load_state(output_dir)
+    known = state["files"]
+    status = {}
+    pending = list(stages)
+    running = {}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for stage in list(pending):
+                if any(
+                    status.get(d.name) in ("failed", "blocked")
+                    for d in stage.depends_on
+                ):
+                    status[stage.name] = "blocked"
+                    pending.remove(stage)
+                    print(f"⚠️ {stage.name} skipped, an earlier stage failed")
+                    continue
+                if any(
+                    status.get(d.name) in (None, "would run") for d in stage.depends_on
+                ):
+                    if dry_run and all(d.name in status for d in stage.depends_on):
+                        status[stage.name] = "would run"
+                        pending.remove(stage)
+                        print(f"🔄 {stage.name} would run after its inputs are rebuilt")
+                    continue
+
+                pending.remove(stage)
+                missing = [path for path in stage.inputs if not os.path.exists(path)]
+                if missing:
+                    status[stage.name] = "failed"
+                    print(f"❌ {stage.name}: {', '.join(missing)} not found")
+                    continue
+                current = fingerprint(stage, known)
+                reason = "forced" if force else None
+                reason = reason or outdated_reason(
+                    stage, current, state["stages"].get(stage.name)
+                )
+                if reason is None:
+                    status[stage.name] = "up to date"
+                    print(f"✅ {stage.name} up to date")
+                elif dry_run:
+                    status[stage.name] = "would run"
+                    print(f"🔄 {stage.name} would run ({reason})")
+                else:
+                    print(f"🔄 Running {stage.name} ({reason})")
+                    stage.code = current["code"]
+                    running[pool.submit(execute_stage, stage)] = (stage, current)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, current = running.pop(future)
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    status[stage.name] = "failed"
+                    print(f"❌ {stage.name} failed: {e}")
+                    continue
+                status[stage.name] = "ran"
+                state["stages"][stage.name] = current
+                save_state(output_dir, state)
+                print(f"✅ {stage.name} done in {seconds:.1f}s")
+
+    if not dry_run:
+        save_state(output_dir, state)
+    counts = {}
+    for result in status.values():
+        counts[result] = counts.get(result, 0) + 1
+    summary = ", ".join(f"{count} {result}" for result, count in counts.items())
+    print(f"⏱️ Pipeline finished in {time.perf_counter() - started:.1f}s: {summary}")
+    return status
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run the search -> filter -> classify -> split pipeline incrementally."
+    )
+    parser.add_argument("areas", nargs="+", help="Legal areas, e.g. Markenrecht")
+    parser.add_argument("--output-dir", default=os.path.join("data", "processed"))
+    parser.add_argument(
+        "--keywords", nargs="+", help="Step 1 keywords (default: the area name)"
+    )
+    parser.add_argument("--until", choices=STEPS, default="step4")
+    parser.add_argument(
+        "--no-search",
+        action="store_true",
+        help="Start from existing links_<area> files in the output folder",
+    )
+    parser.add_argument("--min-results", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=100, help="SerpAPI requests")
+    parser.add_argument("--stub", action="store_true", help="Use the SerpAPI stub")
+    parser.add_argument("--jobs", type=int, default=2, help="Stages run in parallel")
+    parser.add_argument("--force", action="store_true", help="Run every stage")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only show what would run"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # python scripts/pipeline/run_pipeline.py Markenrecht Verkehrsrecht --jobs 2
+    args = parse_args()
+    stages = build_stages(
+        args.areas,
+        args.output_dir,
+        keywords=args.keywords,
+        min_results=args.min_results,
+        budget=args.budget,
+        stub=args.stub,
+        search=not args.no_search,
+        until=args.until,
+    )
+    status = run_pipeline(stages, args.output_dir, args.jobs, args.force, args.dry_run)
+    sys.exit(1 if "failed" in status.values() else 0)
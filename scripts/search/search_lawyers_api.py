@@ -1,57 +1,318 @@
-from serpapi import GoogleSearch
-import csv
-
-# Your SerpAPI key
-API_KEY = ""
-
-# Ask the user for search input
-query = input("What type of law firm are you looking for?: ")
-
-# Ask the user for the minimum number of results
-min_results = int(input("What is the minimum number of results you want?: "))
-
-# Set location to Germany for national search
-location = "Germany"
-
-# Search parameters
-params = {
-    "engine": "google",
-    "q": f"{query} in {location}",
-    "api_key": API_KEY,
-    "location": location,
-    "hl": "de",  # German results
-    "gl": "de",
-    "start": 0,
-}
-
-# Track seen links to avoid duplicates
-seen_links = set()
-
-# Prepare the filename
-filename = f"links_{query.replace(' ', '_')}.csv"
-
-# Open CSV to write only links
-with open(filename, "w", newline="", encoding="utf-8") as file:
-    writer = csv.writer(file)
-    writer.writerow(["Link"])  # Just the links
-
-    total_links = 0
-    page = 0
-
-    while total_links < min_results:
-        params["start"] = page
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        items = results.get("organic_results", [])
-
-        for item in items:
-            link = item.get("link", "")
-            if link and link not in seen_links:
-                seen_links.add(link)
-                writer.writerow([link])
-                print(link)  # Show the link in console
-                total_links += 1
-
-        page += 10
-
-print(f"\nSearch completed! {total_links} links saved to '{filename}'")
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from table_io import stage_path, write_table
+from url_tools import dedupe_key
+
+# Your SerpAPI key (or set the SERPAPI_API_KEY environment variable)
+API_KEY = os.environ.get("SERPAPI_API_KEY", "")
+
+PAGE_SIZE = 10  # Google results per SerpAPI page
+DEFAULT_PAGE_CACHE = os.environ.get("SERP_PAGE_CACHE", ".serp_page_cache.sqlite")
+PAGE_CACHE_TTL = 30 * 24 * 3600  # Result pages are reused for a month
+
+# SerpAPI "errors" that only mean the page is empty
+NO_RESULTS_ERRORS = ("hasn't returned any results", "has not returned any results")
+
+
+def serpapi_client(params):
+    """Sends one SerpAPI request and returns its JSON as a dict"""
+    from serpapi import GoogleSearch
+
+    return GoogleSearch(params).get_dict()
+
+
+class SerpPageCache:
+    """
+    Result pages already paid for, keyed by (source, query, location, start),
+    so repeated searches cost no quota. The source names the client that
+    answered, so pages of a stub are never served to a real search. Failed
+    requests are never stored.
+
+    Args:
+        path (str): SQLite file
+        ttl (float): Seconds a page is reused
+    """
+
+    def __init__(self, path=DEFAULT_PAGE_CACHE, ttl=PAGE_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(pages)")]
+        if columns and "source" not in columns:
+            # Older caches did not record the client and may mix stub pages in
+            self._db.execute("DROP TABLE pages")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS pages (
+                source TEXT,
+                query TEXT,
+                location TEXT,
+                start INTEGER,
+                response TEXT,
+                fetched_at REAL,
+                PRIMARY KEY (source, query, location, start)
+            )""")
+        self._db.commit()
+
+    def get(self, source, query, location, start):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, fetched_at FROM pages "
+                "WHERE source = ? AND query = ? AND location = ? AND start = ?",
+                (source, query, location, start),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, source, query, location, start, response):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (source, query, location, start, json.dumps(response), time.time()),
+            )
+            self._db.commit()
+
+
+class QuotaBudget:
+    """Number of SerpAPI requests this run may still spend"""
+
+    def __init__(self, calls):
+        self.remaining = calls
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Reserves one request, False once the budget is used up"""
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            self.spent += 1
+            return True
+
+
+class SerpSearcher:
+    """
+    Fetches Google result pages through SerpAPI, several at a time.
+
+    Pages come from the page cache when possible; the others are requested
+    concurrently, as long as the quota budget allows.
+
+    Args:
+        client (callable): client(params) -> response dict (serpapi_client,
+            or a stub like serpapi_stub.StubSerpApiClient for testing); its
+            `source` attribute separates its pages in the cache
+        cache (SerpPageCache): Page cache, None to always ask SerpAPI
+        budget (QuotaBudget): Requests this run may spend
+        concurrency (int): Pages requested at the same time
+        location (str): SerpAPI location
+        api_key (str): SerpAPI key
+    """
+
+    def __init__(
+        self,
+        client=serpapi_client,
+        cache=None,
+        budget=None,
+        concurrency=3,
+        location="Germany",
+        api_key=API_KEY,
+    ):
+        self.client = client
+        self.source = getattr(client, "source", "serpapi")
+        self.cache = cache
+        self.budget = budget or QuotaBudget(100)
+        self.concurrency = concurrency
+        self.location = location
+        self.api_key = api_key
+        self.errors = 0
+        self._pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    def params(self, query, start):
+        return {
+            "engine": "google",
+            "q": f"{query} in {self.location}",
+            "api_key": self.api_key,
+            "location": self.location,
+            "hl": "de",  # German results
+            "gl": "de",
+            "start": start,
+        }
+
+    def fetch_page(self, query, start):
+        """
+        Returns:
+            list: Organic results of the page ([] past the last page), or
+            None if the budget is used up or the request failed
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self.source, query, self.location, start)
+            if cached is not None:
+                return cached.get("organic_results", [])
+        if not self.budget.take():
+            return None
+        try:
+            response = self.client(self.params(query, start))
+        except Exception as e:
+            print(f"Error searching '{query}' (start={start}): {e}")
+            self.errors += 1
+            return None
+        error = response.get("error", "")
+        if error and not any(message in error for message in NO_RESULTS_ERRORS):
+            print(f"SerpAPI error for '{query}' (start={start}): {error}")
+            self.errors += 1
+            return None
+        if self.cache is not None:
+            self.cache.put(self.source, query, self.location, start, response)
+        return response.get("organic_results", [])
+
+    def search(self, query, min_results, max_pages=10):
+        """
+        Collects links for one query until min_results distinct links were found.
+
+        Pages are fetched in waves of up to `concurrency` pages (no more
+        than the links still missing need). Paging stops at the first page
+        that is empty or adds no link this query had not returned yet, and
+        when the budget runs out, so a query can never page forever.
+
+        Args:
+            query (str): What to search for
+            min_results (int): Distinct links wanted
+            max_pages (int): Pages requested at most for this query
+
+        Returns:
+            list: Distinct links, in result order
+        """
+        links = []
+        seen = set()
+        page = 0
+        while len(links) < min_results and page < max_pages:
+            missing_pages = -(-(min_results - len(links)) // PAGE_SIZE)
+            wave = range(
+                page, min(page + self.concurrency, page + missing_pages, max_pages)
+            )
+            pages = list(
+                self._pool.map(lambda p: self.fetch_page(query, p * PAGE_SIZE), wave)
+            )
+            page = wave.stop
+
+            for number, items in zip(wave, pages):
+                if items is None:
+                    return links  # Budget used up or request failed
+                added = 0
+                for item in items:
+                    link = item.get("link", "")
+                    if not link or dedupe_key(link) in seen:
+                        continue
+                    seen.add(dedupe_key(link))
+                    added += 1
+                    links.append(link)
+                    print(link)  # Show the link in console
+                if added == 0:
+                    print(f"No new links on page {number + 1}, stopping '{query}'")
+                    return links
+        return links
+
+    def report(self):
+        cached = self.cache.hits if self.cache is not None else 0
+        print(
+            f"💳 SerpAPI: {self.budget.spent} requests spent, {cached} pages "
+            f"from cache, {self.errors} failed, {self.budget.remaining} left "
+            f"in the budget"
+        )
+
+    def close(self):
+        self._pool.shutdown()
+
+
+def links_file_name(query, output_dir="."):
+    return stage_path(os.path.join(output_dir, f"links_{query.replace(' ', '_')}.csv"))
+
+
+def search_queries(queries, min_results, searcher, output_dir=".", max_pages=10):
+    """
+    Batch mode: searches every query and writes one links_<query> table each.
+
+    Returns:
+        dict: {query: links found}
+    """
+    found = {}
+    for query in queries:
+        links = searcher.search(query, min_results, max_pages)
+        filename = links_file_name(query, output_dir)
+        write_table(pd.DataFrame({"Link": links}), filename)
+        print(f"\nSearch completed! {len(links)} links saved to '{filename}'")
+        found[query] = links
+    return found
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Search law firms via SerpAPI.")
+    parser.add_argument("queries", nargs="*", help="Searches, e.g. 'Markenrecht'")
+    parser.add_argument("--queries-file", help="File with one search per line")
+    parser.add_argument(
+        "--min-results", type=int, default=50, help="Distinct links wanted per search"
+    )
+    parser.add_argument("--location", default="Germany")
+    parser.add_argument(
+        "--budget", type=int, default=100, help="SerpAPI requests this run may spend"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=3, help="Pages requested at the same time"
+    )
+    parser.add_argument(
+        "--max-pages", type=int, default=10, help="Pages requested at most per search"
+    )
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument(
+        "--stub", action="store_true", help="Use the local SerpAPI stub (no quota)"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Batch: python search_lawyers_api.py Markenrecht Verkehrsrecht --min-results 100
+    # Without arguments the search and the number of results are asked for
+    args = parse_args()
+
+    queries = list(args.queries)
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries += [line.strip() for line in f if line.strip()]
+    min_results = args.min_results
+    if not queries:
+        # Ask the user for search input
+        queries = [input("What type of law firm are you looking for?: ")]
+        # Ask the user for the minimum number of results
+        min_results = int(input("What is the minimum number of results you want?: "))
+
+    if args.stub:
+        from serpapi_stub import StubSerpApiClient
+
+        client = StubSerpApiClient()
+    else:
+        client = serpapi_client
+
+    searcher = SerpSearcher(
+        client=client,
+        cache=SerpPageCache(),
+        budget=QuotaBudget(args.budget),
+        concurrency=args.concurrency,
+        location=args.location,
+    )
+    try:
+        search_queries(queries, min_results, searcher, args.output_dir, args.max_pages)
+    finally:
+        searcher.close()
+        searcher.report()
@@ -0,0 +1,43 @@
+import hashlib
+import threading
+
+
+class StubSerpApiClient:
+    """
+    Local stand-in for SerpAPI, to try search_lawyers_api.py without quota.
+
+    Every query gets total_results deterministic fake results; pages past
+    the end are empty, like Google's. Calls are counted so paging, caching
+    and the quota budget can be checked.
+
+    Args:
+        total_results (int): Results each query has
+        page_size (int): Results per page
+    """
+
+    def __init__(self, total_results=35, page_size=10):
+        self.total_results = total_results
+        self.page_size = page_size
+        # Cache key part, so fake pages never mix with real SerpAPI pages
+        self.source = f"stub-{total_results}-{page_size}"
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, params):
+        with self._lock:
+            self.calls += 1
+        query = params["q"]
+        slug = hashlib.md5(query.encode("utf-8")).hexdigest()[:8]
+        start = params.get("start", 0)
+        end = min(start + self.page_size, self.total_results)
+        return {
+            "search_parameters": dict(params, api_key=""),
+            "organic_results": [
+                {
+                    "position": position + 1,
+                    "title": f"Kanzlei {position + 1} ({query})",
+                    "link": f"https://kanzlei-{slug}-{position + 1}.de/",
+                }
+                for position in range(start, end)
+            ],
+        }
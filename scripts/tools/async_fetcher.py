@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from http_replay import install_from_env
+
+# Record or replay the traffic when HTTP_RECORD_ARCHIVE / HTTP_REPLAY_SERVER is set
+install_from_env()
+
+
+class FetchStats:
+    """Counters collected while fetching a batch of URLs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.pages = 0
+        self.errors = 0
+
+    @property
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report(self):
+        print(
+            f"⏱️ Fetched {self.pages} pages ({self.errors} errors) in "
+            f"{self.elapsed:.1f}s -> {self.pages_per_second:.2f} pages/sec"
+        )
+
+
+def make_thread_sessions(headers=None):
+    """
+    Builds a getter returning one keep-alive requests.Session per thread.
+
+    Args:
+        headers (dict): Headers set on every session
+
+    Returns:
+        callable: get_session() -> requests.Session of the calling thread
+    """
+    local = threading.local()
+
+    def get_session():
+        session = getattr(local, "session", None)
+        if session is None:
+            session = requests.Session()
+            if headers:
+                session.headers.update(headers)
+            local.session = session
+        return session
+
+    return get_session
+
+
+def make_session_fetcher(headers=None, timeout=10, cache=None):
+    """
+    Builds a fetch function that reuses one keep-alive requests.Session per thread.
+
+    Args:
+        headers (dict): Headers sent with every request
+        timeout (float): Timeout in seconds for each request
+        cache (HttpCache): Optional response cache to read through
+
+    Returns:
+        callable: fetch(url) -> requests.Response (or CachedResponse)
+    """
+    get_session = make_thread_sessions(headers)
+
+    def fetch(url):
+        session = get_session()
+        if cache is not None:
+            return cache.get(url, timeout=timeout, session=session)
+        return session.get(url, timeout=timeout)
+
+    return fetch
+
+
+async def _fetch_all(
+    urls, fetch, max_concurrency, per_host_limit, host_delay, on_result
+):
+    loop = asyncio.get_running_loop()
+    global_slots = asyncio.Semaphore(max_concurrency)
+    host_slots = {}
+    results = [None] * len(urls)
+    stats = FetchStats()
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+
+        async def worker(index, url):
+            host = urlparse(url).netloc.lower()
+            host_slot = host_slots.setdefault(host, asyncio.Semaphore(per_host_limit))
+
+            # Take the per-host slot first so a busy domain never holds a global slot
+            async with host_slot:
+                async with global_slots:
+                    try:
+                        result = await loop.run_in_executor(executor, fetch, url)
+                    except Exception as e:
+                        result = e
+                        stats.errors += 1
+                    stats.pages += 1
+
+                results[index] = result
+                if on_result:
+                    on_result(url, result)
+
+                # Politeness delay is per domain, other hosts keep going meanwhile.
+                # Answers served from the local cache never touched the host.
+                if host_delay and not getattr(result, "from_cache", False):
+                    await asyncio.sleep(host_delay)
+
+        await asyncio.gather(*(worker(i, url) for i, url in enumerate(urls)))
+
+    stats.finished = time.perf_counter()
+    return results, stats
+
+
+def fetch_urls_concurrently(
+    urls,
+    fetch=None,
+    max_concurrency=20,
+    per_host_limit=2,
+    host_delay=1.0,
+    on_result=None,
+):
+    """
+    Fetches many URLs concurrently with a global and a per-host concurrency cap.
+
+    Args:
+        urls (list): URLs to fetch
+        fetch (callable): fetch(url) -> result, run in a worker thread.
+            Defaults to a keep-alive requests session with a 10 s timeout.
+        max_concurrency (int): Maximum number of requests in flight overall
+        per_host_limit (int): Maximum number of requests in flight per host
+        host_delay (float): Seconds a host slot stays busy after each request
+        on_result (callable): Optional on_result(url, result) progress callback
+
+    Returns:
+        tuple: (results in the same order as urls, FetchStats). A result is
+        whatever fetch returned, or the exception it raised.
+    """
+    urls = list(urls)
+    if fetch is None:
+        fetch = make_session_fetcher()
+
+    return asyncio.run(
+        _fetch_all(urls, fetch, max_concurrency, per_host_limit, host_delay, on_result)
+    )
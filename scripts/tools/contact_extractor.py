@@ -0,0 +1,104 @@
+import re
+
+# Every pattern is compiled once at import time. Each pass starts with a
+# lookahead on a rare character ("h"/"@" in the HTML, "+"/digit in the text)
+# so the regex engine can skip ahead quickly, and every repeat is bounded, so
+# long unbroken runs (inline base64 images, number tables) stay linear: the
+# old email pattern was quadratic on them.
+
+# Emails and LinkedIn URLs live in the HTML (href="mailto:...", links).
+# Emails are found from their "@domain" part; the local part is read
+# backwards from the "@" (see _email_at).
+HTML_TOKENS = re.compile(
+    r"(?=[h@])(?:"
+    r"(?P<linkedin>https://[a-z]{2,3}\.linkedin\.com/(?:in|company)/[A-Za-z0-9\-_%]{1,100})"
+    r"|@(?P<domain>[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){1,6})"
+    r")"
+)
+LOCAL_PART = re.compile(r"[A-Za-z0-9_.+-]{1,64}\Z")
+
+# Phones and "12345 City" postcodes live in the visible text. They are
+# scanned separately, as "Tel. 030 1234567 10115 Berlin" holds both, and a
+# phone stops before a postcode followed by a city name.
+ADDRESS_PATTERN = re.compile(
+    r"(?=\d)\d{5} [A-ZÄÖÜ][a-zäöüß]+(?:[- ](?:[A-ZÄÖÜ][a-zäöüß]+|am|an|im|in|der|bei)){0,3}"
+)
+PHONE_PATTERN = re.compile(r"(?=[+\d])\+?\d(?:[\d\-() ](?!\d{5} [A-ZÄÖÜ])){7,40}\d")
+
+TITLE_PATTERN = re.compile(r"<title[^>]*>([^<]*)</title>", re.IGNORECASE)
+
+ROLES = r"CEO|Chief Executive|Managing Partner|Managing Director|Founder|Geschäftsführer(?:in)?|Gründer(?:in)?"
+ROLE_PATTERN = re.compile(ROLES)
+
+# A capitalized name of two to four words, optionally with a title. Names
+# are only looked for right next to a role keyword, never across the page.
+NAME = r"(?:(?:Mr|Ms|Dr|Prof)\.\s)?[A-ZÄÖÜ][a-zäöüß]+(?:[ -][A-ZÄÖÜ][a-zäöüß]+){1,3}"
+NAME_BEFORE_ROLE = re.compile(rf"({NAME})[ ,]{{0,3}}[(–-]?[ ]?\Z")
+NAME_AFTER_ROLE = re.compile(rf"\)?[ :,–-]{{1,4}}({NAME})")
+NAME_WINDOW = 80
+
+
+def _unique(values):
+    """Removes duplicates keeping the order of first appearance"""
+    return list(dict.fromkeys(values))
+
+
+def _email_at(content, match):
+    """Completes an "@domain" match with the local part written before it"""
+    at = match.start()
+    local = LOCAL_PART.search(content, max(0, at - 64), at)
+    if local is None:
+        return None
+    return f"{local.group()}@{match.group('domain')}".strip(".")
+
+
+def find_people_with_roles(text_content):
+    """Finds 'Name (Role)' mentions such as 'Dr. Hans Müller, Managing Partner'"""
+    candidates = []
+    for role in ROLE_PATTERN.finditer(text_content):
+        before = NAME_BEFORE_ROLE.search(
+            text_content, max(0, role.start() - NAME_WINDOW), role.start()
+        )
+        after = NAME_AFTER_ROLE.match(text_content, role.end())
+        name = before or after
+        if name:
+            candidates.append(f"{name.group(1)} ({role.group()})")
+    return _unique(candidates)
+
+
+def extract_contacts(content, text_content):
+    """
+    Extracts contact data from a page in a single pass over the HTML and
+    one pass per pattern over the visible text.
+
+    Args:
+        content (str): Page HTML
+        text_content (str): Visible text of the page
+
+    Returns:
+        dict: company_name, emails, phones, addresses, ceo_candidates and
+        linkedin_profiles (lists keep the order the values appear in)
+    """
+    emails, linkedin_links = [], []
+    for match in HTML_TOKENS.finditer(content):
+        if match.lastgroup == "domain":
+            email = _email_at(content, match)
+            if email:
+                emails.append(email)
+        else:
+            linkedin_links.append(match.group("linkedin"))
+
+    phones = PHONE_PATTERN.findall(text_content)
+    addresses = ADDRESS_PATTERN.findall(text_content)
+
+    title = TITLE_PATTERN.search(content)
+    company_name = title.group(1).strip() if title else "Not found"
+
+    return {
+        "company_name": company_name or "Not found",
+        "emails": _unique(emails),
+        "phones": _unique(phones),
+        "addresses": _unique(addresses),
+        "ceo_candidates": find_people_with_roles(text_content),
+        "linkedin_profiles": _unique(linkedin_links),
+    }
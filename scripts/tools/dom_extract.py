@@ -0,0 +1,105 @@
+# JavaScript run inside the page: resolves every field in one round trip
+EXTRACT_JS = """
+([fields, scope]) => {
+    const readField = (root, field) => {
+        for (const selector of field.selectors) {
+            for (const el of root.querySelectorAll(selector)) {
+                if (field.attributes) {
+                    const values = {};
+                    for (const name of field.attributes) {
+                        values[name] = el.getAttribute(name);
+                    }
+                    if (!values[field.attributes[0]]) continue;
+                    return values;
+                }
+                const value = field.attribute
+                    ? el.getAttribute(field.attribute)
+                    : el[field.text];
+                if (value === null || value === undefined) continue;
+                if (field.attribute && value === "") continue;
+                if (field.exclude && value.includes(field.exclude)) continue;
+                if (field.include && !value.includes(field.include)) continue;
+                return field.strip ? value.trim() : value;
+            }
+        }
+        return field.default;
+    };
+    const readAll = (root) => {
+        const out = {};
+        for (const field of fields) out[field.name] = readField(root, field);
+        return out;
+    };
+    if (scope === null) return readAll(document);
+    return Array.from(document.querySelectorAll(scope), readAll);
+}
+"""
+
+
+def field(
+    name,
+    selectors,
+    attribute=None,
+    attributes=None,
+    text="innerText",
+    exclude=None,
+    include=None,
+    default="N/A",
+    strip=True,
+):
+    """
+    Declares one value to extract from a page.
+
+    The selectors are tried in order (fallbacks) and, for each selector, the
+    matching elements in document order; the first value that passes the
+    filters wins. Missing or empty attributes never match.
+
+    Args:
+        name (str): Key of the value in the result
+        selectors (list): CSS selectors, primary first then fallbacks
+        attribute (str): Attribute to read, or None to read the element text
+        attributes (list): Several attributes to read from the same element,
+            returned as a dict; only elements with a non-empty first
+            attribute match (the filters and strip do not apply)
+        text (str): "innerText" (rendered text) or "textContent" (raw text)
+        exclude (str): Skip values containing this substring
+        include (str): Only accept values containing this substring
+        default: Value used when nothing matches
+        strip (bool): Strip surrounding whitespace from the value
+
+    Returns:
+        dict: Field spec that can be sent to the browser
+    """
+    if isinstance(selectors, str):
+        selectors = [selectors]
+    return {
+        "name": name,
+        "selectors": list(selectors),
+        "attribute": attribute,
+        "attributes": attributes,
+        "text": text,
+        "exclude": exclude,
+        "include": include,
+        "default": default,
+        "strip": strip,
+    }
+
+
+async def extract_fields(page, fields, scope=None):
+    """
+    Extracts all fields with a single page.evaluate call (async API).
+
+    Args:
+        page: Playwright page
+        fields (list): Specs built with field()
+        scope (str): Optional selector; when given, the fields are read inside
+            every matching element and a list of dicts is returned
+
+    Returns:
+        dict or list: Field values keyed by name
+    """
+    return await page.evaluate(EXTRACT_JS, [fields, scope])
+
+
+def extract_fields_sync(page, fields, scope=None):
+    """Same as extract_fields for the sync Playwright API"""
+    return page.evaluate(EXTRACT_JS, [fields, scope])
@@ -0,0 +1,214 @@
+import time
+from urllib.parse import urlparse
+
+from http_replay import install_from_env, route_async, route_sync
+
+# Record or replay the traffic when HTTP_RECORD_ARCHIVE / HTTP_REPLAY_SERVER is set
+install_from_env()
+
+# Resource types the scrapers never look at
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+
+# Analytics, ads and consent trackers found on most firm websites
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "linkedin.com/px",
+    "snap.licdn.com",
+    "matomo.cloud",
+    "etracker.com",
+)
+
+# Rough average sizes used to estimate what blocking saved (we never see
+# the real size of a request that was aborted)
+TYPICAL_BYTES = {
+    "image": 60_000,
+    "media": 400_000,
+    "font": 40_000,
+    "stylesheet": 25_000,
+    "tracker": 30_000,
+}
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+
+class NavigationStats:
+    """Counters for pages visited through a FastNavigationProfile"""
+
+    def __init__(self):
+        self.pages = 0
+        self.seconds = 0.0
+        self.blocked = {}
+        self.bytes_downloaded = 0
+
+    def record_blocked(self, kind):
+        self.blocked[kind] = self.blocked.get(kind, 0) + 1
+
+    def record_response(self, headers):
+        length = headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_downloaded += int(length)
+
+    def record_page(self, seconds):
+        self.pages += 1
+        self.seconds += seconds
+
+    @property
+    def estimated_bytes_saved(self):
+        return sum(TYPICAL_BYTES.get(kind, 0) * n for kind, n in self.blocked.items())
+
+    def report(self):
+        per_page = self.seconds / self.pages if self.pages else 0.0
+        blocked = ", ".join(f"{kind}: {n}" for kind, n in sorted(self.blocked.items()))
+        print(
+            f"⏱️ {self.pages} pages, {per_page:.2f}s per page, "
+            f"{self.bytes_downloaded / 1024**2:.1f} MB downloaded, "
+            f"~{self.estimated_bytes_saved / 1024**2:.1f} MB saved by blocking "
+            f"({blocked or 'nothing blocked'})"
+        )
+
+
+class FastNavigationProfile:
+    """
+    Shared Playwright settings for fast scraping.
+
+    Aborts images, media, fonts, stylesheets and tracker requests, runs
+    headless without slow_mo and waits on load state / selectors instead of
+    fixed sleeps. Works with both the sync and the async Playwright API.
+
+    Args:
+        headless (bool): Run the browser without a window
+        slow_mo (int): Milliseconds Playwright waits between actions
+        blocked_types (set): Resource types to abort
+        blocked_hosts (tuple): URL fragments of hosts to abort
+    """
+
+    def __init__(
+        self,
+        headless=True,
+        slow_mo=0,
+        blocked_types=BLOCKED_RESOURCE_TYPES,
+        blocked_hosts=BLOCKED_HOSTS,
+    ):
+        self.headless = headless
+        self.slow_mo = slow_mo
+        self.blocked_types = set(blocked_types)
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.stats = NavigationStats()
+
+    def launch_options(self):
+        return {"headless": self.headless, "slow_mo": self.slow_mo}
+
+    def context_options(self):
+        return {
+            "user_agent": USER_AGENT,
+            "viewport": {"width": 1280, "height": 720},
+            # Service workers would fetch behind our routes
+            "service_workers": "block",
+        }
+
+    def _blocked_kind(self, request):
+        """Returns why a request should be aborted, or None to let it through"""
+        if request.resource_type in self.blocked_types:
+            return request.resource_type
+        parsed = urlparse(request.url)
+        target = parsed.netloc + parsed.path
+        if any(host in target for host in self.blocked_hosts):
+            return "tracker"
+        return None
+
+    # ---- sync API ----
+
+    def install_sync(self, context):
+        """Adds request routing and byte accounting to a sync BrowserContext"""
+
+        def handle(route, request):
+            kind = self._blocked_kind(request)
+            if kind:
+                self.stats.record_blocked(kind)
+                route.abort()
+            elif not route_sync(route, request):
+                route.continue_()
+
+        context.route("**/*", handle)
+        context.on(
+            "response", lambda response: self.stats.record_response(response.headers)
+        )
+        return context
+
+    def new_context_sync(self, browser):
+        return self.install_sync(browser.new_context(**self.context_options()))
+
+    def goto_sync(
+        self,
+        page,
+        url,
+        wait_for=None,
+        wait_until="domcontentloaded",
+        timeout=30000,
+        selector_timeout=5000,
+    ):
+        """
+        Navigates and waits for wait_until (and the wait_for selector, if given)
+        instead of sleeping a fixed time. A selector that never shows up is not
+        an error: the page is simply returned as it is.
+        """
+        start = time.perf_counter()
+        response = page.goto(url, wait_until=wait_until, timeout=timeout)
+        if wait_for:
+            try:
+                page.wait_for_selector(wait_for, timeout=selector_timeout)
+            except Exception:
+                pass
+        self.stats.record_page(time.perf_counter() - start)
+        return response
+
+    # ---- async API ----
+
+    async def install_async(self, context):
+        """Adds request routing and byte accounting to an async BrowserContext"""
+
+        async def handle(route, request):
+            kind = self._blocked_kind(request)
+            if kind:
+                self.stats.record_blocked(kind)
+                await route.abort()
+            elif not await route_async(route, request):
+                await route.continue_()
+
+        await context.route("**/*", handle)
+        context.on(
+            "response", lambda response: self.stats.record_response(response.headers)
+        )
+        return context
+
+    async def new_context_async(self, browser):
+        return await self.install_async(
+            await browser.new_context(**self.context_options())
+        )
+
+    async def goto_async(
+        self,
+        page,
+        url,
+        wait_for=None,
+        wait_until="domcontentloaded",
+        timeout=30000,
+        selector_timeout=5000,
+    ):
+        """Async version of goto_sync"""
+        start = time.perf_counter()
+        response = await page.goto(url, wait_until=wait_until, timeout=timeout)
+        if wait_for:
+            try:
+                await page.wait_for_selector(wait_for, timeout=selector_timeout)
+            except Exception:
+                pass
+        self.stats.record_page(time.perf_counter() - start)
+        return response
@@ -0,0 +1,261 @@
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Text inside these elements is code, not page text (BeautifulSoup skips it too)
+NON_TEXT_TAGS = ("script", "style")
+
+if lxml is not None:
+    # Text nodes outside script/style (and outside comments), in document order
+    _LXML_TEXT = etree.XPath(
+        ".//text()[not(parent::script or parent::style)]", smart_strings=False
+    )
+
+# Simple selectors understood by the lxml backend: tag, .class, #id, [attr]
+# and [attr=value], combined with descendant (space) and child (>) combinators
+SIMPLE_SELECTOR = re.compile(
+    r"(?P<tag>[a-zA-Z][\w-]*|\*)?"
+    r"(?P<rest>(?:\.[\w-]+|#[\w-]+|\[[\w-]+(?:=(?:\"[^\"]*\"|'[^']*'|[^\]]*))?\])*)"
+)
+SELECTOR_PART = re.compile(
+    r"\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)"
+    r"|\[(?P<attr>[\w-]+)(?:=(?P<value>\"[^\"]*\"|'[^']*'|[^\]]*))?\]"
+)
+
+
+def _join_strings(strings, separator, strip):
+    """Joins text nodes like BeautifulSoup's get_text(separator, strip)"""
+    if strip:
+        strings = [s.strip() for s in strings]
+        strings = [s for s in strings if s]
+    return separator.join(strings)
+
+
+def _css_to_xpath(selector):
+    """Translates a simple CSS selector (see SIMPLE_SELECTOR) to XPath"""
+    steps = []
+    axis = "descendant::"
+    for token in re.split(r"\s*(>)\s*|\s+", selector.strip()):
+        if not token:
+            continue
+        if token == ">":
+            axis = "child::"
+            continue
+        match = SIMPLE_SELECTOR.fullmatch(token)
+        if not match or not (match.group("tag") or match.group("rest")):
+            raise ValueError(f"Unsupported selector for the lxml backend: {selector}")
+        conditions = []
+        for part in SELECTOR_PART.finditer(match.group("rest")):
+            if part.group("cls"):
+                conditions.append(
+                    f"contains(concat(' ', normalize-space(@class), ' '), ' {part.group('cls')} ')"
+                )
+            elif part.group("id"):
+                conditions.append(f"@id='{part.group('id')}'")
+            elif part.group("value") is None:
+                conditions.append(f"@{part.group('attr')}")
+            else:
+                value = part.group("value").strip("\"'")
+                conditions.append(f"@{part.group('attr')}='{value}'")
+        step = axis + (match.group("tag") or "*").lower()
+        steps.append(step + "".join(f"[{c}]" for c in conditions))
+        axis = "descendant::"
+    if not steps:
+        raise ValueError(f"Empty selector: {selector!r}")
+    return "./" + "/".join(steps)
+
+
+class HtmlNode:
+    """
+    One element of a parsed page, with the same small API on every backend.
+
+    Args:
+        backend (str): Backend that built the node
+        node: The backend's own element object
+    """
+
+    def __init__(self, backend, node):
+        self.backend = backend
+        self.node = node
+
+    def get(self, attribute, default=None):
+        """Returns an attribute value, or default when it is missing"""
+        if self.backend == "html.parser":
+            value = self.node.get(attribute)
+            if isinstance(value, list):  # class and other multi-valued attributes
+                value = " ".join(value)
+        elif self.backend == "lxml":
+            value = self.node.get(attribute)
+        else:
+            value = self.node.attributes.get(attribute)
+        return default if value is None else value
+
+    def __getitem__(self, attribute):
+        value = self.get(attribute)
+        if value is None:
+            raise KeyError(attribute)
+        return value
+
+    def _strings(self):
+        if self.backend == "html.parser":
+            return list(self.node.strings)
+        if self.backend == "lxml":
+            return _LXML_TEXT(self.node)
+        return [
+            node.text_content
+            for node in self.node.traverse(include_text=True)
+            if node.tag == "-text" and node.parent.tag not in NON_TEXT_TAGS
+        ]
+
+    def text(self, separator="", strip=False):
+        """
+        Visible text below this node, like BeautifulSoup's get_text().
+
+        Args:
+            separator (str): Inserted between text nodes
+            strip (bool): Strip each text node and drop the empty ones
+        """
+        if self.backend == "html.parser" and not strip:
+            return self.node.get_text(separator)
+        return _join_strings(self._strings(), separator, strip)
+
+    def select(self, selector):
+        """Elements matching a CSS selector, in document order"""
+        if self.backend == "html.parser":
+            nodes = self.node.select(selector)
+        elif self.backend == "lxml":
+            nodes = self.node.xpath(_css_to_xpath(selector))
+        else:
+            nodes = self.node.css(selector)
+        return [HtmlNode(self.backend, node) for node in nodes]
+
+    def select_one(self, selector):
+        """First element matching a CSS selector, or None"""
+        nodes = self.select(selector)
+        return nodes[0] if nodes else None
+
+
+class HtmlDocument(HtmlNode):
+    """
+    A parsed page. Build it with parse_html().
+
+    Besides the HtmlNode API it answers the page-level questions the
+    filters ask: the title, a <meta> value, the link targets and the class
+    attributes (or how many of them match a pattern).
+    """
+
+    def title(self):
+        """Text of the <title> element, "" when there is none"""
+        title = self.select_one("title")
+        return title.text().strip() if title else ""
+
+    def meta(self, name, default=""):
+        """content of <meta name="..."> (exact name match)"""
+        for meta in self.select("meta"):
+            if meta.get("name") == name:
+                return meta.get("content", default)
+        return default
+
+    def hrefs(self):
+        """href of every <a> that has one, in document order"""
+        if self.backend == "lxml":
+            return self.node.xpath("//a/@href", smart_strings=False)
+        return [a.get("href") for a in self.select("a[href]")]
+
+    def class_attributes(self):
+        """class attribute of every element that has one, in document order"""
+        if self.backend == "html.parser":
+            return [" ".join(node["class"]) for node in self.node.find_all(class_=True)]
+        if self.backend == "lxml":
+            return self.node.xpath("//@class", smart_strings=False)
+        return [node.attributes.get("class") or "" for node in self.node.css("[class]")]
+
+    def count_class(self, pattern):
+        """
+        Counts the elements whose class attribute matches a regex, like
+        len(soup.find_all(class_=pattern)).
+        """
+        if self.backend == "html.parser":
+            return len(self.node.find_all(class_=pattern))
+        return sum(1 for value in self.class_attributes() if pattern.search(value))
+
+
+def available_backends():
+    """Backends that can be used with the installed packages"""
+    backends = ["html.parser"]
+    if lxml is not None:
+        backends.append("lxml")
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    return backends
+
+
+DEFAULT_BACKEND = os.environ.get(
+    "HTML_BACKEND", "lxml" if lxml is not None else "html.parser"
+)
+
+
+def _lxml_root(html):
+    """
+    lxml tree of a page. Pages without any element (blank, or only a
+    doctype, comment or XML declaration) give an empty document, as they
+    do with html.parser, instead of lxml's "Document is empty" error.
+    """
+    try:
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            # Strings that still carry an <?xml encoding?> declaration
+            root = lxml.html.document_fromstring(
+                html.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8")
+            )
+    except etree.ParserError:
+        root = None
+    if root is None:
+        root = lxml.html.document_fromstring("<html></html>")
+    return root
+
+
+def parse_html(html, backend=None):
+    """
+    Parses a page with the chosen backend.
+
+    "html.parser" is BeautifulSoup with Python's parser (the slowest, kept as
+    the reference), "lxml" builds a libxml2 tree and "selectolax" a lexbor
+    tree (optional package). The default is lxml, or the HTML_BACKEND
+    environment variable.
+
+    Args:
+        html (str): Page HTML
+        backend (str): "html.parser", "lxml" or "selectolax"
+
+    Returns:
+        HtmlDocument: The parsed page
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "html.parser":
+        return HtmlDocument(backend, BeautifulSoup(html, "html.parser"))
+
+    if backend == "lxml":
+        if lxml is None:
+            raise ImportError("The lxml backend needs the lxml package")
+        return HtmlDocument(backend, _lxml_root(html))
+
+    if backend == "selectolax":
+        if LexborHTMLParser is None:
+            raise ImportError("The selectolax backend needs: pip install selectolax")
+        return HtmlDocument(backend, LexborHTMLParser(html).root)
+
+    raise ValueError(f"Unknown HTML backend: {backend}")
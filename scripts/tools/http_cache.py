@@ -0,0 +1,345 @@
+import codecs
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from email.utils import formatdate
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from http_replay import install_from_env
+from url_tools import canonicalize_url
+
+# Record or replay the traffic when HTTP_RECORD_ARCHIVE / HTTP_REPLAY_SERVER is set
+install_from_env()
+
+DEFAULT_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", ".http_cache")
+DEFAULT_TTL = 7 * 24 * 3600  # One week
+DEFAULT_MAX_BYTES = 2 * 1024**3  # 2 GB of page bodies
+
+# Only responses that describe the page itself are worth keeping
+CACHEABLE_STATUS = {200, 203, 404, 410}
+
+META_CHARSET_PATTERN = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.IGNORECASE)
+
+# Response headers kept with each entry
+STORED_HEADERS = ("content-type", "etag", "last-modified", "content-language")
+
+
+def detect_encoding(headers, content):
+    """
+    Charset of a page body: the Content-Type charset, else the <meta charset>
+    like a browser would, else utf-8 when the bytes are valid utf-8 and cp1252
+    otherwise. content may be just the start of the body.
+    """
+    content_type = headers.get("content-type", "")
+    if "charset" in content_type.lower():
+        return get_encoding_from_headers(headers)
+
+    match = META_CHARSET_PATTERN.search(content[:4096])
+    if match:
+        return match.group(1).decode("ascii")
+    try:
+        # An incremental decoder accepts a character cut at the end of a prefix
+        codecs.getincrementaldecoder("utf-8")().decode(content)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+class CachedResponse:
+    """Small stand-in for requests.Response built from a cache entry."""
+
+    def __init__(self, url, status_code, content, headers, fetched_at, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers)
+        self.fetched_at = fetched_at
+        self.from_cache = from_cache
+
+    @property
+    def encoding(self):
+        return detect_encoding(self.headers, self.content)
+
+    @property
+    def text(self):
+        try:
+            return self.content.decode(self.encoding, errors="replace")
+        except LookupError:
+            # Unknown charset name in the page
+            return self.content.decode("utf-8", errors="replace")
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+
+class HttpCache:
+    """
+    On-disk HTTP response cache shared by every pipeline stage.
+
+    Entries are keyed by canonical URL and indexed in SQLite; bodies are
+    stored content-addressed (by SHA-256) so identical pages are kept once.
+    Stale entries are revalidated with If-None-Match / If-Modified-Since and
+    the least recently used entries are evicted once max_bytes is exceeded.
+
+    Args:
+        cache_dir (str): Folder holding the index and the bodies
+        ttl (float): Seconds an entry is served without revalidation
+        max_bytes (int): Size budget for stored bodies
+    """
+
+    def __init__(
+        self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite"), check_same_thread=False
+        )
+        self._db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                url_key TEXT PRIMARY KEY,
+                status INTEGER,
+                body_hash TEXT,
+                headers TEXT,
+                fetched_at REAL,
+                last_access REAL,
+                size INTEGER
+            )""")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._db.commit()
+        self._total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    # ---- storage ----
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.cache_dir, "bodies", body_hash[:2], body_hash)
+
+    def _read_body(self, body_hash):
+        with open(self._body_path(body_hash), "rb") as f:
+            return f.read()
+
+    def _write_body(self, content):
+        body_hash = hashlib.sha256(content).hexdigest()
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return body_hash
+
+    def _load(self, url_key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, body_hash, headers, fetched_at FROM entries WHERE url_key = ?",
+                (url_key,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, body_hash, headers, fetched_at = row
+        try:
+            content = self._read_body(body_hash)
+        except OSError:
+            # Body was removed behind our back, treat as a miss
+            return None
+        return CachedResponse(
+            url_key, status, content, json.loads(headers), fetched_at, True
+        )
+
+    def _store(self, url_key, response):
+        content = response.content
+        body_hash = self._write_body(content)
+        headers = {
+            name: response.headers[name]
+            for name in STORED_HEADERS
+            if name in response.headers
+        }
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute(
+                "SELECT size FROM entries WHERE url_key = ?", (url_key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url_key,
+                    response.status_code,
+                    body_hash,
+                    json.dumps(headers),
+                    now,
+                    now,
+                    len(content),
+                ),
+            )
+            self._db.commit()
+            self._total_bytes += len(content) - (previous[0] if previous else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        return CachedResponse(
+            response.url, response.status_code, content, headers, now, False
+        )
+
+    def _touch(self, url_key, refreshed=False):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._db.execute(
+                    "UPDATE entries SET fetched_at = ?, last_access = ? WHERE url_key = ?",
+                    (now, now, url_key),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE entries SET last_access = ? WHERE url_key = ?",
+                    (now, url_key),
+                )
+            self._db.commit()
+        return now
+
+    def _evict(self):
+        """Drops least recently used entries until the size budget is met"""
+        with self._lock:
+            # Recount, other processes may share the same cache folder
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries")
+            total = total.fetchone()[0]
+            if total <= self.max_bytes:
+                self._total_bytes = total
+                return
+
+            victims = self._db.execute(
+                "SELECT url_key, body_hash, size FROM entries ORDER BY last_access"
+            )
+            dropped = []
+            for url_key, body_hash, size in victims:
+                if total <= self.max_bytes:
+                    break
+                dropped.append((url_key, body_hash))
+                total -= size
+
+            for url_key, body_hash in dropped:
+                self._db.execute("DELETE FROM entries WHERE url_key = ?", (url_key,))
+                still_used = self._db.execute(
+                    "SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)
+                ).fetchone()
+                if not still_used:
+                    try:
+                        os.remove(self._body_path(body_hash))
+                    except OSError:
+                        pass
+            self._db.commit()
+            self._total_bytes = total
+
+    # ---- public API ----
+
+    def has(self, url):
+        """True when url has an entry (fresh or not), without reading the body"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM entries WHERE url_key = ?", (canonicalize_url(url),)
+            ).fetchone()
+        return row is not None
+
+    def lookup(self, url, fresh_only=False):
+        """
+        Returns the cached response for url without any network call.
+
+        Args:
+            url (str): URL to look up
+            fresh_only (bool): Return None for entries older than the TTL
+        """
+        cached = self._load(canonicalize_url(url))
+        if fresh_only and cached is not None:
+            if time.time() - cached.fetched_at >= self.ttl:
+                return None
+        return cached
+
+    def get(self, url, headers=None, timeout=10, session=None):
+        """
+        Fetches a URL through the cache.
+
+        Args:
+            url (str): URL to fetch
+            headers (dict): Request headers
+            timeout (float): Timeout in seconds for the network request
+            session (requests.Session): Optional session to reuse connections
+
+        Returns:
+            CachedResponse: Response with a from_cache flag
+        """
+        url_key = canonicalize_url(url)
+        cached = self._load(url_key)
+
+        if cached is not None and time.time() - cached.fetched_at < self.ttl:
+            self._touch(url_key)
+            self.hits += 1
+            return cached
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            # Stale entry: ask the server whether our copy is still valid
+            if "etag" in cached.headers:
+                request_headers["If-None-Match"] = cached.headers["etag"]
+            if "last-modified" in cached.headers:
+                request_headers["If-Modified-Since"] = cached.headers["last-modified"]
+            elif "etag" not in cached.headers:
+                request_headers["If-Modified-Since"] = formatdate(
+                    cached.fetched_at, usegmt=True
+                )
+
+        http = session or requests
+        response = http.get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and cached is not None:
+            cached.fetched_at = self._touch(url_key, refreshed=True)
+            self.revalidated += 1
+            return cached
+
+        self.misses += 1
+        if response.status_code in CACHEABLE_STATUS:
+            return self._store(url_key, response)
+
+        return CachedResponse(
+            response.url,
+            response.status_code,
+            response.content,
+            dict(response.headers),
+            time.time(),
+            False,
+        )
+
+    def report(self):
+        print(
+            f"🗄️ HTTP cache: {self.hits} hits, {self.revalidated} revalidated, "
+            f"{self.misses} downloaded"
+        )
+
+
+_shared_caches = {}
+
+
+def get_shared_cache(cache_dir=DEFAULT_CACHE_DIR):
+    """Returns one HttpCache per folder so every stage in a process shares it"""
+    if cache_dir not in _shared_caches:
+        _shared_caches[cache_dir] = HttpCache(cache_dir)
+    return _shared_caches[cache_dir]
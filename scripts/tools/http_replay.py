@@ -0,0 +1,406 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from url_tools import canonicalize_url
+
+# Set one of these to record or replay every request of a process
+# (requests and Playwright alike), see install_from_env
+RECORD_ARCHIVE_ENV = "HTTP_RECORD_ARCHIVE"
+REPLAY_SERVER_ENV = "HTTP_REPLAY_SERVER"
+
+# Carries the real URL of a request sent to the replay server
+URL_HEADER = "X-Replay-Url"
+
+# Headers that describe the original transfer, not the stored body
+# (requests and Playwright hand us bodies already decoded)
+TRANSFER_HEADERS = {
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+    "connection",
+    "keep-alive",
+}
+
+
+class ReplayArchive:
+    """
+    Recorded HTTP responses in one SQLite file, keyed by (method, canonical URL).
+
+    A URL requested several times while recording keeps its latest answer.
+
+    Args:
+        path (str): SQLite file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                method TEXT,
+                url_key TEXT,
+                url TEXT,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                recorded_at REAL,
+                PRIMARY KEY (method, url_key)
+            )""")
+        self._db.commit()
+
+    def record(self, method, url, status, headers, body):
+        headers = {
+            name.lower(): value
+            for name, value in dict(headers).items()
+            if name.lower() not in TRANSFER_HEADERS
+        }
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    method.upper(),
+                    canonicalize_url(url),
+                    url,
+                    status,
+                    json.dumps(headers),
+                    sqlite3.Binary(body or b""),
+                    time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def lookup(self, method, url):
+        """
+        Returns:
+            tuple: (status, headers dict, body bytes), or None if not recorded
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, body FROM responses "
+                "WHERE method = ? AND url_key = ?",
+                (method.upper(), canonicalize_url(url)),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), bytes(row[2])
+
+    def counts(self):
+        """Recorded responses per host"""
+        with self._lock:
+            urls = [url for (url,) in self._db.execute("SELECT url FROM responses")]
+        hosts = {}
+        for url in urls:
+            host = urlparse(url).netloc
+            hosts[host] = hosts.get(host, 0) + 1
+        return hosts
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+class ReplayStats:
+    """Counters of a ReplayServer"""
+
+    def __init__(self):
+        self.requests = 0
+        self.misses = 0
+        self.errors_injected = 0
+
+    def snapshot(self):
+        return dict(vars(self))
+
+
+class ReplayServer:
+    """
+    Local HTTP server answering requests from a ReplayArchive.
+
+    Clients send the real URL in the X-Replay-Url header (the hooks below do
+    that for requests and Playwright). Every answer can be delayed, and a
+    share of them replaced by an error, to rehearse slow or flaky sites.
+    URLs missing from the archive get a 404.
+
+    Args:
+        archive (ReplayArchive): Responses to serve
+        port (int): Port to listen on, 0 for any free port
+        latency (float): Seconds added to every answer
+        jitter (float): Up to this many extra seconds, at random
+        error_rate (float): Share of requests answered with error_status
+        error_status (int): Status of the injected errors
+        seed (int): Seed of the jitter and error draws
+    """
+
+    def __init__(
+        self,
+        archive,
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_status=503,
+        seed=0,
+    ):
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stats = ReplayStats()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _draw(self):
+        """Delay and whether to inject an error for one request"""
+        with self._lock:
+            self.stats.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+            self.stats.errors_injected += fail
+        return delay, fail
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _answer(self, send_body=True):
+                delay, fail = server._draw()
+                if delay:
+                    time.sleep(delay)
+
+                url = self.headers.get(URL_HEADER, self.path)
+                entry = None if fail else server.archive.lookup(self.command, url)
+                if entry is None and not fail and self.command == "HEAD":
+                    entry = server.archive.lookup("GET", url)
+                if fail:
+                    status, headers, body = server.error_status, {}, b""
+                elif entry is None:
+                    with server._lock:
+                        server.stats.misses += 1
+                    status, headers, body = 404, {"x-replay": "miss"}, b""
+                else:
+                    status, headers, body = entry
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                self._answer()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self._answer()
+
+            def do_HEAD(self):
+                self._answer(send_body=False)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---- hooks ----
+
+_original_send = HTTPAdapter.send
+_archive = None
+_server_url = None
+
+
+def _recording_send(self, request, **kwargs):
+    response = _original_send(self, request, **kwargs)
+    if response.status_code == 304:
+        return response  # Keep the full answer recorded earlier
+    # Reads the whole body; streamed callers then iterate over the copy
+    _archive.record(
+        request.method,
+        request.url,
+        response.status_code,
+        response.headers,
+        response.content,
+    )
+    return response
+
+
+def _replaying_send(self, request, **kwargs):
+    kwargs["proxies"] = {}  # The replay server is local
+    if request.url.startswith(_server_url):
+        return _original_send(self, request, **kwargs)
+    original = request
+    request = request.copy()
+    request.url = f"{_server_url}/"
+    request.headers[URL_HEADER] = original.url
+    response = _original_send(self, request, **kwargs)
+    # Redirects, cookies and logging keep seeing the real URL
+    response.url = original.url
+    response.request = original
+    return response
+
+
+def install(record_archive=None, replay_server=None):
+    """
+    Routes every requests call of this process through the archive.
+
+    Args:
+        record_archive (str): Record real responses into this archive file
+        replay_server (str): Answer every request from this ReplayServer URL
+    """
+    global _archive, _server_url
+    if record_archive:
+        _archive = ReplayArchive(record_archive)
+        HTTPAdapter.send = _recording_send
+    elif replay_server:
+        _server_url = replay_server.rstrip("/")
+        HTTPAdapter.send = _replaying_send
+
+
+def install_from_env():
+    """Calls install() with HTTP_RECORD_ARCHIVE / HTTP_REPLAY_SERVER, once"""
+    if _archive is None and _server_url is None:
+        install(os.environ.get(RECORD_ARCHIVE_ENV), os.environ.get(REPLAY_SERVER_ENV))
+
+
+def active():
+    return _archive is not None or _server_url is not None
+
+
+def _replayed(request):
+    response = requests.request(
+        request.method,
+        f"{_server_url}/",
+        headers={URL_HEADER: request.url},
+        data=request.post_data_buffer,
+        allow_redirects=False,
+        timeout=60,
+    )
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower() not in TRANSFER_HEADERS
+    }
+    return {
+        "status": response.status_code,
+        "headers": headers,
+        "body": response.content,
+    }
+
+
+def route_sync(route, request):
+    """
+    Answers a Playwright route from the archive (sync API).
+
+    Returns:
+        bool: False when neither recording nor replaying, so the caller
+        lets the request through as usual
+    """
+    if _server_url is not None:
+        route.fulfill(**_replayed(request))
+    elif _archive is not None:
+        response = route.fetch()
+        body = response.body()
+        _archive.record(
+            request.method, request.url, response.status, response.headers, body
+        )
+        route.fulfill(response=response, body=body)
+    else:
+        return False
+    return True
+
+
+async def route_async(route, request):
+    """Async version of route_sync"""
+    if _server_url is not None:
+        await route.fulfill(**await asyncio.to_thread(_replayed, request))
+    elif _archive is not None:
+        response = await route.fetch()
+        body = await response.body()
+        _archive.record(
+            request.method, request.url, response.status, response.headers, body
+        )
+        await route.fulfill(response=response, body=body)
+    else:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    # Usage: python http_replay.py info ARCHIVE
+    #        python http_replay.py serve ARCHIVE --port 8765 --latency 0.2
+    # then run any script with HTTP_REPLAY_SERVER=http://127.0.0.1:8765
+    parser = argparse.ArgumentParser(description="Inspect or serve an HTTP archive.")
+    parser.add_argument("command", choices=["info", "serve"])
+    parser.add_argument("archive")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    archive = ReplayArchive(args.archive)
+    if args.command == "info":
+        hosts = archive.counts()
+        print(f"{len(archive)} responses from {len(hosts)} hosts")
+        for host, count in sorted(hosts.items(), key=lambda item: -item[1])[:20]:
+            print(f"{count:>8}  {host}")
+    else:
+        server = ReplayServer(
+            archive,
+            args.port,
+            args.latency,
+            args.jitter,
+            args.error_rate,
+            args.error_status,
+        )
+        print(f"🔄 Replaying {len(archive)} responses on {server.url} (Ctrl+C to stop)")
+        server.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+            print(f"Served {server.stats.snapshot()}")
@@ -0,0 +1,132 @@
+import re
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Lowercases, spells out umlauts and collapses whitespace runs to one space"""
+    # casefold() already turns "ß" into "ss"; umlauts are spelled out so that
+    # "Anwälte" and "Anwaelte" are the same word (str.replace is much
+    # faster than str.translate on large pages)
+    text = text.casefold().replace("ä", "ae").replace("ö", "oe").replace("ü", "ue")
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class ScanResult:
+    """Keyword hits of one document, grouped by category"""
+
+    def __init__(self, categories):
+        self.categories = dict.fromkeys(categories, 0)
+        self.keywords = {}
+
+    def add(self, category, keyword):
+        self.categories[category] += 1
+        self.keywords[keyword] = self.keywords.get(keyword, 0) + 1
+
+    def has(self, category):
+        return self.categories.get(category, 0) > 0
+
+    def any(self):
+        return any(self.categories.values())
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword matcher built once from keyword tables.
+
+    All keywords go into one trie. A single regex compiled from that trie
+    finds the positions where a keyword starts in one pass over the text (in
+    C, so the cost barely grows with the number of keywords), and the trie is
+    then walked from each of those positions, so overlapping and nested
+    keywords are all reported like Aho-Corasick would.
+
+    Keywords and texts are normalized with normalize_text().
+
+    Args:
+        categories (dict): {category: [keywords]}
+        whole_words (bool or set): Categories whose keywords must match whole
+            words (True for all). Other categories match inside words, which
+            German compounds like "Anwaltskanzlei" need.
+    """
+
+    def __init__(self, categories, whole_words=()):
+        self.category_names = list(categories)
+        self._trie = {}
+
+        for category, keywords in categories.items():
+            whole = whole_words is True or category in whole_words
+            for keyword in keywords:
+                normalized = normalize_text(keyword).strip()
+                if not normalized:
+                    continue
+                node = self._trie
+                for char in normalized:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append((category, keyword, whole))
+
+        self._starts = re.compile(f"(?={self._trie_pattern(self._trie)})")
+
+    @classmethod
+    def _trie_pattern(cls, node):
+        """Regex matching every keyword below node, with shared prefixes factored"""
+        branches = [
+            re.escape(char) + cls._trie_pattern(child)
+            for char, child in sorted((k, v) for k, v in node.items() if k is not None)
+        ]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if None in node:
+            # A keyword also ends here, the rest is optional
+            pattern = f"(?:{pattern})?"
+        return pattern
+
+    def _hits_at(self, text, start):
+        """Yields (category, keyword) for every keyword starting at text[start]"""
+        node = self._trie
+        index = start
+        while True:
+            for category, keyword, whole in node.get(None, ()):
+                if whole and (
+                    (start > 0 and _is_word_char(text[start - 1]))
+                    or (index < len(text) and _is_word_char(text[index]))
+                ):
+                    continue
+                yield category, keyword
+            if index >= len(text) or text[index] not in node:
+                return
+            node = node[text[index]]
+            index += 1
+
+    def scan(self, text, normalized=False):
+        """
+        Scans a document once and counts every keyword hit.
+
+        Args:
+            text (str): Document text
+            normalized (bool): Set when text already went through normalize_text()
+
+        Returns:
+            ScanResult: Counts per category and per keyword
+        """
+        if not normalized:
+            text = normalize_text(text)
+        result = ScanResult(self.category_names)
+        for match in self._starts.finditer(text):
+            for category, keyword in self._hits_at(text, match.start()):
+                result.add(category, keyword)
+        return result
+
+    def contains(self, text, category=None, normalized=False):
+        """Stops at the first hit (of the given category, or of any category)"""
+        if not normalized:
+            text = normalize_text(text)
+        for match in self._starts.finditer(text):
+            for hit_category, _ in self._hits_at(text, match.start()):
+                if category is None or hit_category == category:
+                    return True
+        return False
@@ -1,35 +1,162 @@
+import argparse
 import csv
+import glob
 import os
+from concurrent.futures import ProcessPoolExecutor
 
+BUFFER_SIZE = 1024**2  # Bytes buffered on each side of the rewrite
+OUTPUT_SUFFIX = "_with_spaces"
 
-def add_space_after_commas(input_file, output_file):
-    try:
-        with open(input_file, "r", newline="", encoding="utf-8") as f_in:
-            reader = csv.reader(f_in)
-            modified_lines = []
 
-            for row in reader:
-                modified_line = ", ".join(row)
-                modified_lines.append(modified_line)
+def add_space_after_commas(input_file, output_file, buffer_size=BUFFER_SIZE):
+    """
+    Rewrites a CSV with ", " between the fields, one row at a time.
+
+    Rows are streamed from the input to a temporary file next to the output,
+    which replaces the output once complete, so memory stays the same for
+    any file size and a failed run never leaves a truncated file behind.
 
-        with open(output_file, "w", encoding="utf-8") as f_out:
-            for line in modified_lines:
-                f_out.write(line + "\n")
+    Args:
+        input_file (str): CSV file to read
+        output_file (str): File to write (may be the input file itself)
+        buffer_size (int): Read and write buffer in bytes
 
-        print(f"✅ File successfully saved as '{output_file}'.")
+    Returns:
+        int: Rows written, or None if the file could not be converted
+    """
+    tmp_path = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        rows = 0
+        with open(
+            input_file, "r", newline="", encoding="utf-8", buffering=buffer_size
+        ) as f_in, open(
+            tmp_path, "w", encoding="utf-8", buffering=buffer_size
+        ) as f_out:
+            for row in csv.reader(f_in):
+                f_out.write(", ".join(row) + "\n")
+                rows += 1
+        os.replace(tmp_path, output_file)
+
+        print(f"✅ File successfully saved as '{output_file}' ({rows} rows).")
+        return rows
 
     except FileNotFoundError:
         print(f"❌ Error: The file '{input_file}' does not exist.")
     except Exception as e:
-        print(f"⚠️ An error occurred: {e}")
+        print(f"⚠️ An error occurred with '{input_file}': {e}")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return None
+
+
+def output_path_for(input_file, output_dir=None, suffix=OUTPUT_SUFFIX):
+    """data.csv -> data_with_spaces.csv (in output_dir if given)"""
+    base, extension = os.path.splitext(os.path.basename(input_file))
+    folder = output_dir or os.path.dirname(input_file)
+    return os.path.join(folder, f"{base}{suffix}{extension or '.csv'}")
+
+
+def expand_inputs(patterns):
+    """Files matching the given paths or glob patterns, each once, in order"""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        files.extend(matches)
+    return list(dict.fromkeys(files))
+
+
+def add_space_after_commas_batch(jobs, workers=None, buffer_size=BUFFER_SIZE):
+    """
+    Converts several files, in parallel across a process pool.
+
+    Args:
+        jobs (list): (input_file, output_file) pairs
+        workers (int): Processes (None: one per CPU, capped at the job count)
+        buffer_size (int): Read and write buffer in bytes of each job
+
+    Returns:
+        dict: {input_file: rows written, or None on error}
+    """
+    if len(jobs) == 1 or workers == 1:
+        return {
+            input_file: add_space_after_commas(input_file, output_file, buffer_size)
+            for input_file, output_file in jobs
+        }
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            input_file: pool.submit(
+                add_space_after_commas, input_file, output_file, buffer_size
+            )
+            for input_file, output_file in jobs
+        }
+        return {input_file: future.result() for input_file, future in futures.items()}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Rewrite CSV files with a space after each field separator."
+    )
+    parser.add_argument(
+        "inputs", nargs="*", help="CSV files or glob patterns (e.g. 'data/*.csv')"
+    )
+    parser.add_argument(
+        "-o", "--output", help="Output file (only with a single input file)"
+    )
+    parser.add_argument("--output-dir", help="Folder for the output files")
+    parser.add_argument(
+        "--suffix",
+        default=OUTPUT_SUFFIX,
+        help=f"Added to each output file name (default: {OUTPUT_SUFFIX})",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Parallel processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--buffer-size", type=int, default=BUFFER_SIZE, help="I/O buffer in bytes"
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    input_path = input(
-        " Enter the name of the input CSV file (e.g. data.csv): "
-    ).strip()
-    output_path = input(
-        " Enter the name of the output file (e.g. data_with_spaces.csv): "
-    ).strip()
-
-    add_space_after_commas(input_path, output_path)
+    # Usage: python put_space_after_comma.py "data/*.csv" --output-dir out
+    # Without arguments the file names are asked for, as before
+    args = parse_args()
+
+    if args.inputs:
+        files = expand_inputs(args.inputs)
+        if not args.output:
+            # Don't convert again the outputs of an earlier run
+            files = [
+                f for f in files if not os.path.splitext(f)[0].endswith(args.suffix)
+            ]
+        if args.output and len(files) > 1:
+            raise SystemExit("❌ --output only works with a single input file")
+        if not files:
+            raise SystemExit("❌ No input files to convert")
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+        jobs = [
+            (
+                input_file,
+                args.output
+                or output_path_for(input_file, args.output_dir, args.suffix),
+            )
+            for input_file in files
+        ]
+    else:
+        input_path = input(
+            " Enter the name of the input CSV file (e.g. data.csv): "
+        ).strip()
+        output_path = input(
+            " Enter the name of the output file (e.g. data_with_spaces.csv): "
+        ).strip()
+        jobs = [(input_path, output_path)]
+
+    results = add_space_after_commas_batch(jobs, args.workers, args.buffer_size)
+    failed = [name for name, rows in results.items() if rows is None]
+    if len(jobs) > 1:
+        print(f"\n✅ {len(jobs) - len(failed)} of {len(jobs)} files converted.")
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,115 @@
+import time
+
+from table_io import read_table, resolve_table, write_table
+
+# Cell values that mean "not looked up yet" (dom_extract writes "N/A",
+# the hg.org bot "Error")
+EMPTY_VALUES = {"", "n/a", "error", "nan", "none"}
+
+# Written when a lookup found nothing, so a re-run does not repeat it
+NOT_FOUND = "not found"
+
+CHECKPOINT_EVERY = 25  # Rows looked up between two saves of the table
+
+
+def needs_lookup(value, retry_not_found=False):
+    """True if a cell is still empty (or "not found" and those are retried)"""
+    value = "" if value is None else str(value).strip().lower()
+    return value in EMPTY_VALUES or (retry_not_found and value == NOT_FOUND)
+
+
+def enrich_table(
+    path,
+    columns,
+    lookup_rows,
+    checkpoint_every=CHECKPOINT_EVERY,
+    retry_not_found=False,
+):
+    """
+    Fills some columns of a table in place and resumably, a chunk at a time.
+
+    Rows whose columns already have values are skipped, and the table is
+    saved (atomically, see table_io.write_table) after every chunk of
+    checkpoint_every rows and when the run stops, even on Ctrl+C or an
+    error. A run that dies at row 9,000 loses at most one chunk, and the
+    next run carries on where it stopped.
+
+    Args:
+        path (str): Table to enrich (CSV, Parquet or Feather)
+        columns (list): Columns to fill, added if missing
+        lookup_rows (callable): lookup_rows([(row, columns to fill), ...])
+            -> one {column: value} dict per row; "" when nothing was found
+            (stored as NOT_FOUND) or None on errors (retried next run)
+        checkpoint_every (int): Rows per chunk, between two saves
+        retry_not_found (bool): Look up the NOT_FOUND cells again
+
+    Returns:
+        pandas.DataFrame: The enriched table
+    """
+    path = resolve_table(path)
+    df = read_table(path, dtype=str, keep_default_na=False).fillna("")
+    for column in columns:
+        if column not in df.columns:
+            df[column] = ""
+
+    def missing(index):
+        return [
+            column
+            for column in columns
+            if needs_lookup(df.at[index, column], retry_not_found)
+        ]
+
+    todo = [index for index in df.index if missing(index)]
+    print(f"🔄 {len(todo)} of {len(df)} rows still need {', '.join(columns)}")
+
+    started = time.perf_counter()
+    filled = found = 0
+    try:
+        for start in range(0, len(todo), checkpoint_every):
+            chunk = [
+                (index, missing(index))
+                for index in todo[start : start + checkpoint_every]
+            ]
+            results = lookup_rows([(df.loc[index], needed) for index, needed in chunk])
+            for (index, needed), values in zip(chunk, results):
+                for column in needed:
+                    value = values.get(column)
+                    if value is None:
+                        continue
+                    df.at[index, column] = value or NOT_FOUND
+                    filled += 1
+                    found += bool(value)
+            write_table(df, path)
+            print(
+                f"💾 Checkpoint: {min(start + checkpoint_every, len(todo))}/"
+                f"{len(todo)} rows saved to {path}"
+            )
+    finally:
+        write_table(df, path)
+        print(
+            f"⏱️ {filled} values filled ({found} found) in "
+            f"{time.perf_counter() - started:.0f}s, saved to {path}"
+        )
+    return df
+
+
+def enrich_table_column(
+    path,
+    column,
+    lookup,
+    checkpoint_every=CHECKPOINT_EVERY,
+    retry_not_found=False,
+):
+    """
+    Same as enrich_table for a single column, looked up row by row.
+
+    Args:
+        lookup (callable): lookup(row) -> value, "" or None (see enrich_table)
+    """
+    return enrich_table(
+        path,
+        [column],
+        lambda rows: [{column: lookup(row)} for row, _ in rows],
+        checkpoint_every,
+        retry_not_found,
+    )
@@ -0,0 +1,282 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from async_fetcher import make_thread_sessions
+from html_document import parse_html
+
+DEFAULT_SEARCH_CACHE = os.environ.get("SEARCH_CACHE_PATH", ".search_cache.sqlite")
+DEFAULT_TTL = 30 * 24 * 3600  # Search results are reused for a month
+EMPTY_TTL = 7 * 24 * 3600  # "Nothing found" is retried sooner
+
+DUCKDUCKGO_URL = "https://html.duckduckgo.com/html/?q={query}"
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)",
+    "Mozilla/5.0 (X11; Linux x86_64)",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X)",
+]
+
+# Answers that mean "slow down" (DuckDuckGo sends 202 with a captcha page)
+THROTTLE_STATUS = {202, 403, 429}
+
+
+def normalize_query(query):
+    """Same cache key for queries that only differ in case or spacing"""
+    return " ".join(query.lower().split())
+
+
+class SearchResultCache:
+    """
+    Persistent query -> first result cache in SQLite.
+
+    Empty results are kept too (for empty_ttl), so a firm nothing was found
+    for is not searched again on every run. Errors are never stored.
+
+    Args:
+        path (str): SQLite file
+        ttl (float): Seconds a result is reused
+        empty_ttl (float): Seconds an empty result is reused
+    """
+
+    def __init__(self, path=DEFAULT_SEARCH_CACHE, ttl=DEFAULT_TTL, empty_ttl=EMPTY_TTL):
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+                engine TEXT,
+                query TEXT,
+                result TEXT,
+                fetched_at REAL,
+                PRIMARY KEY (engine, query)
+            )""")
+        self._db.commit()
+
+    def get(self, engine, query):
+        """Cached result ("" when nothing was found), or None if missing/stale"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, fetched_at FROM results WHERE engine = ? AND query = ?",
+                (engine, normalize_query(query)),
+            ).fetchone()
+        if row is not None:
+            result, fetched_at = row
+            if time.time() - fetched_at < (self.ttl if result else self.empty_ttl):
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, engine, query, result):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (engine, normalize_query(query), result, time.time()),
+            )
+            self._db.commit()
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose rate adapts to the server (AIMD).
+
+    Every healthy answer adds increase requests/second to the rate, every
+    throttling answer (429/403/captcha) halves it and pauses all callers, so
+    the rate settles just under what the search engine tolerates.
+
+    Args:
+        rate (float): Starting requests per second
+        min_rate (float): Lowest rate after backoffs
+        max_rate (float): Highest rate reached by speeding up
+        burst (int): Requests that may go out back to back
+        increase (float): Rate added after each healthy answer
+    """
+
+    def __init__(self, rate=0.5, min_rate=0.05, max_rate=2.0, burst=2, increase=0.02):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.throttled = 0
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            # Some jitter so parallel callers don't wake up together
+            time.sleep(wait * random.uniform(1.0, 1.2))
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """Halves the rate and pauses every caller (Retry-After if given)"""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._tokens = 0.0
+
+
+def duckduckgo_result_url(link):
+    """Real target of a DuckDuckGo result link (they redirect through uddg=)"""
+    query_params = parse_qs(urlparse(link).query)
+    if "uddg" in query_params:
+        return unquote(query_params["uddg"][0])
+    return link
+
+
+class SearchLookup:
+    """
+    First DuckDuckGo result for queries, shared by the browser bots.
+
+    Results come from the persistent cache when possible; the rest go out
+    through one keep-alive session per thread, paced by the adaptive limiter.
+
+    Args:
+        cache (SearchResultCache): Defaults to the shared cache file
+        limiter (AdaptiveRateLimiter): Defaults to a new limiter
+        timeout (float): Timeout in seconds of each request
+        max_retries (int): Attempts per query after a throttling answer
+    """
+
+    engine = "duckduckgo"
+
+    def __init__(self, cache=None, limiter=None, timeout=15, max_retries=3):
+        self.cache = cache or SearchResultCache()
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.errors = 0
+        self._get_session = make_thread_sessions()
+
+    def first_result(self, query):
+        """
+        Returns:
+            str: URL of the first result, "" if there is none, or None on
+            errors (not cached, so the query is tried again next time)
+        """
+        cached = self.cache.get(self.engine, query)
+        if cached is not None:
+            return cached
+
+        url = DUCKDUCKGO_URL.format(query=quote(query))
+        for _ in range(self.max_retries):
+            self.limiter.acquire()
+            try:
+                response = self._get_session().get(
+                    url,
+                    headers={"User-Agent": random.choice(USER_AGENTS)},
+                    timeout=self.timeout,
+                )
+            except Exception as e:
+                print(f"Error searching '{query}': {e}")
+                self.errors += 1
+                return None
+
+            if response.status_code in THROTTLE_STATUS:
+                retry_after = response.headers.get("Retry-After", "")
+                print(f"⚠️ Throttled ({response.status_code}), slowing down")
+                self.limiter.on_throttle(
+                    float(retry_after) if retry_after.isdigit() else None
+                )
+                continue
+            if response.status_code != 200:
+                print(f"Error searching '{query}': HTTP {response.status_code}")
+                self.errors += 1
+                return None
+
+            self.limiter.on_success()
+            try:
+                results = parse_html(response.text).select("a.result__a")
+                hrefs = [link.get("href") for link in results]
+                href = next((href for href in hrefs if href), None)
+                result = duckduckgo_result_url(href) if href else ""
+            except Exception as e:
+                print(f"Error reading the results of '{query}': {e}")
+                self.errors += 1
+                return None
+            self.cache.put(self.engine, query, result)
+            return result
+
+        self.errors += 1
+        return None
+
+    def lookup_many(self, queries, max_workers=4):
+        """
+        First results of many queries; each distinct query is searched once.
+
+        Returns:
+            dict: {query: result}, with the same values as first_result()
+        """
+        distinct = list(dict.fromkeys(queries))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return dict(zip(distinct, pool.map(self.first_result, distinct)))
+
+    def lookup_templates(self, firms, templates, max_workers=4):
+        """
+        Searches several query templates per firm in one pass.
+
+        Args:
+            firms (list): (firm name, columns wanted) pairs
+            templates (dict): {column: template}, like
+                {"linkedin": "Linkedin {name}", "Website": "{name} website"}
+
+        Returns:
+            list: One {column: result} dict per firm
+        """
+        queries = [
+            {column: templates[column].format(name=name) for column in columns}
+            for name, columns in firms
+        ]
+        results = self.lookup_many(
+            [query for firm in queries for query in firm.values()], max_workers
+        )
+        return [
+            {column: results[query] for column, query in firm.items()}
+            for firm in queries
+        ]
+
+    def report(self):
+        print(
+            f"🔎 Searches: {self.cache.hits} from cache, {self.cache.misses} sent, "
+            f"{self.errors} failed, throttled {self.limiter.throttled} times "
+            f"(rate now {self.limiter.rate:.2f}/s)"
+        )
+
+
+_shared_lookup = None
+
+
+def get_search_lookup():
+    """Returns the process-wide SearchLookup so every bot shares its limiter"""
+    global _shared_lookup
+    if _shared_lookup is None:
+        _shared_lookup = SearchLookup()
+    return _shared_lookup
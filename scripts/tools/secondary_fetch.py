@@ -0,0 +1,190 @@
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from urllib.parse import urljoin
+
+from async_fetcher import make_session_fetcher
+from contact_extractor import extract_contacts
+from html_document import parse_html
+from http_cache import get_shared_cache
+from url_tools import registrable_domain
+
+# Links that lead to the legal notice or to the contact page of a site
+SECONDARY_LINK_PATTERNS = {
+    "impressum": re.compile(r"impressum|imprint", re.IGNORECASE),
+    "contact": re.compile(r"contact|contacto|kontakt", re.IGNORECASE),
+}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "de-DE,de;q=0.9,en;q=0.8",
+}
+
+
+def find_secondary_link(page_url, hrefs, kind):
+    """
+    First link of the given kind ("impressum" or "contact") on a page.
+
+    Args:
+        page_url (str): URL of the page, to resolve relative links
+        hrefs (list): Link targets of the page (HtmlDocument.hrefs())
+        kind (str): Key of SECONDARY_LINK_PATTERNS
+
+    Returns:
+        str: Absolute URL, or None
+    """
+    pattern = SECONDARY_LINK_PATTERNS[kind]
+    for href in hrefs:
+        if pattern.search(href) and not href.startswith(("mailto:", "tel:")):
+            return urljoin(page_url, href)
+    return None
+
+
+class SecondaryPage:
+    """Impressum or contact page of a site, reduced to what the stages use"""
+
+    def __init__(self, url, html):
+        self.url = url
+        self.text = parse_html(html).text(separator="\n", strip=True)
+        self.contacts = extract_contacts(html, self.text)
+
+
+class SecondaryFetcher:
+    """
+    Follow-up fetches (Impressum, contact page) shared by every page of a site.
+
+    The first request for a (registrable domain, kind) pair schedules the
+    download on a small thread pool and every later request, from any thread,
+    gets the same future, so a domain's Impressum is downloaded at most once
+    per run (and read from the HTTP cache across runs). Failures are
+    remembered too, so a slow or broken host costs one timeout, not one per
+    URL. The pool is separate from the primary fetches, so follow-ups run
+    alongside them without taking their slots.
+
+    Args:
+        max_workers (int): Follow-up downloads running at the same time
+        timeout (float): Timeout in seconds of each HTTP request
+        wait_timeout (float): Seconds a caller waits for a result before
+            giving up on it (the download itself keeps its own timeout)
+        headers (dict): Request headers
+        cache (HttpCache): Response cache, defaults to the shared one
+    """
+
+    def __init__(
+        self, max_workers=8, timeout=10, wait_timeout=20, headers=None, cache=None
+    ):
+        self.timeout = timeout
+        self.wait_timeout = wait_timeout
+        self._fetch = make_session_fetcher(
+            headers=headers or DEFAULT_HEADERS,
+            timeout=timeout,
+            cache=cache or get_shared_cache(),
+        )
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="secondary"
+        )
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.fetched = 0
+        self.reused = 0
+        self.failed = 0
+
+    def _download(self, link_url):
+        try:
+            response = self._fetch(link_url)
+            if response.status_code != 200:
+                raise ValueError(f"status code {response.status_code}")
+            return SecondaryPage(link_url, response.text)
+        except Exception as e:
+            print(f"Secondary fetch failed for {link_url}: {e}")
+            with self._lock:
+                self.failed += 1
+            return None
+
+    def submit(self, page_url, link_url, kind):
+        """
+        Schedules the follow-up page of page_url's site (once per domain).
+
+        Args:
+            page_url (str): Page the link was found on
+            link_url (str): Absolute URL of the follow-up page
+            kind (str): "impressum" or "contact"
+
+        Returns:
+            concurrent.futures.Future: Resolves to a SecondaryPage or None
+        """
+        key = (registrable_domain(page_url), kind)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self.reused += 1
+                return future
+            self.fetched += 1
+            future = self._futures[key] = self._pool.submit(self._download, link_url)
+            return future
+
+    def prefetch(self, page_url, hrefs, kinds=("impressum",)):
+        """Schedules the follow-up pages linked from a page without waiting"""
+        futures = {}
+        for kind in kinds:
+            link_url = find_secondary_link(page_url, hrefs, kind)
+            if link_url:
+                futures[kind] = self.submit(page_url, link_url, kind)
+        return futures
+
+    def wait(self, future):
+        """
+        Waits at most wait_timeout seconds for a submitted page.
+
+        Returns:
+            SecondaryPage: The page, or None if it failed or is still loading
+        """
+        try:
+            return future.result(self.wait_timeout)
+        except FutureTimeoutError:
+            print(f"Secondary fetch still running after {self.wait_timeout}s")
+            return None
+
+    async def wait_async(self, future):
+        """Same as wait() for asyncio code, without blocking the event loop"""
+        try:
+            # shield: a caller giving up must not cancel the download others share
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), self.wait_timeout
+            )
+        except asyncio.TimeoutError:
+            print(f"Secondary fetch still running after {self.wait_timeout}s")
+            return None
+
+    def get(self, page_url, link_url, kind):
+        """Same as submit(), but waits for the page (see wait())"""
+        return self.wait(self.submit(page_url, link_url, kind))
+
+    def get_linked(self, page_url, hrefs, kind):
+        """Finds the link of the given kind on a page and gets it, or None"""
+        link_url = find_secondary_link(page_url, hrefs, kind)
+        return self.get(page_url, link_url, kind) if link_url else None
+
+    def report(self):
+        print(
+            f"🔗 Secondary pages: {self.fetched} fetched, {self.reused} reused "
+            f"from other pages of the same site, {self.failed} failed"
+        )
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_fetcher = None
+_shared_fetcher_lock = threading.Lock()
+
+
+def get_secondary_fetcher():
+    """Returns the process-wide SecondaryFetcher so every stage shares its memo"""
+    global _shared_fetcher
+    with _shared_fetcher_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = SecondaryFetcher()
+        return _shared_fetcher
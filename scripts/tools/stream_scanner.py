@@ -0,0 +1,243 @@
+import codecs
+import html
+import re
+
+import requests
+
+from http_cache import detect_encoding
+
+DEFAULT_MAX_BYTES = 2 * 1024**2  # Stop reading a page after 2 MB
+DEFAULT_CHUNK_SIZE = 16 * 1024
+DEFAULT_OVERLAP = 256  # Characters kept between windows (longer than any keyword)
+
+# Elements whose content is code, not text
+SKIPPED_TAGS = ("script", "style")
+
+TAG_NAME_PATTERN = re.compile(r"</?([a-zA-Z][\w:-]*)")
+# A whole tag; a ">" inside a quoted attribute value does not end it
+TAG_PATTERN = re.compile(r"<(?:[^>\"']|\"[^\"]*\"|'[^']*')*>")
+MAX_TAG_LENGTH = 8192  # Longer tags with unbalanced quotes end at the first ">"
+
+
+class HtmlTextScanner:
+    """
+    Incremental tag stripper: takes the decoded HTML in chunks of any size
+    and returns the visible text nodes as soon as they are complete.
+
+    Tags, comments and the content of script/style elements are dropped and
+    entities are decoded, so for well-formed HTML joining the nodes with " "
+    gives the same text as BeautifulSoup's get_text(separator=" ", strip=True).
+    A ">" inside a quoted attribute value does not end its tag.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._skip_until = None  # Closing tag we are waiting for, like "</script"
+
+    def feed(self, chunk):
+        """Adds HTML and returns the text nodes completed by it"""
+        self._buffer += chunk
+        return self._scan(final=False)
+
+    def close(self):
+        """Returns the text left once the whole document was fed"""
+        return self._scan(final=True)
+
+    def _scan(self, final):
+        nodes = []
+        buffer = self._buffer
+        position = 0
+
+        while position < len(buffer):
+            if self._skip_until:
+                end = buffer.lower().find(self._skip_until, position)
+                if end == -1:
+                    # The closing tag may be cut between two chunks
+                    position = max(position, len(buffer) - len(self._skip_until))
+                    break
+                close = buffer.find(">", end)
+                if close == -1:
+                    position = end
+                    break
+                self._skip_until = None
+                position = close + 1
+                continue
+
+            tag_start = buffer.find("<", position)
+            if tag_start == -1:
+                # The text node may go on in the next chunk
+                if final:
+                    self._add_text(nodes, buffer[position:])
+                    position = len(buffer)
+                break
+
+            self._add_text(nodes, buffer[position:tag_start])
+            position = tag_start
+
+            if buffer.startswith("<!--", position):
+                end = buffer.find("-->", position + 4)
+                if end == -1:
+                    break
+                position = end + 3
+                continue
+
+            match = TAG_PATTERN.match(buffer, position)
+            if match:
+                end = match.end() - 1
+            else:
+                # Unfinished tag, or a quote that is never closed
+                end = buffer.find(">", position)
+                if end == -1:
+                    break
+                if not final and len(buffer) - position < MAX_TAG_LENGTH:
+                    break
+            tag = buffer[position : end + 1]
+            position = end + 1
+            name = TAG_NAME_PATTERN.match(tag)
+            if (
+                name
+                and not tag.startswith("</")
+                and not tag.endswith("/>")
+                and name.group(1).lower() in SKIPPED_TAGS
+            ):
+                self._skip_until = "</" + name.group(1).lower()
+
+        self._buffer = "" if final else buffer[position:]
+        return nodes
+
+    @staticmethod
+    def _add_text(nodes, text):
+        text = html.unescape(text).strip()
+        if text:
+            nodes.append(text)
+
+
+class StreamVerdict:
+    """Result of scanning one page, small enough to keep for the whole run"""
+
+    def __init__(self, status_code, matched, bytes_read, complete, from_cache):
+        self.status_code = status_code
+        self.matched = matched
+        self.bytes_read = bytes_read
+        self.complete = complete  # False when the cap or an early match stopped reading
+        self.from_cache = from_cache
+
+
+def report_verdicts(verdicts):
+    """Prints how much was downloaded and how many pages were cut short"""
+    verdicts = [v for v in verdicts if isinstance(v, StreamVerdict)]
+    downloaded = sum(v.bytes_read for v in verdicts)
+    cut_short = sum(1 for v in verdicts if not v.complete)
+    print(
+        f"🌐 Streamed {downloaded / 1024**2:.2f} MB for {len(verdicts)} pages, "
+        f"{cut_short} stopped early (match or byte cap)"
+    )
+
+
+def scan_chunks(
+    chunks, predicate, encoding, max_bytes=DEFAULT_MAX_BYTES, overlap=DEFAULT_OVERLAP
+):
+    """
+    Runs a text predicate over an HTML byte stream, window by window.
+
+    Each window is the tail of the previous text (overlap characters, so a
+    match cut between two chunks is still seen) plus the new text nodes.
+
+    Args:
+        chunks (iterable): Body bytes in chunks
+        predicate (callable): predicate(text) -> bool, on visible text
+        encoding (str): Charset used to decode the bytes
+        max_bytes (int): Bytes read at most before giving up
+        overlap (int): Characters of text carried into the next window
+
+    Returns:
+        tuple: (matched, bytes_read, complete)
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    scanner = HtmlTextScanner()
+    tail = ""
+    bytes_read = 0
+
+    def check(nodes):
+        nonlocal tail
+        if not nodes:
+            return False
+        window = " ".join([tail, *nodes]) if tail else " ".join(nodes)
+        tail = window[-overlap:]
+        return predicate(window)
+
+    for chunk in chunks:
+        chunk = chunk[: max_bytes - bytes_read]
+        bytes_read += len(chunk)
+        if check(scanner.feed(decoder.decode(chunk))):
+            return True, bytes_read, False
+        if bytes_read >= max_bytes:
+            return check(scanner.close()), bytes_read, False
+
+    matched = check(scanner.feed(decoder.decode(b"", final=True)) + scanner.close())
+    return matched, bytes_read, True
+
+
+def stream_page_matches(
+    url,
+    predicate,
+    session=None,
+    headers=None,
+    timeout=10,
+    cache=None,
+    max_bytes=DEFAULT_MAX_BYTES,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """
+    Decides predicate(visible text) for a page while downloading it, and
+    stops reading as soon as it matches or max_bytes were read.
+
+    Pages fresh in the cache (younger than its TTL) are scanned from disk
+    with the same cap, so a verdict never depends on whether the page was
+    cached. Streamed pages are
+    not stored: a partial body is not a cacheable response.
+
+    Args:
+        url (str): Page to check
+        predicate (callable): predicate(text) -> bool
+        session (requests.Session): Optional session to reuse connections
+        headers (dict): Request headers
+        timeout (float): Timeout in seconds for the request
+        cache (HttpCache): Optional cache looked up (never written) first
+        max_bytes (int): Body bytes read at most
+        chunk_size (int): Bytes read from the socket at a time
+
+    Returns:
+        StreamVerdict: Status code, verdict and bytes read
+    """
+    cached = cache.lookup(url, fresh_only=True) if cache is not None else None
+    if cached is not None:
+        chunks = (
+            cached.content[i : i + chunk_size]
+            for i in range(0, len(cached.content), chunk_size)
+        )
+        matched = False
+        if cached.status_code == 200:
+            matched, _, _ = scan_chunks(chunks, predicate, cached.encoding, max_bytes)
+        return StreamVerdict(cached.status_code, matched, 0, True, True)
+
+    http = session or requests
+    with http.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            return StreamVerdict(response.status_code, False, 0, True, False)
+
+        chunks = response.iter_content(chunk_size)
+        first = next(chunks, b"")
+        encoding = detect_encoding(response.headers, first)
+        matched, bytes_read, complete = scan_chunks(
+            _prepend(first, chunks), predicate, encoding, max_bytes
+        )
+        return StreamVerdict(200, matched, bytes_read, complete, False)
+
+
+def _prepend(first, chunks):
+    yield first
+    yield from chunks
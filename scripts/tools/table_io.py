@@ -0,0 +1,149 @@
+import os
+import sys
+
+import pandas as pd
+
+# Format of the tables the pipeline stages write: "csv", "parquet" or "feather"
+# (Parquet and Feather need pyarrow)
+PIPELINE_FORMAT = os.environ.get("PIPELINE_FORMAT", "csv")
+
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+
+def table_format(path):
+    """Format of a table file, from its extension (CSV when unknown)"""
+    return FORMATS.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+def with_format(path, table_format_name):
+    """Same file name with the extension of another format"""
+    return os.path.splitext(path)[0] + EXTENSIONS[table_format_name]
+
+
+def stage_path(path):
+    """
+    Output path of a stage in PIPELINE_FORMAT, so "german_law_analysis.csv"
+    becomes "german_law_analysis.parquet" when PIPELINE_FORMAT=parquet.
+    """
+    return with_format(path, PIPELINE_FORMAT)
+
+
+def resolve_table(path, newest=False):
+    """
+    Finds the table a stage should read. A file passed with its extension is
+    read as given when it exists. Otherwise (bare name, missing file, or
+    newest=True) the newest of the files with this name in any supported
+    format is used: a previous stage may have written "links.parquet" where
+    this one expects "links.csv".
+    """
+    bare_name = os.path.splitext(path)[1].lower() not in FORMATS
+    if not (newest or bare_name) and os.path.exists(path):
+        return path
+    candidates = dict.fromkeys([path] + [with_format(path, f) for f in EXTENSIONS])
+    existing = [candidate for candidate in candidates if os.path.exists(candidate)]
+    if not existing:
+        return path
+    return max(existing, key=os.path.getmtime)
+
+
+def read_table(path, columns=None, **csv_options):
+    """
+    Reads a pipeline table in any of the supported formats.
+
+    Parquet and Feather only load the requested columns from disk and keep
+    the column types they were written with.
+
+    Args:
+        path (str): Table file (another format with the same name is used
+            when the file does not exist or has no extension, see
+            resolve_table)
+        columns (list): Columns to load, None for all
+        **csv_options: Extra pd.read_csv arguments, used for CSV files only
+
+    Returns:
+        pandas.DataFrame: The table
+    """
+    path = resolve_table(path)
+    file_format = table_format(path)
+    if file_format == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    if file_format == "feather":
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, **csv_options)
+
+
+def iter_table_chunks(path, chunk_size, **csv_options):
+    """
+    Reads a table at most chunk_size rows at a time (flat memory for big
+    tables).
+
+    Yields:
+        pandas.DataFrame: Consecutive chunks of the table
+    """
+    path = resolve_table(path)
+    file_format = table_format(path)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif file_format == "feather":
+        import pyarrow as pa
+
+        # Memory-mapped, so only the record batch being converted is loaded
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                for start in range(0, batch.num_rows, chunk_size):
+                    yield batch.slice(start, chunk_size).to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, **csv_options)
+
+
+def write_table(df, path, **csv_options):
+    """
+    Writes a pipeline table, in the format given by the file extension.
+
+    The table is written to a temporary file that then replaces path, so a
+    crash mid-write never leaves a truncated table behind.
+
+    Args:
+        df (pandas.DataFrame): Table to write
+        path (str): Output file (.csv, .parquet or .feather)
+        **csv_options: Extra DataFrame.to_csv arguments, used for CSV only
+    """
+    file_format = table_format(path)
+    # Same folder, so the rename never crosses file systems
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if file_format == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        elif file_format == "feather":
+            df.reset_index(drop=True).to_feather(tmp_path)
+        else:
+            df.to_csv(tmp_path, index=False, **csv_options)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def export_csv(path, csv_path=None):
+    """Writes a CSV copy of a Parquet/Feather table, returns the CSV path"""
+    csv_path = csv_path or with_format(path, "csv")
+    write_table(read_table(path), csv_path)
+    return csv_path
+
+
+if __name__ == "__main__":
+    # Usage: python table_io.py table.parquet [more tables...] -> CSV copies
+    for table in sys.argv[1:]:
+        print(f"✅ {table} -> {export_csv(table)}")
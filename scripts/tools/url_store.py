@@ -0,0 +1,262 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from url_tools import dedupe_key
+
+DEFAULT_STORE_PATH = os.environ.get("URL_STORE_PATH", ".url_store.sqlite")
+BATCH_SIZE = 500  # URLs looked up or written per SQLite statement
+BUSY_TIMEOUT = 60  # Seconds to wait while another process writes the store
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class UrlStore:
+    """
+    Persistent index of every URL the pipeline has seen, shared by all runs.
+
+    URLs are stored under their dedupe key (see url_tools.dedupe_key), so
+    http/https, "www.", trailing slashes and tracking parameters do not make
+    a page look new. Each stage records its result per URL ("1"/"0" for the
+    filters, the category for step 3) and can skip what it already did.
+
+    Lookups go through SQLite's primary-key index (a few page reads, with ten
+    URLs or tens of millions) and nothing is loaded into memory. Writes are
+    buffered and committed BATCH_SIZE at a time. Several processes can use
+    the same file; writers wait up to BUSY_TIMEOUT for each other.
+
+    Args:
+        path (str): SQLite file of the store
+        version (str): Stored as part of every stage name, so results
+            recorded by another version of a stage's code are not reused
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, version=""):
+        self.path = path
+        self.version = version
+        self.skipped = 0
+        self.added = 0
+        self.recorded = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # WAL lets several stages read the store while one of them writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS urls (
+                url_key TEXT PRIMARY KEY,
+                url TEXT,
+                first_seen REAL
+            ) WITHOUT ROWID""")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS stage_results (
+                url_key TEXT,
+                stage TEXT,
+                result TEXT,
+                processed_at REAL,
+                PRIMARY KEY (url_key, stage)
+            ) WITHOUT ROWID""")
+        self._db.commit()
+
+    # ---- seen URLs ----
+
+    def add(self, url):
+        """
+        Records a URL.
+
+        Returns:
+            bool: True if the page was new, False if it was seen before
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO urls VALUES (?, ?, ?)",
+                (dedupe_key(url), url, time.time()),
+            )
+            self._db.commit()
+        if cursor.rowcount:
+            self.added += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def __contains__(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM urls WHERE url_key = ?", (dedupe_key(url),)
+            ).fetchone()
+        return row is not None
+
+    def iter_new(self, urls, batch_size=BATCH_SIZE):
+        """
+        Yields the URLs never seen before (also across this input, so
+        duplicates inside it come out once) and records them.
+
+        Works on any iterable, so huge inputs can be streamed through.
+        """
+        for batch in _batches(urls, batch_size):
+            keys = {}
+            for url in batch:
+                keys.setdefault(dedupe_key(url), url)
+            with self._lock:
+                self._flush()
+                known = self._known_keys(list(keys))
+                new = [(k, u, time.time()) for k, u in keys.items() if k not in known]
+                self._db.executemany("INSERT OR IGNORE INTO urls VALUES (?, ?, ?)", new)
+                self._db.commit()
+            self.added += len(new)
+            self.skipped += len(batch) - len(new)
+            for _, url, _ in new:
+                yield url
+
+    # ---- stage results ----
+
+    def _stage(self, stage):
+        return f"{stage}@{self.version}" if self.version else stage
+
+    def results(self, urls, stage):
+        """
+        Results a stage already recorded for some URLs.
+
+        Returns:
+            dict: {url: result} for the URLs the stage has processed
+        """
+        found = {}
+        for batch in _batches(urls, BATCH_SIZE):
+            # Every spelling of a known page gets its result
+            spellings = {}
+            for url in batch:
+                spellings.setdefault(dedupe_key(url), []).append(url)
+            with self._lock:
+                self._flush()
+                rows = self._db.execute(
+                    "SELECT url_key, result FROM stage_results "
+                    f"WHERE stage = ? AND url_key IN ({','.join('?' * len(spellings))})",
+                    (self._stage(stage), *spellings),
+                ).fetchall()
+            for key, result in rows:
+                for url in spellings[key]:
+                    found[url] = result
+        self.skipped += len(found)
+        return found
+
+    def result(self, url, stage):
+        """Result the stage recorded for a URL, or None"""
+        with self._lock:
+            self._flush()
+            row = self._db.execute(
+                "SELECT result FROM stage_results WHERE url_key = ? AND stage = ?",
+                (dedupe_key(url), self._stage(stage)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark(self, url, stage, result="1"):
+        """Records a stage's result for a URL (written in batches)"""
+        with self._lock:
+            self._pending.append(
+                (dedupe_key(url), url, self._stage(stage), str(result))
+            )
+            self.recorded += 1
+            if len(self._pending) >= BATCH_SIZE:
+                self._flush()
+
+    def iter_pending(self, urls, stage, batch_size=BATCH_SIZE):
+        """Yields the URLs the stage has not processed yet"""
+        for batch in _batches(urls, batch_size):
+            done = self.results(batch, stage)
+            for url in batch:
+                if url not in done:
+                    yield url
+
+    def forget_stage(self, stage):
+        """Drops a stage's results, so its next run processes every URL again"""
+        with self._lock:
+            self._flush()
+            self._db.execute(
+                "DELETE FROM stage_results WHERE stage = ?", (self._stage(stage),)
+            )
+            self._db.commit()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR IGNORE INTO urls VALUES (?, ?, ?)",
+            [(key, url, now) for key, url, _, _ in self._pending],
+        )
+        self._db.executemany(
+            "INSERT OR REPLACE INTO stage_results VALUES (?, ?, ?, ?)",
+            [(key, stage, result, now) for key, _, stage, result in self._pending],
+        )
+        self._db.commit()
+        self._pending = []
+
+    def _known_keys(self, keys):
+        rows = self._db.execute(
+            f"SELECT url_key FROM urls WHERE url_key IN ({','.join('?' * len(keys))})",
+            keys,
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def counts(self):
+        """
+        Returns:
+            dict: {"urls": seen URLs, stage: URLs it processed, ...}
+        """
+        self.flush()
+        with self._lock:
+            counts = {
+                "urls": self._db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+            }
+            for stage, count in self._db.execute(
+                "SELECT stage, COUNT(*) FROM stage_results GROUP BY stage"
+            ):
+                counts[stage] = count
+        return counts
+
+    def report(self):
+        self.flush()
+        print(
+            f"🔗 URL store: {self.added} new URLs, {self.recorded} results "
+            f"recorded, {self.skipped} skipped as already known"
+        )
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+
+_shared_stores = {}
+
+
+def get_shared_store(path=DEFAULT_STORE_PATH):
+    """Returns one UrlStore per file so every stage in a process shares it"""
+    if path not in _shared_stores:
+        _shared_stores[path] = UrlStore(path)
+    return _shared_stores[path]
+
+
+if __name__ == "__main__":
+    # Usage: python url_store.py            -> URLs seen and processed per stage
+    #        python url_store.py reset STAGE -> process every URL again in STAGE
+    store = UrlStore()
+    if len(sys.argv) == 3 and sys.argv[1] == "reset":
+        store.forget_stage(sys.argv[2])
+        print(f"✅ Results of stage '{sys.argv[2]}' removed")
+    for name, count in store.counts().items():
+        print(f"{name}: {count}")
+    store.close()
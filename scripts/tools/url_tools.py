@@ -0,0 +1,91 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga", "yclid"}
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonicalize_url(url):
+    """
+    Normalizes a URL so equivalent spellings map to the same cache key.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters (utm_*, gclid, ...), sorts the query string and uses "/" for
+    an empty path.
+
+    Args:
+        url (str): URL to normalize
+
+    Returns:
+        str: Canonical URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    port = parts.port
+    if port is not None and str(port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+# Public suffixes with two labels that show up in our link lists
+MULTI_LABEL_SUFFIXES = {
+    "co.uk",
+    "org.uk",
+    "ac.uk",
+    "gv.at",
+    "or.at",
+    "co.at",
+    "com.au",
+    "com.br",
+    "com.es",
+    "com.tr",
+    "co.jp",
+}
+
+
+def registrable_domain(url):
+    """
+    Returns the domain a site is registered under, so "https://www.kanzlei.de/team"
+    and "http://blog.kanzlei.de" both give "kanzlei.de".
+
+    Args:
+        url (str): URL or bare host name
+
+    Returns:
+        str: Registrable domain (the host itself for IP addresses and localhost)
+    """
+    host = (urlsplit(url if "//" in url else f"//{url}").hostname or "").lower()
+    labels = host.rstrip(".").split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host
+    keep = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+
+def dedupe_key(url):
+    """
+    Key under which two links count as the same page: the canonical URL
+    without the scheme, a leading "www." and a trailing slash, so
+    "http://www.kanzlei.de/team/" and "https://kanzlei.de/team" match.
+
+    Args:
+        url (str): URL to reduce
+
+    Returns:
+        str: "host/path?query"
+    """
+    parts = urlsplit(canonicalize_url(url))
+    host = parts.netloc[4:] if parts.netloc.startswith("www.") else parts.netloc
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"